@@ -1,35 +1,227 @@
 import os
 import uuid
-import re
-from typing import List, Optional
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Type
 from dotenv import load_dotenv
+from pydantic import BaseModel
 from emergentintegrations.llm.chat import LlmChat, UserMessage
-from models import ContentTone, KeywordResult, CompetitorResult
+from models import (
+    ContentTone, KeywordResult, CompetitorsOutput, KeywordsOutput, MetaTagsOutput, PlagiarismOutput,
+    SEOSuggestionsOutput
+)
+from seo_analyzer import analyze_content, heading_structure
+from stylometry import score_text
+from llm_cache import LLMCache, cache_key
+from singleflight import SingleFlight
+from llm_pool import LLMClientPool
+from llm_dispatcher import LLMDispatcher
+from llm_json import ParseStats, ResponseParseError, parse_model
+from chunking import join_chunks, restore_structure, sample_evenly, split_markdown
 
 load_dotenv()
 
 EMERGENT_LLM_KEY = os.environ.get("EMERGENT_LLM_KEY")
+LLM_PROVIDER = "openai"
+LLM_MODEL = "gpt-5.2"
+# OpenAI-compatible endpoint that accepts EMERGENT_LLM_KEY, used for streaming
+# completions. Without it article streams are delivered as a single chunk.
+LLM_API_BASE = os.environ.get("LLM_API_BASE")
+LLM_WARMUP_URL = os.environ.get("LLM_WARMUP_URL", LLM_API_BASE or "https://api.openai.com/v1")
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", "50"))
+LLM_MAX_KEEPALIVE = int(os.environ.get("LLM_MAX_KEEPALIVE", "20"))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "1000"))
+# Max LLM calls a single generation request may have in flight at once
+GENERATION_CONCURRENCY = int(os.environ.get("GENERATION_CONCURRENCY", "3"))
+# Max LLM calls in flight across all requests; beyond it calls queue by plan
+LLM_MAX_IN_FLIGHT = int(os.environ.get("LLM_MAX_IN_FLIGHT", "16"))
+# Ask the provider for a JSON object where a method parses the response
+LLM_JSON_MODE = os.environ.get("LLM_JSON_MODE", "true").lower() == "true"
+# Extra attempts when a response does not parse (provider errors are not retried)
+LLM_PARSE_RETRIES = int(os.environ.get("LLM_PARSE_RETRIES", "1"))
+# Long documents are processed in chunks of about this many characters,
+# CHUNK_CONCURRENCY chunks at a time
+REWRITE_CHUNK_CHARS = int(os.environ.get("REWRITE_CHUNK_CHARS", "4000"))
+PLAGIARISM_CHUNK_CHARS = int(os.environ.get("PLAGIARISM_CHUNK_CHARS", "2000"))
+# Chunks scored per plagiarism check; longer documents are sampled evenly
+PLAGIARISM_MAX_CHUNKS = int(os.environ.get("PLAGIARISM_MAX_CHUNKS", "20"))
+CHUNK_CONCURRENCY = int(os.environ.get("CHUNK_CONCURRENCY", "4"))
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(text: str) -> str:
+    """Canonical form of user-entered research input (case, whitespace)"""
+    return " ".join(text.split()).lower()
 
 class AIService:
     def __init__(self):
         self.api_key = EMERGENT_LLM_KEY
+        self.cache = LLMCache(max_entries=LLM_CACHE_MAX_ENTRIES)
+        self.flights = SingleFlight()
+        self.pool = LLMClientPool(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE
+        )
+        self.dispatcher = LLMDispatcher(max_concurrency=LLM_MAX_IN_FLIGHT)
+        self.parsing = ParseStats()
+    
+    async def start(self):
+        """Install the shared LLM client pool and open connections ahead of traffic"""
+        self.pool.install()
+        await self.pool.warmup(LLM_WARMUP_URL)
+        if LLM_API_BASE:
+            logger.info(f"Streaming completions via {LLM_API_BASE}")
+        else:
+            logger.warning("LLM_API_BASE is not set; article streams fall back to a single chunk")
     
-    def _create_chat(self, system_message: str) -> LlmChat:
+    async def close(self):
+        await self.pool.aclose()
+    
+    def _create_chat(self, system_message: str, json_mode: bool = False) -> LlmChat:
         chat = LlmChat(
             api_key=self.api_key,
             session_id=str(uuid.uuid4()),
             system_message=system_message
         )
-        chat.with_model("openai", "gpt-5.2")
+        chat.with_model(LLM_PROVIDER, LLM_MODEL)
+        if json_mode and LLM_JSON_MODE:
+            chat.with_params(response_format={"type": "json_object"})
         return chat
     
-    async def generate_article(self, 
-                               title: str, 
-                               keywords: List[str], 
-                               tone: ContentTone,
-                               word_count: int = 1500,
-                               fun_mode: bool = False) -> dict:
-        """Generate SEO-optimized article content"""
+    async def _send(self, chat: LlmChat, prompt: str) -> str:
+        """Send a prompt to the provider once the dispatcher grants a slot"""
+        return await self.dispatcher.run(lambda: chat.send_message(UserMessage(text=prompt)))
+    
+    def _parse(self, method: str, response: str, schema: Type[BaseModel]) -> BaseModel:
+        try:
+            output = parse_model(response, schema)
+        except ResponseParseError as e:
+            self.parsing.record_failure(method, e)
+            raise
+        self.parsing.record_parsed(method)
+        return output
+    
+    async def _complete(self, method: str, system_message: str, prompt: str, use_cache: bool = True,
+                        schema: Optional[Type[BaseModel]] = None) -> Any:
+        """Send a single-turn prompt, serving byte-identical requests from cache.
+        
+        With ``schema`` the response is requested as JSON and returned parsed
+        into it; a response that does not parse raises ResponseParseError and
+        is never cached.
+        """
+        if not use_cache:
+            self.cache.record_bypass(method)
+            response = await self._send(self._create_chat(system_message, json_mode=schema is not None), prompt)
+            return self._parse(method, response, schema) if schema else response
+        
+        key = cache_key(f"{LLM_PROVIDER}/{LLM_MODEL}", system_message, prompt)
+        # Identical requests already in flight share one LLM call
+        return await self.flights.do(
+            key, lambda: self._complete_cached(method, key, system_message, prompt, schema), label=method
+        )
+    
+    async def _complete_cached(self, method: str, key: str, system_message: str, prompt: str,
+                               schema: Optional[Type[BaseModel]] = None) -> Any:
+        cached = await self.cache.get(method, key)
+        if cached is not None:
+            if schema is None:
+                return cached
+            try:
+                return self._parse(method, cached, schema)
+            except ResponseParseError:
+                pass  # cached before responses were validated; fetch a replacement
+        
+        response = await self._send(self._create_chat(system_message, json_mode=schema is not None), prompt)
+        output = self._parse(method, response, schema) if schema else response
+        await self.cache.set(method, key, response)
+        return output
+    
+    async def _complete_json(self, method: str, system_message: str, prompt: str,
+                             schema: Type[BaseModel], use_cache: bool = True) -> Optional[BaseModel]:
+        """Request JSON matching ``schema``; None when no attempt parsed.
+        
+        Only a response that fails to parse is retried, up to
+        LLM_PARSE_RETRIES times; provider errors propagate as before.
+        """
+        for attempt in range(LLM_PARSE_RETRIES + 1):
+            if attempt:
+                self.parsing.record_retry(method)
+            try:
+                return await self._complete(method, system_message, prompt, use_cache, schema=schema)
+            except ResponseParseError as e:
+                logger.warning(f"Unparseable {method} response (attempt {attempt + 1}): {e}")
+        self.parsing.record_fallback(method)
+        return None
+    
+    def metrics(self) -> dict:
+        return {
+            "cache": self.cache.stats(),
+            "coalescing": self.flights.stats(),
+            "pool": self.pool.stats(),
+            "dispatcher": self.dispatcher.stats(),
+            "parsing": self.parsing.stats(),
+        }
+    
+    async def run_concurrently(self,
+                               calls: Dict[str, Callable[[], Awaitable[Any]]],
+                               max_concurrency: int = GENERATION_CONCURRENCY) -> Tuple[dict, dict]:
+        """Run independent LLM calls concurrently under a per-request budget.
+        
+        Returns ``(results, timings)`` keyed like ``calls``; timings are in
+        milliseconds and also carry the wall-clock ``total`` and the
+        ``sequential`` sum the calls would have taken one after another.
+        """
+        budget = asyncio.Semaphore(max(1, max_concurrency))
+        timings = {}
+        
+        async def timed(name: str, call: Callable[[], Awaitable[Any]]):
+            async with budget:
+                start = time.perf_counter()
+                try:
+                    return await call()
+                finally:
+                    timings[name] = round((time.perf_counter() - start) * 1000, 1)
+        
+        started = time.perf_counter()
+        tasks = {name: asyncio.create_task(timed(name, call)) for name, call in calls.items()}
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        
+        timings["sequential"] = round(sum(timings[name] for name in calls), 1)
+        timings["total"] = round((time.perf_counter() - started) * 1000, 1)
+        return {name: task.result() for name, task in tasks.items()}, timings
+    
+    async def map_chunks(self,
+                         chunks: List[str],
+                         call: Callable[[str], Awaitable[Any]]) -> Tuple[List[Any], List[dict], dict]:
+        """Run ``call`` over every chunk, CHUNK_CONCURRENCY at a time.
+        
+        Returns the results in chunk order, ``{index, chars, latency_ms}`` per
+        chunk, and the wall-clock ``total`` and summed ``sequential`` ms.
+        """
+        results, timings = await self.run_concurrently(
+            {str(i): (lambda chunk=chunk: call(chunk)) for i, chunk in enumerate(chunks)},
+            max_concurrency=CHUNK_CONCURRENCY
+        )
+        per_chunk = [
+            {"index": i, "chars": len(chunk), "latency_ms": timings[str(i)]}
+            for i, chunk in enumerate(chunks)
+        ]
+        totals = {"total": timings["total"], "sequential": timings["sequential"]}
+        return [results[str(i)] for i in range(len(chunks))], per_chunk, totals
+    
+    def _article_prompts(self,
+                         title: str,
+                         keywords: List[str],
+                         tone: ContentTone,
+                         word_count: int = 1500,
+                         fun_mode: bool = False) -> Tuple[str, str]:
+        """Build the (system message, prompt) pair for article generation"""
         
         tone_instructions = {
             ContentTone.PROFESSIONAL: "Use a professional, authoritative tone with industry expertise.",
@@ -65,8 +257,6 @@ class AIService:
         Output format: Return ONLY the article content in Markdown format.
         """
         
-        chat = self._create_chat(system_message)
-        
         prompt = f"""
         Write a comprehensive article with the following specifications:
         
@@ -84,11 +274,10 @@ class AIService:
         Remember to naturally incorporate the keywords for SEO optimization.
         """
         
-        message = UserMessage(text=prompt)
-        content = await chat.send_message(message)
-        
-        # Generate meta tags
-        meta_chat = self._create_chat("You are an SEO expert. Generate meta tags.")
+        return system_message, prompt
+    
+    async def generate_meta_tags(self, title: str, keywords: List[str]) -> dict:
+        """Generate meta title and description for an article"""
         meta_prompt = f"""
         Based on this article title and content, generate:
         1. Meta Title (under 60 characters, include main keyword)
@@ -99,34 +288,90 @@ class AIService:
         
         Return as JSON: {{"meta_title": "...", "meta_description": "..."}}
         """
-        meta_message = UserMessage(text=meta_prompt)
-        meta_response = await meta_chat.send_message(meta_message)
+        meta = await self._complete_json(
+            "meta_tags", "You are an SEO expert. Generate meta tags.", meta_prompt, MetaTagsOutput
+        )
+        if meta:
+            return {"meta_title": meta.meta_title, "meta_description": meta.meta_description}
         
-        # Parse meta response
-        meta_title = title[:60]
-        meta_description = f"Learn about {title}. Expert insights and actionable tips."
+        return {
+            "meta_title": title[:60],
+            "meta_description": f"Learn about {title}. Expert insights and actionable tips."
+        }
+    
+    async def generate_article(self, 
+                               title: str, 
+                               keywords: List[str], 
+                               tone: ContentTone,
+                               word_count: int = 1500,
+                               fun_mode: bool = False,
+                               max_concurrency: int = GENERATION_CONCURRENCY) -> dict:
+        """Generate SEO-optimized article content"""
         
-        try:
-            import json
-            # Try to extract JSON from response
-            json_match = re.search(r'\{[^}]+\}', meta_response)
-            if json_match:
-                meta_data = json.loads(json_match.group())
-                meta_title = meta_data.get("meta_title", meta_title)
-                meta_description = meta_data.get("meta_description", meta_description)
-        except:
-            pass
+        system_message, prompt = self._article_prompts(title, keywords, tone, word_count, fun_mode)
+        chat = self._create_chat(system_message)
+        
+        # Body and meta tags only depend on the request, so run them side by side
+        results, timings = await self.run_concurrently({
+            "body": lambda: self._send(chat, prompt),
+            "meta": lambda: self.generate_meta_tags(title, keywords)
+        }, max_concurrency=max_concurrency)
+        content = results["body"]
+        meta = results["meta"]
+        logger.info(f"Article generation timings (ms): {timings}")
         
         word_count_actual = len(content.split())
         
         return {
             "content": content,
-            "meta_title": meta_title,
-            "meta_description": meta_description,
-            "word_count": word_count_actual
+            "meta_title": meta["meta_title"],
+            "meta_description": meta["meta_description"],
+            "word_count": word_count_actual,
+            "timings": timings
         }
     
-    async def generate_keywords(self, seed_keyword: str, count: int = 20) -> List[KeywordResult]:
+    async def stream_article(self,
+                             title: str,
+                             keywords: List[str],
+                             tone: ContentTone,
+                             word_count: int = 1500,
+                             fun_mode: bool = False) -> AsyncIterator[str]:
+        """Yield the article body as markdown chunks while the model produces it"""
+        
+        system_message, prompt = self._article_prompts(title, keywords, tone, word_count, fun_mode)
+        
+        # The slot is held until the stream is fully consumed
+        async with self.dispatcher.slot():
+            if not LLM_API_BASE:
+                # The key only authenticates against the proxy, so do not try the provider directly
+                chat = self._create_chat(system_message)
+                yield await chat.send_message(UserMessage(text=prompt))
+                return
+            try:
+                import litellm
+                response = await litellm.acompletion(
+                    model=f"{LLM_PROVIDER}/{LLM_MODEL}",
+                    messages=[
+                        {"role": "system", "content": system_message},
+                        {"role": "user", "content": prompt}
+                    ],
+                    api_key=self.api_key,
+                    api_base=LLM_API_BASE,
+                    stream=True
+                )
+            except Exception as e:
+                # Streaming transport unavailable: fall back to a single chunk
+                logger.warning(f"Streaming completion unavailable, falling back: {e}")
+                chat = self._create_chat(system_message)
+                yield await chat.send_message(UserMessage(text=prompt))
+                return
+            
+            async for chunk in response:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+    
+    async def generate_keywords(self, seed_keyword: str, count: int = 20, use_cache: bool = True) -> List[KeywordResult]:
         """Generate related keywords and long-tail variations"""
         
         system_message = """
@@ -134,10 +379,8 @@ class AIService:
         For each keyword, estimate search volume (100-10000), difficulty (1-100), and relevance score (0.0-1.0).
         """
         
-        chat = self._create_chat(system_message)
-        
         prompt = f"""
-        Generate {count} SEO keywords related to: "{seed_keyword}"
+        Generate {count} SEO keywords related to: "{normalize_query(seed_keyword)}"
         
         Include:
         - Primary keywords (2-3 words)
@@ -145,47 +388,38 @@ class AIService:
         - Question-based keywords
         - LSI (Latent Semantic Indexing) keywords
         
-        Return as JSON array:
-        [
-            {{
-                "keyword": "example keyword",
-                "search_volume": 1000,
-                "difficulty": 45,
-                "relevance_score": 0.85,
-                "is_long_tail": false
-            }}
-        ]
+        Return as JSON:
+        {{
+            "keywords": [
+                {{
+                    "keyword": "example keyword",
+                    "search_volume": 1000,
+                    "difficulty": 45,
+                    "relevance_score": 0.85,
+                    "is_long_tail": false
+                }}
+            ]
+        }}
         """
         
-        message = UserMessage(text=prompt)
-        response = await chat.send_message(message)
-        
-        keywords = []
-        try:
-            import json
-            # Extract JSON array from response
-            json_match = re.search(r'\[.*\]', response, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group())
-                for item in data[:count]:
-                    keywords.append(KeywordResult(
-                        keyword=item.get("keyword", ""),
-                        search_volume=item.get("search_volume"),
-                        difficulty=item.get("difficulty"),
-                        relevance_score=item.get("relevance_score", 0.5),
-                        is_long_tail=item.get("is_long_tail", len(item.get("keyword", "").split()) > 3)
-                    ))
-        except Exception as e:
+        output = await self._complete_json("keywords", system_message, prompt, KeywordsOutput, use_cache)
+        if output is None:
             # Fallback: generate basic keywords
-            keywords = [
+            return [
                 KeywordResult(keyword=seed_keyword, search_volume=1000, difficulty=50, relevance_score=1.0),
                 KeywordResult(keyword=f"best {seed_keyword}", search_volume=800, difficulty=45, relevance_score=0.9),
                 KeywordResult(keyword=f"how to {seed_keyword}", search_volume=600, difficulty=40, relevance_score=0.85, is_long_tail=True),
             ]
         
+        keywords = output.keywords[:count]
+        for item in keywords:
+            if "relevance_score" not in item.model_fields_set:
+                item.relevance_score = 0.5
+            if "is_long_tail" not in item.model_fields_set:
+                item.is_long_tail = len(item.keyword.split()) > 3
         return keywords
     
-    async def analyze_competitors(self, keyword: str, count: int = 5) -> dict:
+    async def analyze_competitors(self, keyword: str, count: int = 5, use_cache: bool = True) -> dict:
         """Analyze SERP competitors and suggest content improvements"""
         
         system_message = """
@@ -193,10 +427,8 @@ class AIService:
         and provide actionable suggestions for creating better content.
         """
         
-        chat = self._create_chat(system_message)
-        
         prompt = f"""
-        For the keyword "{keyword}", analyze what top-ranking articles typically include:
+        For the keyword "{normalize_query(keyword)}", analyze what top-ranking articles typically include:
         
         1. Generate {count} hypothetical top SERP results with realistic titles and descriptions
         2. Identify common content structure and headings
@@ -220,111 +452,61 @@ class AIService:
         }}
         """
         
-        message = UserMessage(text=prompt)
-        response = await chat.send_message(message)
-        
-        results = []
-        suggested_outline = []
-        content_gaps = []
-        
-        try:
-            import json
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group())
-                for item in data.get("results", [])[:count]:
-                    results.append(CompetitorResult(
-                        rank=item.get("rank", 1),
-                        title=item.get("title", ""),
-                        url=item.get("url", ""),
-                        description=item.get("description", ""),
-                        word_count=item.get("word_count"),
-                        headings=item.get("headings", []),
-                        content_gaps=item.get("content_gaps", [])
-                    ))
-                suggested_outline = data.get("suggested_outline", [])
-                content_gaps = data.get("content_gaps", [])
-        except:
-            pass
+        output = await self._complete_json("competitors", system_message, prompt, CompetitorsOutput, use_cache)
+        output = output or CompetitorsOutput()
         
         return {
-            "results": results,
-            "suggested_outline": suggested_outline,
-            "content_gaps": content_gaps
+            "results": output.results[:count],
+            "suggested_outline": output.suggested_outline,
+            "content_gaps": output.content_gaps
         }
     
-    async def analyze_seo(self, content: str, target_keyword: str) -> dict:
-        """Analyze content for SEO optimization"""
+    async def analyze_seo(self, content: str, target_keyword: str, enrich: bool = False, use_cache: bool = True) -> dict:
+        """Analyze content for SEO optimization.
         
-        word_count = len(content.split())
-        keyword_count = content.lower().count(target_keyword.lower())
-        keyword_density = (keyword_count / word_count * 100) if word_count > 0 else 0
+        Scoring is computed locally over the whole document; ``enrich`` adds
+        an LLM pass that only contributes extra suggestions.
+        """
+        
+        analysis = analyze_content(content, target_keyword)
+        if not enrich:
+            return analysis
         
         system_message = """
         You are an SEO analyst. Evaluate content for SEO optimization and provide actionable suggestions.
         """
         
-        chat = self._create_chat(system_message)
-        
+        outline = "\n".join(f"{'#' * h['level']} {h['text']}" for h in heading_structure(content))
         prompt = f"""
-        Analyze this content for SEO optimization:
+        Suggest improvements for this content. The metrics below were already computed.
         
         Target Keyword: {target_keyword}
-        Word Count: {word_count}
-        Keyword Density: {keyword_density:.2f}%
+        Word Count: {analysis["word_count"]}
+        Keyword Density: {analysis["keyword_density"]:.2f}%
+        Readability (Flesch): {analysis["readability_score"]}
+        Issues found: {'; '.join(i["message"] for i in analysis["issues"]) or 'None'}
         
-        Content (first 1000 chars):
-        {content[:1000]}...
+        Heading outline:
+        {outline or 'No headings'}
         
-        Provide:
-        1. SEO Score (0-100)
-        2. Readability Score (0-100)
-        3. Top 5 suggestions for improvement
-        4. Issues found (title, headings, keyword usage, etc.)
+        Opening (first 1000 chars):
+        {content[:1000]}...
         
-        Return as JSON:
+        Return the top 5 suggestions for improvement as JSON:
         {{
-            "score": 75,
-            "readability_score": 80,
-            "suggestions": ["Add more H2 headings", ...],
-            "issues": [{{"type": "warning", "message": "Keyword density too low"}}]
+            "suggestions": ["Add more H2 headings", ...]
         }}
         """
         
-        message = UserMessage(text=prompt)
-        response = await chat.send_message(message)
-        
-        score = 70
-        readability_score = 75
-        suggestions = []
-        issues = []
-        
-        try:
-            import json
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group())
-                score = data.get("score", 70)
-                readability_score = data.get("readability_score", 75)
-                suggestions = data.get("suggestions", [])
-                issues = data.get("issues", [])
-        except:
-            suggestions = [
-                "Add target keyword to the first paragraph",
-                "Include more H2 and H3 headings",
-                "Add internal and external links",
-                "Optimize meta description"
+        output = await self._complete_json("seo_analysis", system_message, prompt, SEOSuggestionsOutput, use_cache)
+        if output:
+            analysis["suggestions"] = output.suggestions + [
+                s for s in analysis["suggestions"] if s not in output.suggestions
             ]
         
-        return {
-            "score": score,
-            "keyword_density": keyword_density,
-            "readability_score": readability_score,
-            "suggestions": suggestions,
-            "issues": issues
-        }
+        return analysis
     
-    async def rewrite_content(self, content: str, tone: ContentTone, humanize: bool = False, preserve_keywords: List[str] = []) -> dict:
+    async def rewrite_content(self, content: str, tone: ContentTone, humanize: bool = False, preserve_keywords: List[str] = [], use_cache: bool = True) -> dict:
         """Rewrite and humanize content"""
         
         humanize_text = """
@@ -341,44 +523,73 @@ class AIService:
         Preserve these keywords: {', '.join(preserve_keywords) if preserve_keywords else 'None specified'}
         """
         
-        chat = self._create_chat(system_message)
+        chunks = split_markdown(content, REWRITE_CHUNK_CHARS) or [content]
+        section_note = (
+            "\n        - This is one section of a longer document: do not add an introduction or conclusion"
+            if len(chunks) > 1 else ""
+        )
         
-        prompt = f"""
+        async def rewrite_chunk(chunk: str) -> Optional[str]:
+            prompt = f"""
         Rewrite the following content with a {tone.value} tone:
         
-        {content}
+        {chunk}
         
         Requirements:
         - Maintain the core message and information
         - Improve readability and engagement
         - Keep SEO keywords intact
+        - Keep every markdown heading line exactly as written{section_note}
         - Return only the rewritten content
         """
-        
-        message = UserMessage(text=prompt)
-        rewritten = await chat.send_message(message)
+            rewritten = await self._complete("rewrite", system_message, prompt, use_cache)
+            return restore_structure(chunk, rewritten, preserve_keywords)
+        
+        # Map: rewrite sections concurrently; reduce: stitch them back in order,
+        # keeping the original of any section that lost a heading or keyword
+        rewrites, chunk_timings, timings = await self.map_chunks(chunks, rewrite_chunk)
+        kept = sum(1 for rewritten in rewrites if rewritten is None)
+        logger.info(f"Rewrote {len(chunks)} chunks in {timings['total']} ms ({timings['sequential']} ms sequential)")
+        
+        changes_made = [
+            f"Applied {tone.value} tone",
+            "Humanized" if humanize else "Standard rewrite",
+            f"Preserved {len(preserve_keywords)} keywords" if preserve_keywords else "No keywords specified"
+        ]
+        if len(chunks) > 1:
+            changes_made.append(f"Rewrote {len(chunks)} sections")
+        if kept:
+            changes_made.append(f"Kept {kept} section(s) unchanged to preserve headings and keywords")
         
         return {
             "original_content": content,
-            "rewritten_content": rewritten,
-            "changes_made": [
-                f"Applied {tone.value} tone",
-                "Humanized" if humanize else "Standard rewrite",
-                f"Preserved {len(preserve_keywords)} keywords" if preserve_keywords else "No keywords specified"
-            ]
+            "rewritten_content": join_chunks([r if r is not None else c for r, c in zip(rewrites, chunks)]),
+            "changes_made": changes_made,
+            "chunks": chunk_timings,
+            "timings": timings
         }
     
-    async def check_plagiarism(self, content: str) -> dict:
-        """Check content for potential plagiarism/AI detection"""
+    async def check_plagiarism(self, content: str, enrich: bool = False, use_cache: bool = True) -> dict:
+        """Check content for AI-detection risk.
+        
+        Scores and flagged spans come from local stylometric features of the
+        whole text; ``enrich`` adds an LLM pass over the content in chunks
+        that only contributes extra patterns and suggestions.
+        """
+        
+        started = time.perf_counter()
+        report = score_text(content)
+        report["timings"] = {"stylometry": round((time.perf_counter() - started) * 1000, 1)}
+        if not enrich:
+            return report
         
         system_message = """
         You are a content authenticity analyzer. Analyze content for patterns that might trigger AI detection
         and suggest improvements for more natural, original writing.
         """
         
-        chat = self._create_chat(system_message)
-        
-        prompt = f"""
+        async def check_chunk(chunk: str) -> Optional[PlagiarismOutput]:
+            prompt = f"""
         Analyze this content for:
         1. AI-detection risk (0-100, lower is better)
         2. Originality estimation (0-100)
@@ -386,7 +597,7 @@ class AIService:
         4. Suggestions to make it more human
         
         Content:
-        {content[:2000]}
+        {chunk}
         
         Return as JSON:
         {{
@@ -396,24 +607,28 @@ class AIService:
             "suggestions": ["Suggestion 1", "Suggestion 2"]
         }}
         """
-        
-        message = UserMessage(text=prompt)
-        response = await chat.send_message(message)
-        
-        try:
-            import json
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-        except:
-            pass
-        
-        return {
-            "ai_detection_risk": 30,
-            "originality_score": 80,
-            "flagged_patterns": [],
-            "suggestions": ["Content appears natural"]
-        }
+            return await self._complete_json("plagiarism", system_message, prompt, PlagiarismOutput, use_cache)
+        
+        # Map: review every chunk (or an even sample of a very long document)
+        chunks = sample_evenly(split_markdown(content, PLAGIARISM_CHUNK_CHARS) or [content], PLAGIARISM_MAX_CHUNKS)
+        outputs, chunk_timings, timings = await self.map_chunks(chunks, check_chunk)
+        for timing, output in zip(chunk_timings, outputs):
+            # The model's own estimate, for comparison with the local score
+            timing["ai_detection_risk"] = output.ai_detection_risk if output else None
+        
+        # Reduce: the model's patterns and suggestions in chunk order, ahead of the local ones
+        scored = [output for output in outputs if output]
+        patterns = list(dict.fromkeys(p for o in scored for p in o.flagged_patterns))
+        suggestions = list(dict.fromkeys(s for o in scored for s in o.suggestions))
+        report["flagged_patterns"] = patterns + [p for p in report["flagged_patterns"] if p not in patterns]
+        report["suggestions"] = suggestions + [s for s in report["suggestions"] if s not in suggestions]
+        report["timings"].update(timings)
+        report.update({
+            "chunks": chunk_timings,
+            "analyzed_chars": sum(len(chunk) for chunk in chunks),
+            "total_chars": len(content)
+        })
+        return report
 
 
 # Singleton instance
@@ -0,0 +1,16 @@
+"""Helpers shared by the benchmark scripts"""
+import statistics
+
+
+def summarize(label: str, samples: list) -> dict:
+    """Print and return mean/p50/p95/p99 of latency samples in ms"""
+    samples = sorted(samples)
+    result = {
+        "mean": statistics.mean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+    print(f"{label:<18} mean {result['mean']:8.1f} ms   p50 {result['p50']:8.1f} ms   "
+          f"p95 {result['p95']:8.1f} ms   p99 {result['p99']:8.1f} ms")
+    return result
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Connection setup cost per LLM call: fresh client per call vs the shared pool.
+
+Sends N sequential HEAD requests to the LLM endpoint, once with a new
+httpx client per request (what on-demand client construction costs) and
+once through LLMClientPool, and reports mean/p50/p95/p99 latency for each.
+
+    python bench_llm_pool.py --url https://api.openai.com/v1 -n 20
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from ai_service import LLM_WARMUP_URL
+from bench_common import summarize
+from llm_pool import LLMClientPool
+
+
+async def fresh_client(url: str, n: int) -> list:
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        async with httpx.AsyncClient() as client:
+            await client.head(url)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+async def pooled_client(url: str, n: int) -> list:
+    pool = LLMClientPool()
+    await pool.warmup(url)
+    samples = []
+    try:
+        for _ in range(n):
+            start = time.perf_counter()
+            await pool.client.head(url)
+            samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        await pool.aclose()
+    return samples
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default=LLM_WARMUP_URL)
+    parser.add_argument("-n", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{args.n} sequential requests to {args.url}")
+    before = summarize("client per call", await fresh_client(args.url, args.n))
+    after = summarize("pooled client", await pooled_client(args.url, args.n))
+    print(f"connection setup cost per call: ~{before['mean'] - after['mean']:.1f} ms saved")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
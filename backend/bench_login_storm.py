@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Latency of an unrelated endpoint while the server is handling a login storm.
+
+Probes GET /api/ sequentially, first on an idle server and then while
+``-c`` concurrent clients log in as fast as they can, and reports p50/p99
+probe latency for both phases. With password hashing on the event loop the
+storm p99 grows to several bcrypt rounds; offloaded, it stays near idle.
+
+    python bench_login_storm.py --url http://localhost:8001 -c 20 -d 10
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from bench_common import summarize
+
+EMAIL = "bench-login@example.com"
+PASSWORD = "bench-login-password"
+
+
+async def probe(client: httpx.AsyncClient, url: str, until: float) -> list:
+    samples = []
+    while time.perf_counter() < until:
+        start = time.perf_counter()
+        await client.get(f"{url}/api/")
+        samples.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+    return samples
+
+
+async def login_loop(client: httpx.AsyncClient, url: str, until: float) -> int:
+    logins = 0
+    while time.perf_counter() < until:
+        response = await client.post(f"{url}/api/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        response.raise_for_status()
+        logins += 1
+    return logins
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8001")
+    parser.add_argument("-c", "--concurrency", type=int, default=20)
+    parser.add_argument("-d", "--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        # 400 means the account is left over from an earlier run
+        await client.post(f"{args.url}/api/auth/register",
+                          json={"email": EMAIL, "name": "Bench", "password": PASSWORD})
+
+        print(f"probing {args.url}/api/ for {args.duration:.0f} s, idle then with {args.concurrency} clients logging in")
+        idle = await probe(client, args.url, time.perf_counter() + args.duration)
+        until = time.perf_counter() + args.duration
+        storm, *logins = await asyncio.gather(
+            probe(client, args.url, until),
+            *(login_loop(client, args.url, until) for _ in range(args.concurrency))
+        )
+
+    summarize("idle", idle)
+    summarize("login storm", storm)
+    print(f"{sum(logins) / args.duration:.1f} logins/s during the storm")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Throughput of the local stylometric AI-detection scorer.
+
+Scores ``--size-mb`` of text (``--file``, or generated prose when omitted)
+``-n`` times on one core and reports the best and median time and MB/s.
+
+    python bench_stylometry.py --size-mb 4 -n 5
+"""
+import argparse
+import random
+import statistics
+import time
+
+from stylometry import score_text
+
+WORDS = (
+    "the a garden soil seed water light root leaf season harvest compost tomato bean mint "
+    "grow plant dig wait learn forget surprise neighbour morning evening summer winter "
+    "quickly slowly honestly really never always sometimes patience kindness accident"
+).split()
+PUNCTUATION = [".", ".", ".", "?", "!", ";", " -", ","]
+
+
+def generate(size: int, seed: int = 7) -> str:
+    """Prose-like text of about ``size`` characters with varied sentence lengths"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 30)))
+        sentence = sentence.capitalize() + rng.choice(PUNCTUATION)
+        sentence += "\n\n" if rng.random() < 0.15 else " "
+        parts.append(sentence)
+        length += len(sentence)
+    return "".join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--file")
+    parser.add_argument("--size-mb", type=float, default=4.0)
+    parser.add_argument("-n", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            text = f.read()
+    else:
+        text = generate(int(args.size_mb * 1024 * 1024))
+    megabytes = len(text.encode("utf-8")) / (1024 * 1024)
+
+    score_text(text[:10000])  # warm-up
+    samples = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        result = score_text(text)
+        samples.append(time.perf_counter() - start)
+
+    best = min(samples)
+    print(f"{megabytes:.2f} MB, {result['features']['words']} words, {result['features']['sentences']} sentences")
+    print(f"best {best * 1000:.1f} ms ({megabytes / best:.1f} MB/s), "
+          f"median {statistics.median(samples) * 1000:.1f} ms ({megabytes / statistics.median(samples):.1f} MB/s)")
+    print(f"risk {result['ai_detection_risk']}, originality {result['originality_score']}, "
+          f"{len(result['flagged_spans'])} spans")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from credits import renew_credit_holds, settle_credits
+from models import ArticleStatus, BulkItemStatus
+from stats import apply_article_changes
+
+logger = logging.getLogger(__name__)
+
+# What a bulk article looks like to the rollups while it is being generated
+GENERATING_IMAGE = {"status": ArticleStatus.GENERATING.value, "word_count": 0, "seo_score": 0}
+
+
+class BatchWriter:
+    """Buffers the writes of a bulk batch's items and flushes them together.
+
+    A flush is one ``bulk_write`` for the articles, one update for the batch
+    document, one ``bulk_write`` for the user's credits (plus one update when
+    holds are refunded) and one per rollup collection,
+    however many items finished since the last flush. Flushes happen once
+    ``max_pending`` items finished or every ``interval`` seconds.
+
+    Every ``heartbeat`` seconds a flush also touches the batch's
+    ``updated_at`` and renews the credit holds of items not finished yet, so
+    a live batch never looks stale and a dead one stops holding credits
+    within one hold period.
+    """
+
+    def __init__(self, db, batch_id: str, user_id: str, max_pending: int = 10, interval: float = 1.0,
+                 heartbeat: float = 60.0, hold_ids: Iterable[str] = ()):
+        self.db = db
+        self.batch_id = batch_id
+        self.user_id = user_id
+        self.max_pending = max_pending
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self._holding = set(hold_ids)
+        self._renewed = time.monotonic()
+        self._statuses = {}
+        self._finished: List[dict] = []
+        self._lock = asyncio.Lock()
+
+    def item_running(self, index: int) -> None:
+        self._statuses[index] = {"status": BulkItemStatus.RUNNING.value}
+
+    async def item_finished(self, item: dict, update: dict, error: Optional[str] = None) -> List[dict]:
+        """Queue an item's article ``$set`` and outcome; returns results flushed by this call"""
+        self._finished.append({"item": item, "update": update, "error": error})
+        self._holding.discard(item["article_id"])
+        status = BulkItemStatus.FAILED if error else BulkItemStatus.SUCCEEDED
+        self._statuses[item["index"]] = {"status": status.value, "error": error}
+        if len(self._finished) >= self.max_pending:
+            return await self.flush()
+        return []
+
+    async def flush(self) -> List[dict]:
+        """Write everything buffered; returns ``{index, article_id, title, status, error}`` per finished item"""
+        async with self._lock:
+            finished, self._finished = self._finished, []
+            statuses, self._statuses = self._statuses, {}
+            renew = time.monotonic() - self._renewed >= self.heartbeat
+            if not finished and not statuses and not renew:
+                return []
+
+            committed = [f["item"]["article_id"] for f in finished if not f["error"]]
+            released = [f["item"]["article_id"] for f in finished if f["error"]]
+            before = {"user_id": self.user_id, **GENERATING_IMAGE}
+            # Credits go first so the day bucket records what was actually charged
+            charged = await settle_credits(self.db, self.user_id, committed, released)
+            writes = [
+                apply_article_changes(
+                    self.db, self.user_id,
+                    [(before, {**before, **f["update"]}) for f in finished],
+                    daily_extra={"credits_used": charged}
+                ),
+                self.db.bulk_batches.update_one({"id": self.batch_id}, {"$set": {
+                    **{f"items.{index}.{k}": v for index, fields in statuses.items() for k, v in fields.items()},
+                    "updated_at": datetime.utcnow()
+                }}),
+            ]
+            if renew:
+                writes.append(renew_credit_holds(self.db, self.user_id, list(self._holding)))
+                self._renewed = time.monotonic()
+            if finished:
+                writes.append(self.db.articles.bulk_write(
+                    [UpdateOne({"id": f["item"]["article_id"]}, {"$set": f["update"]}) for f in finished],
+                    ordered=False
+                ))
+            await asyncio.gather(*writes)
+
+        return [
+            {
+                "index": f["item"]["index"],
+                "article_id": f["item"]["article_id"],
+                "title": f["item"]["title"],
+                **self._result(f),
+            }
+            for f in finished
+        ]
+
+    @staticmethod
+    def _result(finished: dict) -> dict:
+        if finished["error"]:
+            return {"status": BulkItemStatus.FAILED.value, "error": finished["error"]}
+        return {"status": BulkItemStatus.SUCCEEDED.value, "error": None}
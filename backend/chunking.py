@@ -0,0 +1,118 @@
+import re
+from typing import List, Optional, Sequence
+
+from seo_analyzer import CODE_BLOCK_RE, HEADING_RE, count_phrase
+
+PARAGRAPH_BREAK_RE = re.compile(r'\n\s*\n')
+SENTENCE_BREAK_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def _blocks(content: str) -> List[str]:
+    """Blank-line separated blocks, with fenced code blocks kept whole"""
+    blocks = []
+    pos = 0
+    for fence in CODE_BLOCK_RE.finditer(content):
+        blocks.extend(PARAGRAPH_BREAK_RE.split(content[pos:fence.start()]))
+        blocks.append(fence.group())
+        pos = fence.end()
+    blocks.extend(PARAGRAPH_BREAK_RE.split(content[pos:]))
+    return [block.strip() for block in blocks if block.strip()]
+
+
+def _sections(blocks: List[str]) -> List[List[str]]:
+    """Blocks grouped so that each heading starts a new section"""
+    sections = []
+    for block in blocks:
+        if not sections or HEADING_RE.match(block):
+            sections.append([])
+        sections[-1].append(block)
+    return sections
+
+
+def _pieces(block: str, max_chars: int) -> List[str]:
+    """A block no longer than ``max_chars``, else its sentences"""
+    if len(block) <= max_chars or block.startswith("```"):
+        return [block]
+    return [s for s in SENTENCE_BREAK_RE.split(block) if s]
+
+
+def split_markdown(content: str, max_chars: int) -> List[str]:
+    """Split markdown into chunks of at most about ``max_chars`` characters.
+
+    Chunks break at headings where possible, then between paragraphs, and
+    only split an oversized paragraph between sentences. Code fences are
+    never split. ``join_chunks`` puts the chunks back together.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+
+    def add(text: str, sep: str):
+        nonlocal size
+        if current and size + len(sep) + len(text) > max_chars:
+            flush()
+        if current:
+            current.append(sep)
+            size += len(sep)
+        current.append(text)
+        size += len(text)
+
+    def flush():
+        nonlocal current, size
+        if current:
+            chunks.append("".join(current))
+        current, size = [], 0
+
+    for section in _sections(_blocks(content)):
+        text = "\n\n".join(section)
+        if len(text) <= max_chars:
+            # Start whole sections on a fresh chunk rather than splitting them
+            add(text, "\n\n")
+            continue
+        flush()
+        for block in section:
+            for i, piece in enumerate(_pieces(block, max_chars)):
+                add(piece, " " if i else "\n\n")
+        flush()
+    flush()
+    return chunks
+
+
+def join_chunks(chunks: Sequence[str]) -> str:
+    return "\n\n".join(chunk.strip() for chunk in chunks if chunk.strip())
+
+
+def heading_lines(text: str) -> List[str]:
+    return [m.group(0).strip() for m in HEADING_RE.finditer(CODE_BLOCK_RE.sub('', text))]
+
+
+def restore_structure(original: str, rewritten: str, keywords: Sequence[str]) -> Optional[str]:
+    """``rewritten`` with the headings and keywords of ``original`` intact.
+
+    A dropped or reworded leading heading is put back; None when other
+    headings, or keywords present in ``original``, are missing from the
+    rewrite.
+    """
+    headings = heading_lines(original)
+    kept = set(heading_lines(rewritten))
+    if headings and headings[0] not in kept and HEADING_RE.match(original.lstrip()):
+        body = rewritten.lstrip()
+        reworded = HEADING_RE.match(body)
+        if reworded:
+            body = body[reworded.end():].lstrip()
+        rewritten = f"{headings[0]}\n\n{body}"
+        kept.add(headings[0])
+    if any(heading not in kept for heading in headings):
+        return None
+    if any(count_phrase(rewritten, k) < 1 for k in keywords if count_phrase(original, k)):
+        return None
+    return rewritten
+
+
+def sample_evenly(items: Sequence, limit: int) -> List:
+    """At most ``limit`` items spread evenly across ``items``, first and last included"""
+    if len(items) <= limit:
+        return list(items)
+    if limit <= 1:
+        return list(items[:limit])
+    return [items[round(i * (len(items) - 1) / (limit - 1))] for i in range(limit)]
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from pymongo import ReturnDocument, UpdateOne
+
+from stats import record_credits
+
+logger = logging.getLogger(__name__)
+
+# A hold not committed or released within this window (e.g. the worker
+# died) stops counting against the user's quota
+CREDIT_HOLD_SECONDS = int(os.environ.get("CREDIT_HOLD_SECONDS", "1800"))
+
+
+def _has_headroom(count: int) -> dict:
+    """Used credits plus outstanding holds plus ``count`` must fit the limit"""
+    return {"$expr": {"$lte": [
+        {"$add": ["$credits_used", {"$size": {"$ifNull": ["$credit_holds", []]}}, count]},
+        "$credits_limit"
+    ]}}
+
+
+def held_credits(user: dict) -> int:
+    """Credits reserved by in-flight generations and not yet lapsed"""
+    now = datetime.utcnow()
+    return sum(1 for hold in user.get("credit_holds") or [] if hold["expires_at"] > now)
+
+
+async def expire_credit_holds(db, user_id: Optional[str] = None) -> int:
+    """Drop lapsed holds, for one user or for everyone"""
+    now = datetime.utcnow()
+    query = {"credit_holds.expires_at": {"$lt": now}}
+    if user_id:
+        query["id"] = user_id
+    result = await db.users.update_many(query, {"$pull": {"credit_holds": {"expires_at": {"$lt": now}}}})
+    return result.modified_count
+
+
+async def reserve_credit(db, user_id: str, hold_id: str) -> bool:
+    """Atomically hold one credit for ``hold_id``; False when the quota is used up.
+
+    The headroom check and the hold are one conditional update on the user
+    document, so concurrent requests cannot all pass the check.
+    """
+    return await reserve_credits(db, user_id, [hold_id])
+
+
+async def reserve_credits(db, user_id: str, hold_ids: List[str], hold_seconds: int = CREDIT_HOLD_SECONDS) -> bool:
+    """Hold one credit per id, all or nothing"""
+    expires_at = datetime.utcnow() + timedelta(seconds=hold_seconds)
+    holds = [{"id": hold_id, "expires_at": expires_at} for hold_id in hold_ids]
+    for attempt in range(2):
+        user = await db.users.find_one_and_update(
+            {"id": user_id, **_has_headroom(len(holds))},
+            {"$push": {"credit_holds": {"$each": holds}}},
+            projection={"_id": 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if user:
+            return True
+        # Quota may only look used up because of holds that lapsed
+        if attempt == 0 and not await expire_credit_holds(db, user_id):
+            return False
+    return False
+
+
+async def renew_credit_holds(db, user_id: str, hold_ids: List[str], hold_seconds: int = CREDIT_HOLD_SECONDS) -> int:
+    """Push back the expiry of holds still in use, so they lapse only once their work stops.
+
+    Returns how many of the holds still existed.
+    """
+    if not hold_ids:
+        return 0
+    expires_at = datetime.utcnow() + timedelta(seconds=hold_seconds)
+    result = await db.users.bulk_write([
+        UpdateOne({"id": user_id, "credit_holds.id": hold_id}, {"$set": {"credit_holds.$.expires_at": expires_at}})
+        for hold_id in hold_ids
+    ], ordered=False)
+    return result.matched_count
+
+
+async def ensure_credit_hold(db, user_id: str, hold_id: str) -> bool:
+    """Renew the hold for work about to run, re-reserving it if it lapsed meanwhile.
+
+    False when the hold is gone and the quota no longer has room for it, so
+    the work must not run (it could never be charged).
+    """
+    if await renew_credit_holds(db, user_id, [hold_id]):
+        return True
+    logger.warning(f"Credit hold {hold_id} for user {user_id} lapsed before its work started; reserving again")
+    return await reserve_credit(db, user_id, hold_id)
+
+
+async def commit_credit(db, user_id: str, hold_id: str, record: bool = True) -> bool:
+    """Turn the hold into a used credit; False when there was no hold to commit.
+
+    Charging is conditional on the hold, so committing the same hold twice
+    (e.g. a job run again after its lease lapsed) charges once, and work
+    whose hold already lapsed or was released is never charged. Pass
+    ``record=False`` when the caller adds the credit to the day bucket
+    itself (folded into a write it makes anyway).
+    """
+    result = await db.users.update_one(
+        {"id": user_id, "credit_holds.id": hold_id},
+        {"$pull": {"credit_holds": {"id": hold_id}}, "$inc": {"credits_used": 1}}
+    )
+    if not result.modified_count:
+        logger.warning(f"Credit hold {hold_id} for user {user_id} was already settled or expired; not charging")
+        return False
+    if record:
+        await record_credits(db, user_id)
+    return True
+
+
+async def _commit_holds(db, user_id: str, hold_ids: List[str]) -> int:
+    if not hold_ids:
+        return 0
+    result = await db.users.bulk_write([
+        UpdateOne(
+            {"id": user_id, "credit_holds.id": hold_id},
+            {"$pull": {"credit_holds": {"id": hold_id}}, "$inc": {"credits_used": 1}}
+        )
+        for hold_id in hold_ids
+    ], ordered=False)
+    return result.modified_count
+
+
+async def settle_credits(db, user_id: str, committed: List[str], released: List[str]) -> int:
+    """Commit and release many holds at once (day buckets are the caller's).
+
+    Like ``commit_credit``, each commit only charges if its hold is still
+    there. Returns the number of credits charged.
+    """
+    writes = [_commit_holds(db, user_id, committed)]
+    if released:
+        writes.append(db.users.update_one({"id": user_id}, {"$pull": {"credit_holds": {"id": {"$in": released}}}}))
+    charged = (await asyncio.gather(*writes))[0]
+    if charged < len(committed):
+        logger.warning(f"{len(committed) - charged} credit holds of user {user_id} were settled or expired before commit; not charging")
+    return charged
+
+
+async def release_credits(db, user_id: str, hold_ids: List[str]) -> None:
+    await settle_credits(db, user_id, [], hold_ids)
+
+
+async def release_credit(db, user_id: str, hold_id: str) -> bool:
+    """Refund the hold; a no-op when it was already committed, released or expired"""
+    result = await db.users.update_one(
+        {"id": user_id, "credit_holds.id": hold_id},
+        {"$pull": {"credit_holds": {"id": hold_id}}}
+    )
+    return bool(result.modified_count)
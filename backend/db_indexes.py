@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Every query pattern used by the routers must be served by one of these
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+    ],
+    "articles": [
+        # {id} and {id, user_id} lookups
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        # Listing and analytics: {user_id} in (created_at, id) keyset order
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                   name="user_created_id"),
+        # Listing filtered by status
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)],
+                   name="user_status_created_id"),
+        # Dashboard recent activity
+        IndexModel([("user_id", ASCENDING), ("updated_at", DESCENDING)], name="user_updated"),
+        # Sweep of stream-mode articles whose stream was never opened
+        IndexModel([("created_at", ASCENDING)], partialFilterExpression={"status": "generating"},
+                   name="generating_created"),
+        # Full-text search, scoped by the user_id equality prefix. Articles carry
+        # their own "language" field, so the override is moved off it.
+        IndexModel([("user_id", ASCENDING), ("title", TEXT), ("content", TEXT)],
+                   weights={"title": 10, "content": 1}, default_language="english",
+                   language_override="text_language", name="user_text"),
+    ],
+    "calendar_events": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("user_id", ASCENDING), ("scheduled_at", ASCENDING)], name="user_scheduled"),
+    ],
+    "generation_jobs": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        # Workers claim the oldest queued job, or a running one whose lease lapsed
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created"),
+        IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="status_lease"),
+    ],
+    "bulk_batches": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+    ],
+    "user_stats": [
+        IndexModel([("user_id", ASCENDING)], unique=True, name="user_id_unique"),
+    ],
+    "user_daily_stats": [
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING)], unique=True, name="user_day_unique"),
+    ],
+    "refresh_tokens": [
+        IndexModel([("token_hash", ASCENDING)], unique=True, name="token_hash_unique"),
+        IndexModel([("session_id", ASCENDING)], name="session"),
+        IndexModel([("user_id", ASCENDING)], name="user"),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_ttl"),
+    ],
+    "token_revocations": [
+        IndexModel([("key", ASCENDING)], unique=True, name="key_unique"),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_ttl"),
+    ],
+    "rate_limits": [
+        # Unique so an upsert against a full slot array fails instead of duplicating
+        IndexModel([("key", ASCENDING)], unique=True, name="key_unique"),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_ttl"),
+    ],
+    "llm_cache": [
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_ttl"),
+    ],
+}
+
+# Representative shape of each hot query, checked with explain() for COLLSCANs
+QUERY_PATTERNS = [
+    {"name": "user by email", "collection": "users", "filter": {"email": "user@example.com"}},
+    {"name": "user by id", "collection": "users", "filter": {"id": "user-id"}},
+    {"name": "article by id", "collection": "articles", "filter": {"id": "article-id", "user_id": "user-id"}},
+    {"name": "articles by user", "collection": "articles", "filter": {"user_id": "user-id"},
+     "sort": {"created_at": -1}},
+    {"name": "articles by user and status", "collection": "articles",
+     "filter": {"user_id": "user-id", "status": "draft"}, "sort": {"created_at": -1}},
+    {"name": "articles page after cursor", "collection": "articles",
+     "filter": {"user_id": "user-id", "$or": [{"created_at": {"$lt": 0}}, {"created_at": 0, "id": {"$lt": "x"}}]},
+     "sort": {"created_at": -1, "id": -1}},
+    {"name": "article text search", "collection": "articles",
+     "filter": {"user_id": "user-id", "$text": {"$search": "seo tools"}}},
+    {"name": "recent articles", "collection": "articles", "filter": {"user_id": "user-id"},
+     "sort": {"updated_at": -1}},
+    {"name": "unopened streams", "collection": "articles",
+     "filter": {"status": "generating", "pending_generation": {"$ne": None}, "created_at": {"$lt": 0}}},
+    {"name": "user stats rollup", "collection": "user_stats", "filter": {"user_id": "user-id"}},
+    {"name": "daily stats in range", "collection": "user_daily_stats",
+     "filter": {"user_id": "user-id", "day": {"$gte": 0, "$lte": 1}}},
+    {"name": "refresh token", "collection": "refresh_tokens", "filter": {"token_hash": "hash"}},
+    {"name": "user sessions", "collection": "refresh_tokens", "filter": {"user_id": "user-id"}},
+    {"name": "revoked session", "collection": "token_revocations", "filter": {"key": "session-id"}},
+    {"name": "live revocations", "collection": "token_revocations", "filter": {"expires_at": {"$gt": 0}}},
+    {"name": "rate limit bucket", "collection": "rate_limits", "filter": {"key": "user-id"}},
+    {"name": "calendar events in range", "collection": "calendar_events",
+     "filter": {"user_id": "user-id", "scheduled_at": {"$gte": 0, "$lte": 1}}, "sort": {"scheduled_at": 1}},
+    {"name": "calendar event by id", "collection": "calendar_events", "filter": {"id": "event-id", "user_id": "user-id"}},
+    {"name": "job by id", "collection": "generation_jobs", "filter": {"id": "job-id", "user_id": "user-id"}},
+    {"name": "bulk batch by id", "collection": "bulk_batches", "filter": {"id": "batch-id", "user_id": "user-id"}},
+    {"name": "next queued job", "collection": "generation_jobs", "filter": {"status": "queued"},
+     "sort": {"created_at": 1}},
+]
+
+
+async def ensure_indexes(db) -> None:
+    """Create missing indexes (existing ones are verified as no-ops)"""
+    started = time.perf_counter()
+    for collection, models in INDEXES.items():
+        start = time.perf_counter()
+        try:
+            names = await db[collection].create_indexes(models)
+        except OperationFailure as e:
+            # e.g. duplicate emails blocking a unique index, or changed options
+            logger.error(f"Index build failed for {collection}: {e}")
+            continue
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info(f"Indexes on {collection} ready in {elapsed:.1f} ms: {', '.join(names)}")
+    logger.info(f"Index bootstrap finished in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+def _plan_stages(plan: dict) -> List[str]:
+    stages = []
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if "stage" in node:
+                stages.append(node["stage"])
+            stack.extend(v for v in node.values() if isinstance(v, (dict, list)))
+        elif isinstance(node, list):
+            stack.extend(node)
+    return stages
+
+
+async def explain_query_patterns(db) -> List[dict]:
+    """Winning plan of every registered query pattern, flagging COLLSCANs"""
+    report = []
+    for pattern in QUERY_PATTERNS:
+        find = {"find": pattern["collection"], "filter": pattern["filter"]}
+        if pattern.get("sort"):
+            find["sort"] = pattern["sort"]
+        result = await db.command({"explain": find, "verbosity": "queryPlanner"})
+        stages = _plan_stages(result["queryPlanner"]["winningPlan"])
+        report.append({
+            "name": pattern["name"],
+            "collection": pattern["collection"],
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+        })
+    return report
+
+
+async def recent_collscans(db, limit: int = 50) -> List[dict]:
+    """Collection scans captured by the database profiler, when it is enabled"""
+    try:
+        cursor = db["system.profile"].find(
+            {"planSummary": "COLLSCAN"},
+            {"_id": 0, "ns": 1, "op": 1, "command": 1, "millis": 1, "docsExamined": 1, "ts": 1},
+        ).sort("ts", -1).limit(limit)
+        return await cursor.to_list(length=limit)
+    except OperationFailure:
+        return []
+
+
+async def collscan_report(db) -> dict:
+    patterns = await explain_query_patterns(db)
+    return {
+        "collscans": [p for p in patterns if p["collscan"]],
+        "patterns": patterns,
+        "profiled": await recent_collscans(db),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    from pathlib import Path
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    parser = argparse.ArgumentParser(description="Create indexes and report queries running as COLLSCAN")
+    parser.add_argument("--check", action="store_true", help="only report, do not build indexes")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    async def main() -> int:
+        client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+        db = client[os.environ.get('DB_NAME', 'hydraseo')]
+        if not args.check:
+            await ensure_indexes(db)
+        report = await collscan_report(db)
+        for pattern in report["patterns"]:
+            flag = "COLLSCAN" if pattern["collscan"] else "ok"
+            print(f"{flag:<9} {pattern['collection']:<16} {pattern['name']}  [{' > '.join(pattern['stages'])}]")
+        for entry in report["profiled"]:
+            print(f"COLLSCAN  {entry.get('ns')} {entry.get('op')} {entry.get('millis')} ms (profiler)")
+        client.close()
+        return 1 if report["collscans"] or report["profiled"] else 0
+
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,36 @@
+import threading
+from collections import Counter
+
+from pymongo import monitoring
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts MongoDB commands, i.e. database round trips, per collection.
+
+    Registered on the client, so it sees every command the driver sends.
+    Callbacks run on driver threads, hence the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = Counter()
+        self.failures = 0
+
+    def started(self, event) -> None:
+        target = event.command.get(event.command_name)
+        key = f"{target}.{event.command_name}" if isinstance(target, str) else event.command_name
+        with self._lock:
+            self.counts[key] += 1
+
+    def succeeded(self, event) -> None:
+        pass
+
+    def failed(self, event) -> None:
+        with self._lock:
+            self.failures += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+            failures = self.failures
+        return {"total": sum(counts.values()), "failures": failures, "commands": counts}
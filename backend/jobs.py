@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from pymongo import ReturnDocument
+
+from models import GenerationJob, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# A running job whose lease is not renewed within this window is considered
+# abandoned (worker crashed or replica restarted) and may be claimed again.
+JOB_LEASE_SECONDS = 300
+MAX_JOB_ATTEMPTS = 3
+
+ProgressCallback = Callable[[int, str], Awaitable[None]]
+JobHandler = Callable[[dict, ProgressCallback], Awaitable[None]]
+JobHook = Callable[[dict], Awaitable[None]]
+
+
+class JobBackend:
+    """Dispatch strategy for generation jobs.
+
+    Job records always live in the ``generation_jobs`` collection so status can
+    be polled from any replica; backends only differ in how workers find the
+    next job to run.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def enqueue(self, job: dict) -> None:
+        raise NotImplementedError
+
+    async def claim(self, worker_id: str, timeout: float) -> Optional[dict]:
+        raise NotImplementedError
+
+    async def recover(self) -> None:
+        """Re-dispatch jobs left over from a previous process"""
+
+    async def _claim_by_filter(self, query: dict, worker_id: str) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            query,
+            {
+                "$set": {
+                    "status": JobStatus.RUNNING.value,
+                    "worker_id": worker_id,
+                    "started_at": now,
+                    "updated_at": now,
+                    "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+
+class InMemoryJobBackend(JobBackend):
+    """Single-process dispatch through an asyncio queue"""
+
+    def __init__(self, collection):
+        super().__init__(collection)
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def enqueue(self, job: dict) -> None:
+        await self.collection.insert_one(job)
+        self.queue.put_nowait(job["id"])
+
+    async def claim(self, worker_id: str, timeout: float) -> Optional[dict]:
+        try:
+            job_id = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return await self._claim_by_filter(
+            {"id": job_id, "status": JobStatus.QUEUED.value}, worker_id
+        )
+
+    async def recover(self) -> None:
+        # Anything still queued or running belonged to a previous process
+        cursor = self.collection.find(
+            {"status": {"$in": [JobStatus.QUEUED.value, JobStatus.RUNNING.value]}},
+            {"id": 1},
+        ).sort("created_at", 1)
+        async for job in cursor:
+            await self.collection.update_one(
+                {"id": job["id"]}, {"$set": {"status": JobStatus.QUEUED.value}}
+            )
+            self.queue.put_nowait(job["id"])
+
+
+class MongoJobBackend(JobBackend):
+    """Shared dispatch across replicas by polling the jobs collection"""
+
+    def __init__(self, collection, poll_interval: float = 1.0):
+        super().__init__(collection)
+        self.poll_interval = poll_interval
+
+    async def enqueue(self, job: dict) -> None:
+        await self.collection.insert_one(job)
+
+    async def claim(self, worker_id: str, timeout: float) -> Optional[dict]:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            job = await self._claim_by_filter(
+                {
+                    "$or": [
+                        {"status": JobStatus.QUEUED.value},
+                        {
+                            "status": JobStatus.RUNNING.value,
+                            "lease_expires_at": {"$lt": datetime.utcnow()},
+                        },
+                    ]
+                },
+                worker_id,
+            )
+            if job or asyncio.get_running_loop().time() >= deadline:
+                return job
+            await asyncio.sleep(self.poll_interval)
+
+
+def create_job_backend(name: str, collection) -> JobBackend:
+    if name == "mongo":
+        return MongoJobBackend(collection)
+    if name == "memory":
+        return InMemoryJobBackend(collection)
+    raise ValueError(f"Unknown job queue backend: {name}")
+
+
+class JobQueue:
+    """Bounded pool of in-process workers running article generation jobs.
+
+    ``on_abandon`` is called with a job given up after MAX_JOB_ATTEMPTS, so
+    the caller can clean up what the handler would have settled;
+    ``on_heartbeat`` is called with a running job each time its lease is
+    renewed, to keep anything else the job holds alive with it.
+    """
+
+    def __init__(
+        self,
+        backend: JobBackend,
+        handler: JobHandler,
+        concurrency: int = 4,
+        on_abandon: Optional[JobHook] = None,
+        on_heartbeat: Optional[JobHook] = None,
+    ):
+        self.backend = backend
+        self.handler = handler
+        self.on_abandon = on_abandon
+        self.on_heartbeat = on_heartbeat
+        self.concurrency = max(1, concurrency)
+        self._workers: list = []
+        self._instance_id = uuid.uuid4().hex[:8]
+
+    @property
+    def collection(self):
+        return self.backend.collection
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        await self.backend.recover()
+        self._workers = [
+            asyncio.create_task(self._worker(f"{self._instance_id}-{i}"))
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Started {self.concurrency} generation workers ({type(self.backend).__name__})")
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, user_id: str, article_id: str, request: dict) -> dict:
+        job = GenerationJob(user_id=user_id, article_id=article_id, request=request).dict()
+        await self.backend.enqueue(job)
+        return job
+
+    async def get(self, job_id: str, user_id: str) -> Optional[dict]:
+        return await self.collection.find_one({"id": job_id, "user_id": user_id})
+
+    async def _report(self, job_id: str, progress: int, stage: str) -> None:
+        now = datetime.utcnow()
+        await self.collection.update_one(
+            {"id": job_id},
+            {
+                "$set": {
+                    "progress": progress,
+                    "stage": stage,
+                    "updated_at": now,
+                    "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                }
+            },
+        )
+
+    async def _keep_leased(self, job: dict, worker_id: str) -> None:
+        """Renew the lease while the handler runs, even between progress reports"""
+        while True:
+            await asyncio.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                await self.collection.update_one(
+                    {"id": job["id"], "worker_id": worker_id},
+                    {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=JOB_LEASE_SECONDS)}},
+                )
+                if self.on_heartbeat:
+                    await self.on_heartbeat(job)
+            except Exception as e:
+                logger.warning(f"Lease renewal failed for job {job['id']}: {e}")
+
+    async def _finish(self, job_id: str, worker_id: str, update: dict) -> None:
+        now = datetime.utcnow()
+        update.update({"updated_at": now, "finished_at": now, "lease_expires_at": None})
+        # Only the worker holding the job may settle it
+        await self.collection.update_one({"id": job_id, "worker_id": worker_id}, {"$set": update})
+
+    async def _abandon(self, job: dict, worker_id: str) -> None:
+        await self._finish(job["id"], worker_id, {
+            "status": JobStatus.FAILED.value,
+            "stage": "failed",
+            "error": "Job abandoned after too many attempts",
+        })
+        if self.on_abandon:
+            try:
+                await self.on_abandon(job)
+            except Exception as e:
+                logger.error(f"Cleanup of abandoned job {job['id']} failed: {e}")
+
+    async def _worker(self, worker_id: str) -> None:
+        while True:
+            try:
+                job = await self.backend.claim(worker_id, timeout=5.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job claim failed on worker {worker_id}: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if not job:
+                continue
+
+            if job.get("attempts", 1) > MAX_JOB_ATTEMPTS:
+                await self._abandon(job, worker_id)
+                continue
+
+            async def report(progress: int, stage: str, job_id: str = job["id"]) -> None:
+                await self._report(job_id, progress, stage)
+
+            heartbeat = asyncio.create_task(self._keep_leased(job, worker_id))
+            try:
+                await self.handler(job, report)
+            except asyncio.CancelledError:
+                # Leave the job leased; it is picked up again once the lease lapses
+                raise
+            except Exception as e:
+                logger.error(f"Generation job {job['id']} failed: {e}")
+                await self._finish(job["id"], worker_id, {
+                    "status": JobStatus.FAILED.value,
+                    "stage": "failed",
+                    "error": str(e),
+                })
+            else:
+                await self._finish(job["id"], worker_id, {
+                    "status": JobStatus.COMPLETED.value,
+                    "stage": "completed",
+                    "progress": 100,
+                    "error": None,
+                })
+            finally:
+                heartbeat.cancel()
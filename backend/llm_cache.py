@@ -0,0 +1,122 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds a response stays valid, per AIService method
+DEFAULT_TTLS = {
+    "keywords": 24 * 3600,
+    "competitors": 12 * 3600,
+    "seo_analysis": 6 * 3600,
+    "plagiarism": 24 * 3600,
+    "rewrite": 3600,
+    "meta_tags": 24 * 3600,
+}
+DEFAULT_TTL = 3600
+
+
+def cache_key(model: str, system_message: str, prompt: str) -> str:
+    """Content address of an LLM request"""
+    digest = hashlib.sha256()
+    for part in (model, system_message, prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class LLMCache:
+    """Two-tier cache for raw LLM responses.
+
+    The in-memory tier is an LRU bounded by ``max_entries``; the optional shared
+    tier is a Mongo collection (``llm_cache``) with a TTL index so replicas can
+    reuse each other's responses.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttls: Optional[Dict[str, int]] = None):
+        self.max_entries = max_entries
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.collection = None
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def attach(self, collection) -> None:
+        """Enable the shared Mongo tier"""
+        self.collection = collection
+
+    def ttl_for(self, method: str) -> int:
+        return self.ttls.get(method, DEFAULT_TTL)
+
+    def _count(self, method: str, field: str) -> None:
+        counters = self._stats.setdefault(method, {"hits": 0, "shared_hits": 0, "misses": 0, "bypassed": 0})
+        counters[field] += 1
+
+    def record_bypass(self, method: str) -> None:
+        self._count(method, "bypassed")
+
+    async def get(self, method: str, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._count(method, "hits")
+                return value
+            del self._entries[key]
+
+        if self.collection is not None:
+            try:
+                doc = await self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+            except Exception as e:
+                logger.warning(f"Shared LLM cache read failed: {e}")
+                doc = None
+            if doc:
+                remaining = (doc["expires_at"] - datetime.utcnow()).total_seconds()
+                self._store_local(key, doc["response"], remaining)
+                self._count(method, "shared_hits")
+                return doc["response"]
+
+        self._count(method, "misses")
+        return None
+
+    async def set(self, method: str, key: str, value: str) -> None:
+        ttl = self.ttl_for(method)
+        self._store_local(key, value, ttl)
+        if self.collection is not None:
+            try:
+                await self.collection.replace_one(
+                    {"_id": key},
+                    {
+                        "_id": key,
+                        "method": method,
+                        "response": value,
+                        "expires_at": datetime.utcnow() + timedelta(seconds=ttl),
+                    },
+                    upsert=True,
+                )
+            except Exception as e:
+                logger.warning(f"Shared LLM cache write failed: {e}")
+
+    def _store_local(self, key: str, value: str, ttl: float) -> None:
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        totals = {"hits": 0, "shared_hits": 0, "misses": 0, "bypassed": 0}
+        for counters in self._stats.values():
+            for field, value in counters.items():
+                totals[field] += value
+        lookups = totals["hits"] + totals["shared_hits"] + totals["misses"]
+        return {
+            **totals,
+            "hit_rate": round((totals["hits"] + totals["shared_hits"]) / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "shared_tier": self.collection is not None,
+            "by_method": self._stats,
+        }
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Share of provider capacity per plan while several plans are waiting
+TIER_WEIGHTS: Dict[str, int] = {
+    "free": 1,
+    "solo": 2,
+    "pro": 4,
+    "agency": 8,
+    "unlimited": 16,
+    "admin": 16,
+}
+DEFAULT_TIER = "free"
+# Recent wait times kept per tier for the percentile metrics
+WAIT_SAMPLES = 1000
+
+# Plan of the user the current request or job works for
+llm_tier: ContextVar[Optional[str]] = ContextVar("llm_tier", default=DEFAULT_TIER)
+
+
+class LLMDispatcher:
+    """Weighted fair queue in front of the LLM provider.
+
+    At most ``max_concurrency`` provider calls run at once. When calls have
+    to wait, slots go to the waiting tier with the lowest pass value, which
+    advances by ``1 / weight`` per grant (stride scheduling): a tier with
+    weight 16 gets sixteen slots for every one a weight-1 tier gets, and no
+    waiting tier is ever skipped indefinitely. A tier that was idle re-enters
+    at the current virtual time, so it cannot bank credit while idle.
+    """
+
+    def __init__(self, max_concurrency: int = 16, weights: Dict[str, int] = TIER_WEIGHTS):
+        self.max_concurrency = max(1, max_concurrency)
+        self.weights = weights
+        self.in_flight = 0
+        self._queues: Dict[str, Deque[asyncio.Future]] = defaultdict(deque)
+        self._pass: Dict[str, float] = defaultdict(float)
+        self._vtime = 0.0
+        self._dispatched: Dict[str, int] = defaultdict(int)
+        self._running: Dict[str, int] = defaultdict(int)
+        self._waits: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=WAIT_SAMPLES))
+
+    def _tier(self, tier: Optional[str]) -> str:
+        tier = tier or llm_tier.get()
+        return tier if tier in self.weights else DEFAULT_TIER
+
+    @asynccontextmanager
+    async def slot(self, tier: Optional[str] = None):
+        """Hold one provider slot for the body of the ``async with``"""
+        tier = self._tier(tier)
+        await self._acquire(tier)
+        self._running[tier] += 1
+        try:
+            yield
+        finally:
+            self._running[tier] -= 1
+            self._release()
+
+    async def run(self, call: Callable[[], Awaitable[Any]], tier: Optional[str] = None) -> Any:
+        async with self.slot(tier):
+            return await call()
+
+    async def _acquire(self, tier: str) -> None:
+        start = time.perf_counter()
+        if self.in_flight < self.max_concurrency and not any(self._queues.values()):
+            self.in_flight += 1
+            self._granted(tier, start)
+            return
+
+        queue = self._queues[tier]
+        if not queue:
+            self._pass[tier] = max(self._pass[tier], self._vtime)
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as the caller gave up: pass the slot on
+                self._release()
+            elif waiter in queue:
+                queue.remove(waiter)
+            raise
+        self._granted(tier, start)
+
+    def _granted(self, tier: str, start: float) -> None:
+        self._dispatched[tier] += 1
+        self._waits[tier].append((time.perf_counter() - start) * 1000)
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        while self.in_flight < self.max_concurrency:
+            waiting = [tier for tier, queue in self._queues.items() if queue]
+            if not waiting:
+                return
+            tier = min(waiting, key=lambda t: self._pass[t])
+            waiter = self._queues[tier].popleft()
+            if waiter.cancelled():
+                continue
+            self._vtime = self._pass[tier]
+            self._pass[tier] += 1 / self.weights[tier]
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def stats(self) -> dict:
+        tiers = {}
+        for tier in self.weights:
+            waits = sorted(self._waits[tier])
+            tiers[tier] = {
+                "weight": self.weights[tier],
+                "queued": len(self._queues[tier]),
+                "running": self._running[tier],
+                "dispatched": self._dispatched[tier],
+                "wait_ms_mean": round(sum(waits) / len(waits), 1) if waits else 0.0,
+                "wait_ms_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 1) if waits else 0.0,
+                "wait_ms_max": round(waits[-1], 1) if waits else 0.0,
+            }
+        return {"max_concurrency": self.max_concurrency, "in_flight": self.in_flight, "tiers": tiers}
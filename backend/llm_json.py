@@ -0,0 +1,149 @@
+import json
+import re
+from typing import Any, Dict, Iterator, Optional, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+M = TypeVar("M", bound=BaseModel)
+
+_OPENER = re.compile(r"[{\[]")
+_STRUCTURE = re.compile(r'[{}\[\]"]')
+# Rest of a JSON string after its opening quote, escapes included
+_STRING_TAIL = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_CLOSERS = {"{": "}", "[": "]"}
+_decoder = json.JSONDecoder()
+
+# Why a response did not parse, as counted in the metrics
+PARSE_FAILURES = ("no_json", "truncated", "invalid_json", "schema")
+
+
+class ResponseParseError(ValueError):
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _balanced_end(text: str, start: int) -> Optional[int]:
+    """End of the bracket-balanced value opening at ``start``.
+
+    Jumps between structural characters and over whole strings, so prose and
+    long string values cost one regex step each. Returns None when the value
+    is cut off, -1 when a closer does not match its opener.
+    """
+    stack = []
+    pos = start
+    while True:
+        match = _STRUCTURE.search(text, pos)
+        if not match:
+            return None
+        char = match.group()
+        pos = match.end()
+        if char == '"':
+            tail = _STRING_TAIL.match(text, pos)
+            if not tail:
+                return None
+            pos = tail.end()
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif stack.pop() != char:
+            return -1
+        if not stack:
+            return pos
+
+
+def iter_json(text: str) -> Iterator[Any]:
+    """JSON objects and arrays embedded in ``text``, in order.
+
+    Each opening bracket is decoded in place by the C decoder, so prose,
+    markdown fences and trailing text around the JSON cost nothing extra.
+    When decoding fails, the bracket-balance scan tells a cut-off response
+    (stop) from a stray bracket in prose (move on to the next opener).
+    Raises ResponseParseError once the text is exhausted.
+    """
+    failure = ResponseParseError("no_json", "No JSON object or array in response")
+    pos = 0
+    while True:
+        opener = _OPENER.search(text, pos)
+        if not opener:
+            raise failure
+        start = opener.start()
+        try:
+            value, end = _decoder.raw_decode(text, start)
+        except ValueError as e:
+            end = _balanced_end(text, start)
+            if end is None:
+                # Nothing after an unterminated value can close either
+                raise ResponseParseError("truncated", "JSON in response is cut off")
+            if end > 0:
+                failure = ResponseParseError("invalid_json", f"Invalid JSON in response: {e}")
+            pos = start + 1
+            continue
+        yield value
+        pos = end
+
+
+def extract_json(text: str) -> Any:
+    """First JSON object or array embedded in ``text``"""
+    return next(iter_json(text))
+
+
+def parse_model(text: str, schema: Type[M]) -> M:
+    """First JSON value in ``text`` that validates against ``schema``.
+
+    A bare array is accepted for a schema whose only field is that list.
+    """
+    fields = list(schema.model_fields)
+    schema_error = None
+    try:
+        for value in iter_json(text):
+            if isinstance(value, list) and len(fields) == 1:
+                value = {fields[0]: value}
+            try:
+                return schema.model_validate(value)
+            except ValidationError as e:
+                schema_error = schema_error or e
+    except ResponseParseError:
+        if schema_error is None:
+            raise
+    error = schema_error.errors()[0]
+    location = ".".join(str(part) for part in error["loc"]) or "response"
+    raise ResponseParseError("schema", f"{location}: {error['msg']}")
+
+
+class ParseStats:
+    """Parse outcomes of structured LLM responses, per AIService method"""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, method: str, field: str) -> None:
+        counters = self._stats.setdefault(method, {
+            "parsed": 0, "retries": 0, "fallbacks": 0, **{reason: 0 for reason in PARSE_FAILURES}
+        })
+        counters[field] += 1
+
+    def record_parsed(self, method: str) -> None:
+        self._count(method, "parsed")
+
+    def record_failure(self, method: str, error: ResponseParseError) -> None:
+        self._count(method, error.reason)
+
+    def record_retry(self, method: str) -> None:
+        self._count(method, "retries")
+
+    def record_fallback(self, method: str) -> None:
+        self._count(method, "fallbacks")
+
+    def stats(self) -> dict:
+        totals = {"parsed": 0, "retries": 0, "fallbacks": 0, **{reason: 0 for reason in PARSE_FAILURES}}
+        for counters in self._stats.values():
+            for field, value in counters.items():
+                totals[field] += value
+        failed = sum(totals[reason] for reason in PARSE_FAILURES)
+        attempts = totals["parsed"] + failed
+        return {
+            **totals,
+            "failure_rate": round(failed / attempts, 3) if attempts else 0.0,
+            "by_method": self._stats,
+        }
+
@@ -0,0 +1,75 @@
+import logging
+import time
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class LLMClientPool:
+    """Shared keep-alive HTTP client for LLM provider traffic.
+
+    LLM calls go through litellm, which otherwise builds provider clients
+    (and their connection pools) on demand. Installing one long-lived
+    ``httpx.AsyncClient`` as litellm's async session lets every call reuse
+    warm TCP/TLS connections up to ``max_connections``.
+    """
+
+    def __init__(self,
+                 max_connections: int = 50,
+                 max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 60.0,
+                 timeout: float = 600.0):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=10.0)
+        self._client: Optional[httpx.AsyncClient] = None
+        self.installed = False
+        self.warmup_ms: Optional[float] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+            self.installed = False
+        return self._client
+
+    def install(self) -> None:
+        """Make litellm (and so the LLM integration) use the pooled client"""
+        try:
+            import litellm
+        except ImportError:
+            logger.warning("litellm not available; LLM calls will not use the client pool")
+            return
+        litellm.aclient_session = self.client
+        self.installed = True
+
+    async def warmup(self, url: str) -> None:
+        """Open a connection to the provider ahead of the first real call"""
+        start = time.perf_counter()
+        try:
+            # Any HTTP response means DNS, TCP and TLS are done and pooled
+            await self.client.head(url)
+        except httpx.HTTPError as e:
+            logger.warning(f"LLM connection warm-up failed for {url}: {e}")
+            return
+        self.warmup_ms = round((time.perf_counter() - start) * 1000, 1)
+        logger.info(f"LLM connection pool warmed up in {self.warmup_ms} ms")
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self.installed = False
+
+    def stats(self) -> dict:
+        return {
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "installed": self.installed,
+            "warmup_ms": self.warmup_ms,
+        }
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from typing import List, Optional, Dict, Any, Type
+from datetime import date, datetime
 import uuid
 from enum import Enum
 
@@ -28,6 +28,17 @@ class ContentTone(str, Enum):
     FUN = "fun"
     VIRAL = "viral"
 
+class GenerationMode(str, Enum):
+    SYNC = "sync"
+    QUEUED = "queued"
+    STREAM = "stream"
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
 class ExportFormat(str, Enum):
     MARKDOWN = "markdown"
     PDF = "pdf"
@@ -59,6 +70,9 @@ class UserLogin(BaseModel):
     email: str
     password: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class UserUpdate(BaseModel):
     name: Optional[str] = None
     theme: Optional[str] = None
@@ -97,6 +111,10 @@ class Article(BaseModel):
     template_id: Optional[str] = None
     scheduled_at: Optional[datetime] = None
     published_at: Optional[datetime] = None
+    excerpt: str = ""  # plain-text preview shown in listings
+    pending_generation: Optional[Dict[str, Any]] = None  # request awaiting a stream client
+    generation_error: Optional[str] = None  # set when the last generation failed
+    generation_timings: Dict[str, float] = {}  # per-call LLM latency in ms
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -133,6 +151,119 @@ class ArticleResponse(BaseModel):
     word_count: int
     seo_score: int
     plagiarism_score: Optional[float]
+    generation_timings: Dict[str, float] = {}
+    generation_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+class ArticleSummary(BaseModel):
+    """Listing view of an article; heavy fields are only set when requested"""
+    id: str
+    user_id: str
+    title: str
+    excerpt: str = ""
+    meta_title: Optional[str] = None
+    keywords: List[str] = []
+    status: ArticleStatus
+    tone: ContentTone
+    language: str
+    word_count: int
+    seo_score: int
+    plagiarism_score: Optional[float] = None
+    created_at: datetime
+    updated_at: datetime
+    content: Optional[str] = None
+    meta_description: Optional[str] = None
+    generation_timings: Optional[Dict[str, float]] = None
+
+class ArticlePage(BaseModel):
+    items: List[ArticleSummary]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
+
+class ArticleSearchHit(BaseModel):
+    id: str
+    title: str
+    status: ArticleStatus
+    keywords: List[str] = []
+    word_count: int = 0
+    seo_score: int = 0
+    score: float  # text relevance
+    snippet: str
+    created_at: datetime
+    updated_at: datetime
+
+class ArticleSearchResponse(BaseModel):
+    query: str
+    total: int
+    results: List[ArticleSearchHit]
+
+# Generation Job Models
+class GenerationJob(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str
+    article_id: str
+    status: JobStatus = JobStatus.QUEUED
+    progress: int = 0
+    stage: str = "queued"
+    error: Optional[str] = None
+    attempts: int = 0
+    request: Dict[str, Any] = {}
+    worker_id: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class JobResponse(BaseModel):
+    id: str
+    article_id: str
+    status: JobStatus
+    progress: int
+    stage: str
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+# Bulk Generation Models
+class BulkItemStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class BulkArticleRequest(BaseModel):
+    items: List[ArticleCreate]
+
+class BulkBatchItem(BaseModel):
+    index: int
+    article_id: str
+    title: str
+    status: BulkItemStatus = BulkItemStatus.PENDING
+    error: Optional[str] = None
+    request: Dict[str, Any] = {}  # ArticleCreate payload, kept for retries
+
+class BulkBatch(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    user_id: str
+    items: List[BulkBatchItem]
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class BulkBatchItemResponse(BaseModel):
+    index: int
+    article_id: str
+    title: str
+    status: BulkItemStatus
+    error: Optional[str] = None
+
+class BulkBatchResponse(BaseModel):
+    id: str
+    total: int
+    counts: Dict[str, int]
+    items: List[BulkBatchItemResponse]
     created_at: datetime
     updated_at: datetime
 
@@ -152,6 +283,7 @@ class KeywordRequest(BaseModel):
     seed_keyword: str
     language: str = "en"
     count: int = 20
+    bypass_cache: bool = False
 
 class KeywordResult(BaseModel):
     keyword: str
@@ -169,6 +301,7 @@ class KeywordResponse(BaseModel):
 class CompetitorRequest(BaseModel):
     keyword: str
     count: int = 10
+    bypass_cache: bool = False
 
 class CompetitorResult(BaseModel):
     rank: int
@@ -189,6 +322,8 @@ class CompetitorResponse(BaseModel):
 class SEOAnalysisRequest(BaseModel):
     content: str
     target_keyword: str
+    enrich: bool = False  # add LLM-written suggestions to the local analysis
+    bypass_cache: bool = False
 
 class SEOAnalysisResponse(BaseModel):
     score: int
@@ -196,6 +331,9 @@ class SEOAnalysisResponse(BaseModel):
     readability_score: float
     suggestions: List[str]
     issues: List[Dict[str, str]]
+    word_count: int = 0
+    keyword_count: int = 0
+    heading_structure: Dict[str, int] = {}
 
 # Content Rewrite Models
 class RewriteRequest(BaseModel):
@@ -203,11 +341,69 @@ class RewriteRequest(BaseModel):
     tone: ContentTone = ContentTone.PROFESSIONAL
     humanize: bool = False
     preserve_keywords: List[str] = []
+    bypass_cache: bool = False
+
+class ChunkTiming(BaseModel):
+    index: int
+    chars: int
+    latency_ms: float
 
 class RewriteResponse(BaseModel):
     original_content: str
     rewritten_content: str
     changes_made: List[str]
+    chunks: List[ChunkTiming] = []  # long content is rewritten section by section
+    timings: Dict[str, float] = {}  # wall-clock "total" and summed "sequential" ms
+
+# LLM Output Models (JSON the AI service asks the model for)
+def valid_items(items: Any, model: Type[BaseModel]) -> Any:
+    """The items of a list that validate as ``model``.
+
+    One partial item is dropped rather than invalidating the whole response;
+    only a list with no valid item at all is rejected.
+    """
+    if not isinstance(items, list):
+        return items
+    valid = []
+    for item in items:
+        try:
+            valid.append(model.model_validate(item))
+        except ValidationError:
+            continue
+    if items and not valid:
+        raise ValueError(f"no valid {model.__name__} in list")
+    return valid
+
+class MetaTagsOutput(BaseModel):
+    meta_title: str
+    meta_description: str
+
+class KeywordsOutput(BaseModel):
+    keywords: List[KeywordResult]
+
+    @field_validator("keywords", mode="before")
+    @classmethod
+    def drop_invalid_keywords(cls, value):
+        return valid_items(value, KeywordResult)
+
+class CompetitorsOutput(BaseModel):
+    results: List[CompetitorResult] = []
+    suggested_outline: List[str] = []
+    content_gaps: List[str] = []
+
+    @field_validator("results", mode="before")
+    @classmethod
+    def drop_invalid_results(cls, value):
+        return valid_items(value, CompetitorResult)
+
+class SEOSuggestionsOutput(BaseModel):
+    suggestions: List[str] = []
+
+class PlagiarismOutput(BaseModel):
+    ai_detection_risk: int
+    originality_score: int
+    flagged_patterns: List[str] = []
+    suggestions: List[str] = []
 
 # Export Models
 class ExportRequest(BaseModel):
@@ -232,6 +428,24 @@ class AnalyticsResponse(BaseModel):
     articles_by_status: Dict[str, int]
     recent_activity: List[Dict[str, Any]]
 
+class TimeSeriesGranularity(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+class TimeSeriesPoint(BaseModel):
+    period_start: date
+    articles_created: int = 0
+    words: int = 0
+    avg_seo_score: Optional[float] = None
+    credits_used: int = 0
+
+class TimeSeriesResponse(BaseModel):
+    granularity: TimeSeriesGranularity
+    start: date
+    end: date
+    points: List[TimeSeriesPoint]
+
 # Calendar Event Models
 class CalendarEvent(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
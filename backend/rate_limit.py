@@ -0,0 +1,189 @@
+import logging
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# Per plan: sustained requests per minute, burst size, concurrent requests
+ROLE_LIMITS: Dict[str, dict] = {
+    "free": {"per_minute": 6, "burst": 3, "max_in_flight": 1},
+    "solo": {"per_minute": 20, "burst": 10, "max_in_flight": 2},
+    "pro": {"per_minute": 60, "burst": 20, "max_in_flight": 4},
+    "agency": {"per_minute": 180, "burst": 60, "max_in_flight": 8},
+    "unlimited": {"per_minute": 600, "burst": 120, "max_in_flight": 16},
+    "admin": {"per_minute": 600, "burst": 120, "max_in_flight": 16},
+}
+
+# In-flight slots left behind by a crashed worker lapse after this long
+SLOT_LEASE_SECONDS = 600
+# Shared-store documents of idle users are dropped after this long
+IDLE_EXPIRY_SECONDS = 3600
+
+
+class InMemoryRateLimitStore:
+    """Per-process token buckets and in-flight counters"""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._in_flight: Dict[str, set] = defaultdict(set)
+
+    async def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        """Spend one token; returns (allowed, tokens left)"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        return allowed, tokens
+
+    async def acquire(self, key: str, slot_id: str, limit: int) -> bool:
+        slots = self._in_flight[key]
+        if len(slots) >= limit:
+            return False
+        slots.add(slot_id)
+        return True
+
+    async def release(self, key: str, slot_id: str) -> None:
+        slots = self._in_flight.get(key)
+        if slots is not None:
+            slots.discard(slot_id)
+            if not slots:
+                del self._in_flight[key]
+
+
+class MongoRateLimitStore:
+    """Token buckets and in-flight slots shared by every worker through Mongo.
+
+    Refill and spend happen in one pipeline update (MongoDB 4.2+), and a slot
+    is only pushed while the slot array is below the limit, so concurrent
+    workers cannot overshoot either limit.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def take(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        now = datetime.utcnow()
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        doc = await self.collection.find_one_and_update(
+            {"key": key},
+            [
+                {"$set": {"tokens": {"$min": [
+                    burst, {"$add": [{"$ifNull": ["$tokens", burst]}, {"$multiply": [elapsed, rate]}]}
+                ]}}},
+                {"$set": {
+                    "allowed": {"$gte": ["$tokens", 1]},
+                    "updated_at": now,
+                    "expires_at": now + timedelta(seconds=IDLE_EXPIRY_SECONDS),
+                }},
+                {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+            ],
+            projection={"_id": 0, "allowed": 1, "tokens": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["allowed"], doc["tokens"]
+
+    async def acquire(self, key: str, slot_id: str, limit: int) -> bool:
+        slot = {"id": slot_id, "expires_at": datetime.utcnow() + timedelta(seconds=SLOT_LEASE_SECONDS)}
+        for attempt in range(2):
+            try:
+                await self.collection.update_one(
+                    {"key": key, "$expr": {"$lt": [{"$size": {"$ifNull": ["$slots", []]}}, limit]}},
+                    {"$push": {"slots": slot}},
+                    upsert=True
+                )
+                return True
+            except DuplicateKeyError:
+                # The document exists and its slots are full; retry once
+                # after dropping slots whose holder never released them
+                if attempt:
+                    return False
+                pruned = await self.collection.update_one(
+                    {"key": key},
+                    {"$pull": {"slots": {"expires_at": {"$lt": datetime.utcnow()}}}}
+                )
+                if not pruned.modified_count:
+                    return False
+        return False
+
+    async def release(self, key: str, slot_id: str) -> None:
+        await self.collection.update_one({"key": key}, {"$pull": {"slots": {"id": slot_id}}})
+
+
+def create_rate_limit_store(name: str, collection=None):
+    if name == "mongo":
+        return MongoRateLimitStore(collection)
+    if name != "memory":
+        logger.warning(f"Unknown rate limit store '{name}', using memory")
+    return InMemoryRateLimitStore()
+
+
+class RateLimiter:
+    """Token-bucket and max-in-flight limits per user, sized by plan"""
+
+    def __init__(self, store, limits: Dict[str, dict] = ROLE_LIMITS):
+        self.store = store
+        self.limits = limits
+        self.allowed = 0
+        self.rejected = defaultdict(int)
+
+    def limits_for(self, role: Optional[str]) -> dict:
+        return self.limits.get(role) or self.limits["free"]
+
+    async def enter(self, user_id: str, role: Optional[str], slot_id: str, response: Response) -> None:
+        """Admit a request or raise 429; pair every admitted request with ``leave``.
+
+        The in-flight slot is taken first, so a request turned away for
+        concurrency does not spend a token of the rate limit.
+        """
+        limits = self.limits_for(role)
+        rate = limits["per_minute"] / 60
+        headers = {
+            "X-RateLimit-Limit": str(limits["per_minute"]),
+            "X-RateLimit-Concurrency-Limit": str(limits["max_in_flight"]),
+        }
+        if not await self.store.acquire(user_id, slot_id, limits["max_in_flight"]):
+            self.rejected["concurrency"] += 1
+            headers["Retry-After"] = "1"
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"At most {limits['max_in_flight']} AI requests at a time on your plan",
+                headers=headers
+            )
+        try:
+            allowed, tokens = await self.store.take(user_id, rate, limits["burst"])
+        except Exception:
+            await self.store.release(user_id, slot_id)
+            raise
+        headers["X-RateLimit-Remaining"] = str(max(0, math.floor(tokens)))
+        if not allowed:
+            await self.store.release(user_id, slot_id)
+            self.rejected["rate"] += 1
+            headers["Retry-After"] = str(math.ceil((1 - tokens) / rate))
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded for your plan",
+                headers=headers
+            )
+        self.allowed += 1
+        response.headers.update(headers)
+
+    async def leave(self, user_id: str, slot_id: str) -> None:
+        await self.store.release(user_id, slot_id)
+
+    def stats(self) -> dict:
+        return {
+            "store": type(self.store).__name__,
+            "allowed": self.allowed,
+            "rejected": dict(self.rejected),
+        }
@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+import logging
+import math
+from datetime import datetime
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys (no false negatives)"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(1, capacity)
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RevocationList:
+    """Revoked token sessions, checked in memory on every request.
+
+    Revocations live in a Mongo collection (expiring with the tokens they
+    cover) and are mirrored into a Bloom filter rebuilt every
+    ``sync_interval`` seconds, so revocations made by other workers apply
+    within one interval. A filter miss needs no database access; only a hit
+    is confirmed against the collection to rule out a false positive.
+    """
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001, sync_interval: float = 30.0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.filter = BloomFilter(capacity, error_rate)
+        self.collection = None
+        self._task: Optional[asyncio.Task] = None
+        self.last_sync: Optional[datetime] = None
+        self.checks = 0
+        self.confirmed = 0
+        self.false_positives = 0
+
+    def attach(self, collection) -> None:
+        self.collection = collection
+
+    async def revoke(self, key: str, expires_at: datetime) -> None:
+        """Revoke ``key`` until ``expires_at``, when every token it covers has expired"""
+        self.filter.add(key)
+        if self.collection is not None:
+            await self.collection.update_one(
+                {"key": key},
+                {"$set": {"expires_at": expires_at}, "$setOnInsert": {"revoked_at": datetime.utcnow()}},
+                upsert=True
+            )
+
+    async def is_revoked(self, key: str) -> bool:
+        self.checks += 1
+        if key not in self.filter:
+            return False
+        if self.collection is None:
+            return True
+        revoked = await self.collection.find_one(
+            {"key": key, "expires_at": {"$gt": datetime.utcnow()}}, {"_id": 1}
+        )
+        if revoked:
+            self.confirmed += 1
+            return True
+        self.false_positives += 1
+        return False
+
+    async def sync(self) -> None:
+        """Rebuild the filter from the live revocations (expired ones drop out)"""
+        if self.collection is None:
+            return
+        keys = [
+            doc["key"] async for doc in self.collection.find(
+                {"expires_at": {"$gt": datetime.utcnow()}}, {"_id": 0, "key": 1}
+            )
+        ]
+        bloom = BloomFilter(max(self.capacity, 2 * len(keys)), self.error_rate)
+        for key in keys:
+            bloom.add(key)
+        self.filter = bloom
+        self.last_sync = datetime.utcnow()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Revocation list sync failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "entries": self.filter.count,
+            "filter_bits": self.filter.size,
+            "filter_hashes": self.filter.hashes,
+            "checks": self.checks,
+            "confirmed": self.confirmed,
+            "false_positives": self.false_positives,
+            "last_sync": self.last_sync,
+        }
@@ -0,0 +1,73 @@
+import html
+import re
+from typing import List
+
+from seo_analyzer import strip_markdown
+
+TERM_RE = re.compile(r"[A-Za-z0-9\u00C0-\u024F]+")
+STOPWORDS = {"a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is",
+             "it", "of", "on", "or", "that", "the", "to", "was", "what", "with"}
+SUFFIXES = ("ing", "ers", "ies", "ed", "es", "er", "ly", "s")
+EXCERPT_LENGTH = 200
+
+
+def stem(term: str) -> str:
+    """Light suffix stripping, close enough to the text index stemmer for highlighting"""
+    for suffix in SUFFIXES:
+        if term.endswith(suffix) and len(term) - len(suffix) >= 3:
+            return term[:-len(suffix)]
+    return term
+
+
+def query_terms(query: str) -> List[str]:
+    terms = [t.lower() for t in TERM_RE.findall(query)]
+    return [t for t in terms if t not in STOPWORDS] or terms
+
+
+def make_excerpt(content: str, length: int = EXCERPT_LENGTH) -> str:
+    """Plain-text preview of an article, cut on a word boundary"""
+    text = " ".join(strip_markdown(content).split())
+    if len(text) <= length:
+        return text
+    cut = text.rfind(" ", 0, length)
+    return text[:cut if cut > 0 else length] + "…"
+
+
+def text_search_filter(query: str) -> dict:
+    """``$text`` clause for the articles text index"""
+    return {"$text": {"$search": query}}
+
+
+def highlight_snippet(content: str, query: str, width: int = 160) -> str:
+    """Window of ``content`` around the first query match, matches wrapped in <mark>"""
+    text = " ".join(strip_markdown(content).split())
+    terms = query_terms(query)
+    if not terms:
+        return html.escape(text[:width])
+
+    pattern = re.compile(
+        r"\b(?:" + "|".join(re.escape(stem(t)) for t in terms) + r")\w*",
+        re.IGNORECASE
+    )
+    first = pattern.search(text)
+    if first:
+        start = max(0, first.start() - width // 3)
+        if start:
+            # Begin the window on a word boundary
+            space = text.find(" ", start)
+            start = space + 1 if 0 <= space < first.start() else start
+    else:
+        start = 0
+    window = text[start:start + width]
+
+    parts = []
+    last = 0
+    for match in pattern.finditer(window):
+        parts.append(html.escape(window[last:match.start()]))
+        parts.append(f"<mark>{html.escape(match.group())}</mark>")
+        last = match.end()
+    parts.append(html.escape(window[last:]))
+
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if start + width < len(text) else ""
+    return prefix + "".join(parts) + suffix
@@ -0,0 +1,163 @@
+import re
+from functools import lru_cache
+from typing import Dict, List
+
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$', re.MULTILINE)
+CODE_BLOCK_RE = re.compile(r'```.*?```', re.DOTALL)
+IMAGE_RE = re.compile(r'!\[([^\]]*)\]\([^)]*\)')
+LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)]*)\)')
+LIST_ITEM_RE = re.compile(r'^\s*(?:[-*+]|\d+[.)])\s+', re.MULTILINE)
+WORD_RE = re.compile(r"[A-Za-z0-9\u00C0-\u024F]+(?:'[A-Za-z]+)?")
+SENTENCE_END_RE = re.compile(r'[.!?]+(?=\s|$)|\n{2,}')
+VOWEL_GROUP_RE = re.compile(r'[aeiouy]+')
+
+# Keyword density (percent) considered healthy
+DENSITY_MIN = 0.5
+DENSITY_MAX = 2.5
+MIN_WORDS = 300
+MAX_AVG_SENTENCE_WORDS = 25
+MAX_PARAGRAPH_WORDS = 150
+
+
+def strip_markdown(content: str) -> str:
+    """Reduce markdown to plain prose for word and sentence statistics"""
+    text = CODE_BLOCK_RE.sub(' ', content)
+    text = IMAGE_RE.sub(r'\1', text)
+    text = LINK_RE.sub(r'\1', text)
+    text = re.sub(r'`([^`]*)`', r'\1', text)
+    text = re.sub(r'^\s*#{1,6}\s+', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*>\s?', '', text, flags=re.MULTILINE)
+    text = LIST_ITEM_RE.sub('', text)
+    text = re.sub(r'[*_~]{1,3}', '', text)
+    return text
+
+
+@lru_cache(maxsize=50000)
+def count_syllables(word: str) -> int:
+    word = word.lower()
+    if len(word) <= 3:
+        return 1
+    word = re.sub(r'(?:[^laeiouy]es|ed|[^laeiouy]e)$', '', word)
+    word = re.sub(r'^y', '', word)
+    return max(1, len(VOWEL_GROUP_RE.findall(word)))
+
+
+def flesch_reading_ease(words: List[str], sentence_count: int) -> float:
+    """Flesch reading ease clamped to 0-100 (higher is easier)"""
+    if not words or not sentence_count:
+        return 0.0
+    syllables = sum(count_syllables(w) for w in words)
+    score = 206.835 - 1.015 * (len(words) / sentence_count) - 84.6 * (syllables / len(words))
+    return round(min(100.0, max(0.0, score)), 1)
+
+
+def heading_structure(content: str) -> List[Dict]:
+    return [
+        {"level": len(m.group(1)), "text": m.group(2)}
+        for m in HEADING_RE.finditer(CODE_BLOCK_RE.sub('', content))
+    ]
+
+
+def count_phrase(text: str, phrase: str) -> int:
+    """Whole-word, case-insensitive occurrences of ``phrase`` in ``text``"""
+    terms = WORD_RE.findall(phrase.lower())
+    if not terms:
+        return 0
+    pattern = r'\b' + r'\W+'.join(re.escape(t) for t in terms) + r'\b'
+    return len(re.findall(pattern, text.lower()))
+
+
+def analyze_content(content: str, target_keyword: str) -> dict:
+    """Score content for SEO without any network calls.
+
+    Returns the same fields as the ``/api/ai/seo-analysis`` response: a 0-100
+    score, keyword density (percent), Flesch readability, suggestions and
+    issues, plus the word count and heading breakdown they are based on.
+    """
+    text = strip_markdown(content)
+    words = WORD_RE.findall(text)
+    word_count = len(words)
+    sentences = [s for s in SENTENCE_END_RE.split(text) if WORD_RE.search(s)]
+    paragraphs = [p for p in re.split(r'\n\s*\n', text) if WORD_RE.search(p)]
+    headings = heading_structure(content)
+
+    keyword_count = count_phrase(text, target_keyword) if target_keyword else 0
+    keyword_density = (keyword_count / word_count * 100) if word_count > 0 else 0
+    readability_score = flesch_reading_ease(words, len(sentences))
+
+    issues: List[Dict[str, str]] = []
+    suggestions: List[str] = []
+    score = 100
+
+    def flag(kind: str, message: str, suggestion: str, penalty: int):
+        nonlocal score
+        issues.append({"type": kind, "message": message})
+        suggestions.append(suggestion)
+        score -= penalty
+
+    if word_count < MIN_WORDS:
+        flag("error", f"Content is short ({word_count} words)",
+             f"Expand the content to at least {MIN_WORDS} words", 20)
+
+    if target_keyword:
+        if keyword_count == 0:
+            flag("error", "Target keyword not found in content",
+                 f'Use "{target_keyword}" naturally in the body', 25)
+        elif keyword_density < DENSITY_MIN:
+            flag("warning", f"Keyword density too low ({keyword_density:.2f}%)",
+                 f'Mention "{target_keyword}" a few more times', 10)
+        elif keyword_density > DENSITY_MAX:
+            flag("warning", f"Keyword density too high ({keyword_density:.2f}%)",
+                 "Reduce keyword repetition to avoid over-optimization", 10)
+
+        if paragraphs and count_phrase(paragraphs[0], target_keyword) == 0:
+            flag("warning", "Target keyword missing from the first paragraph",
+                 "Add target keyword to the first paragraph", 8)
+
+        if headings and not any(count_phrase(h["text"], target_keyword) for h in headings):
+            flag("warning", "Target keyword missing from headings",
+                 "Include the target keyword in at least one H2 heading", 8)
+
+    levels = [h["level"] for h in headings]
+    if levels.count(2) == 0:
+        flag("error", "No H2 headings found",
+             "Include more H2 and H3 headings", 15)
+    if levels.count(1) > 1:
+        flag("warning", f"Multiple H1 headings ({levels.count(1)})",
+             "Use a single H1 and structure sections with H2/H3", 5)
+    skips = [b for a, b in zip(levels, levels[1:]) if b > a + 1]
+    if skips:
+        flag("warning", f"Heading levels skipped {len(skips)} time(s)",
+             "Keep heading hierarchy sequential (H2 before H3, H3 before H4)", 5)
+
+    if sentences and word_count / len(sentences) > MAX_AVG_SENTENCE_WORDS:
+        flag("warning", f"Average sentence length is {word_count / len(sentences):.0f} words",
+             "Shorten long sentences to improve readability", 5)
+    if readability_score < 30:
+        flag("warning", f"Content is hard to read (Flesch {readability_score})",
+             "Use simpler words and shorter sentences", 5)
+
+    long_paragraphs = sum(1 for p in paragraphs if len(WORD_RE.findall(p)) > MAX_PARAGRAPH_WORDS)
+    if long_paragraphs:
+        flag("info", f"{long_paragraphs} paragraph(s) over {MAX_PARAGRAPH_WORDS} words",
+             "Break up long paragraphs", 3)
+
+    if not LIST_ITEM_RE.search(CODE_BLOCK_RE.sub('', content)):
+        flag("info", "No bullet or numbered lists",
+             "Add bullet points or numbered lists for skimmability", 3)
+    if not LINK_RE.search(content):
+        flag("info", "No links found",
+             "Add internal and external links", 3)
+
+    heading_counts = {f"h{level}": levels.count(level) for level in range(1, 7) if level in levels}
+
+    return {
+        "score": max(0, min(100, score)),
+        "keyword_density": round(keyword_density, 2),
+        "readability_score": readability_score,
+        "suggestions": suggestions,
+        "issues": issues,
+        "word_count": word_count,
+        "keyword_count": keyword_count,
+        "heading_structure": heading_counts
+    }
@@ -1,26 +1,55 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Query
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, Response, status, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 import os
+import asyncio
 import logging
+import time
 from pathlib import Path
-from typing import List, Optional
-from datetime import datetime, timedelta
+from typing import List, Optional, Union
+from datetime import date, datetime, timedelta
+import csv
+import io
 import json
+import re
+import uuid
+from pydantic import ValidationError
 
 # Local imports
 from models import (
-    User, UserCreate, UserLogin, UserUpdate, UserResponse, UserRole,
+    User, UserCreate, UserLogin, UserUpdate, UserResponse, UserRole, RefreshRequest,
     Article, ArticleCreate, ArticleUpdate, ArticleResponse, ArticleStatus, ContentTone,
+    GenerationMode, JobResponse, BulkArticleRequest, BulkBatch, BulkBatchItem, BulkBatchResponse, BulkItemStatus, ArticleSearchHit, ArticleSearchResponse, ArticlePage, ArticleSummary,
     Template, KeywordRequest, KeywordResponse, CompetitorRequest, CompetitorResponse,
     SEOAnalysisRequest, SEOAnalysisResponse, RewriteRequest, RewriteResponse,
-    ExportRequest, ExportResponse, ExportFormat, AnalyticsResponse,
+    ExportRequest, ExportResponse, ExportFormat, AnalyticsResponse, TimeSeriesGranularity, TimeSeriesResponse,
     CalendarEvent, CalendarEventCreate
 )
-from auth import hash_password, verify_password, create_access_token, get_current_user
+from auth import (
+    ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS, REFRESH_REUSE_GRACE_SECONDS, hash_password_async, verify_password_async,
+    create_access_token, generate_refresh_token, hash_refresh_token, get_current_user, password_executor,
+    revocation_list, token_cache
+)
 from ai_service import ai_service
+from jobs import JobQueue, create_job_backend
+from db_indexes import ensure_indexes, collscan_report
+from search import EXCERPT_LENGTH, text_search_filter, highlight_snippet, make_excerpt
+from pagination import KEYSET_SORT, encode_cursor, keyset_filter
+from stats import (
+    STATS_PROJECTION, StatsReconciler, apply_article_change, apply_article_changes, read_timeseries, read_user_stats
+)
+from credits import (
+    CREDIT_HOLD_SECONDS, commit_credit, ensure_credit_hold, held_credits, release_credit, release_credits,
+    renew_credit_holds, reserve_credit, reserve_credits
+)
+from bulk_writer import BatchWriter
+from db_metrics import CommandCounter
+from rate_limit import RateLimiter, create_rate_limit_store
+from llm_dispatcher import llm_tier
 from templates_data import get_all_templates, get_template_by_id, get_templates_by_category, get_template_categories
 
 ROOT_DIR = Path(__file__).parent
@@ -28,7 +57,8 @@ load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+db_commands = CommandCounter()
+client = AsyncIOMotorClient(mongo_url, event_listeners=[db_commands])
 db = client[os.environ.get('DB_NAME', 'hydraseo')]
 
 # Create the main app
@@ -42,13 +72,75 @@ ai_router = APIRouter(prefix="/api/ai", tags=["AI Services"])
 templates_router = APIRouter(prefix="/api/templates", tags=["Templates"])
 analytics_router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
 calendar_router = APIRouter(prefix="/api/calendar", tags=["Calendar"])
+admin_router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Streamed generation persists partial content once either threshold is hit
+STREAM_FLUSH_CHARS = int(os.environ.get("STREAM_FLUSH_CHARS", "2000"))
+STREAM_FLUSH_SECONDS = float(os.environ.get("STREAM_FLUSH_SECONDS", "2.0"))
+# A mode=stream article whose stream is not opened within this window is
+# failed and its credit refunded
+STREAM_PENDING_SECONDS = int(os.environ.get("STREAM_PENDING_SECONDS", "600"))
+# A follower stream gives up once the article has not changed for this long
+STREAM_FOLLOW_IDLE_SECONDS = int(os.environ.get("STREAM_FOLLOW_IDLE_SECONDS", "300"))
+# Longest date range the time-series endpoint serves (one bucket per day)
+TIMESERIES_MAX_DAYS = int(os.environ.get("TIMESERIES_MAX_DAYS", "731"))
+# Bulk generation: items per batch, and articles of one batch generated at once
+BULK_MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", "500"))
+BULK_CONCURRENCY = int(os.environ.get("BULK_CONCURRENCY", "4"))
+# Bulk item results are written in batches of this many, or at least this often
+BULK_FLUSH_ITEMS = int(os.environ.get("BULK_FLUSH_ITEMS", "10"))
+BULK_FLUSH_SECONDS = float(os.environ.get("BULK_FLUSH_SECONDS", "1.0"))
+# A batch with unfinished items whose run has not written for this long is
+# taken to be dead (e.g. the process restarted); its run writes at least
+# five times per window while alive
+BULK_STALE_SECONDS = int(os.environ.get("BULK_STALE_SECONDS", "300"))
+
+# Strong references to detached tasks so they are not garbage collected
+background_tasks = set()
+
 # ==================== AUTH ROUTES ====================
 
+async def get_current_user_doc(request: Request, current_user: dict = Depends(get_current_user)) -> dict:
+    """The authenticated user's document, loaded at most once per request"""
+    user = getattr(request.state, "user", None)
+    if user is None:
+        user = await db.users.find_one({"id": current_user["sub"]}, {"_id": 0})
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        request.state.user = user
+    return user
+
+async def issue_tokens(user_id: str, email: str, role: str, session_id: Optional[str] = None) -> dict:
+    """Access token plus a new refresh token for the session (a new session by default)"""
+    session_id = session_id or str(uuid.uuid4())
+    refresh_token = generate_refresh_token()
+    now = datetime.utcnow()
+    await db.refresh_tokens.insert_one({
+        "token_hash": hash_refresh_token(refresh_token),
+        "user_id": user_id,
+        "session_id": session_id,
+        "used_at": None,
+        "created_at": now,
+        "expires_at": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    })
+    return {
+        "access_token": create_access_token({"sub": user_id, "email": email, "role": role, "sid": session_id}),
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }
+
+async def revoke_session(session_id: str) -> None:
+    """End a session: drop its refresh tokens and reject its live access tokens"""
+    await db.refresh_tokens.delete_many({"session_id": session_id})
+    await revocation_list.revoke(
+        session_id, datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
 @auth_router.post("/register")
 async def register(user_data: UserCreate):
     """Register a new user"""
@@ -61,19 +153,18 @@ async def register(user_data: UserCreate):
     user = User(
         email=user_data.email,
         name=user_data.name,
-        password_hash=hash_password(user_data.password),
+        password_hash=await hash_password_async(user_data.password),
         role=UserRole.FREE,
         credits_limit=5  # Free tier
     )
     
     await db.users.insert_one(user.dict())
     
-    # Generate token
-    token = create_access_token({"sub": user.id, "email": user.email})
+    # Generate tokens
+    tokens = await issue_tokens(user.id, user.email, user.role.value)
     
     return {
-        "access_token": token,
-        "token_type": "bearer",
+        **tokens,
         "user": UserResponse(**user.dict())
     }
 
@@ -84,64 +175,193 @@ async def login(credentials: UserLogin):
     if not user_doc:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if not verify_password(credentials.password, user_doc["password_hash"]):
+    valid, new_hash = await verify_password_async(credentials.password, user_doc["password_hash"])
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # Stored hash predates the current bcrypt cost
+        await db.users.update_one({"id": user_doc["id"]}, {"$set": {"password_hash": new_hash}})
     
-    token = create_access_token({"sub": user_doc["id"], "email": user_doc["email"]})
+    tokens = await issue_tokens(user_doc["id"], user_doc["email"], user_doc.get("role"))
     
     return {
-        "access_token": token,
-        "token_type": "bearer",
+        **tokens,
         "user": UserResponse(**user_doc)
     }
 
+@auth_router.post("/refresh")
+async def refresh_session(body: RefreshRequest):
+    """Exchange a refresh token for a new access token and refresh token.
+
+    Each refresh token works once. Presenting one that was already rotated
+    means it leaked, so the whole session is revoked, unless it was rotated
+    within REFRESH_REUSE_GRACE_SECONDS: then it is another tab refreshing at
+    the same moment, and it gets tokens for the session too.
+    """
+    now = datetime.utcnow()
+    token_hash = hash_refresh_token(body.refresh_token)
+    current = await db.refresh_tokens.find_one_and_update(
+        {"token_hash": token_hash, "used_at": None, "expires_at": {"$gt": now}},
+        {"$set": {"used_at": now}}
+    )
+    if current is None:
+        reused = await db.refresh_tokens.find_one(
+            {"token_hash": token_hash, "used_at": {"$ne": None}},
+            {"_id": 0, "session_id": 1, "user_id": 1, "used_at": 1, "expires_at": 1}
+        )
+        if (reused and reused["expires_at"] > now
+                and now - reused["used_at"] <= timedelta(seconds=REFRESH_REUSE_GRACE_SECONDS)):
+            current = reused
+        elif reused:
+            logger.warning(f"Refresh token reuse for user {reused['user_id']}; revoking session")
+            await revoke_session(reused["session_id"])
+    if current is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    
+    user_doc = await db.users.find_one({"id": current["user_id"]}, {"_id": 0, "id": 1, "email": 1, "role": 1})
+    if not user_doc:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    return await issue_tokens(user_doc["id"], user_doc["email"], user_doc.get("role"), current["session_id"])
+
+@auth_router.post("/logout")
+async def logout(current_user: dict = Depends(get_current_user)):
+    """End the current session"""
+    if current_user.get("sid"):
+        await revoke_session(current_user["sid"])
+    return {"message": "Logged out"}
+
+@auth_router.post("/logout-all")
+async def logout_all(current_user: dict = Depends(get_current_user)):
+    """End every session of the current user, e.g. after a password leak"""
+    sessions = set(await db.refresh_tokens.distinct("session_id", {"user_id": current_user["sub"]}))
+    if current_user.get("sid"):
+        sessions.add(current_user["sid"])
+    for session_id in sessions:
+        await revoke_session(session_id)
+    return {"message": "Logged out", "sessions": len(sessions)}
+
 @auth_router.get("/me", response_model=UserResponse)
-async def get_me(current_user: dict = Depends(get_current_user)):
+async def get_me(user_doc: dict = Depends(get_current_user_doc)):
     """Get current user info"""
-    user_doc = await db.users.find_one({"id": current_user["sub"]})
-    if not user_doc:
-        raise HTTPException(status_code=404, detail="User not found")
     return UserResponse(**user_doc)
 
 @auth_router.put("/me")
-async def update_me(update_data: UserUpdate, current_user: dict = Depends(get_current_user)):
+async def update_me(update_data: UserUpdate, user_doc: dict = Depends(get_current_user_doc)):
     """Update current user"""
     update_dict = {k: v for k, v in update_data.dict().items() if v is not None}
     update_dict["updated_at"] = datetime.utcnow()
     
     await db.users.update_one(
-        {"id": current_user["sub"]},
+        {"id": user_doc["id"]},
         {"$set": update_dict}
     )
     
-    user_doc = await db.users.find_one({"id": current_user["sub"]})
-    return UserResponse(**user_doc)
+    return UserResponse(**{**user_doc, **update_dict})
 
 # ==================== ARTICLES ROUTES ====================
 
-@articles_router.get("", response_model=List[ArticleResponse])
+# Listing fields; content is left on the server and replaced by the stored
+# excerpt (or a prefix of the content for articles saved before excerpts)
+SUMMARY_PROJECTION = {
+    "_id": 0, "id": 1, "user_id": 1, "title": 1, "meta_title": 1, "keywords": 1,
+    "status": 1, "tone": 1, "language": 1, "word_count": 1, "seo_score": 1,
+    "plagiarism_score": 1, "created_at": 1, "updated_at": 1,
+    "excerpt": {"$ifNull": ["$excerpt", {"$substrCP": ["$content", 0, EXCERPT_LENGTH]}]}
+}
+HEAVY_ARTICLE_FIELDS = {"content", "meta_description", "generation_timings"}
+
+@articles_router.get(
+    "",
+    response_model=Union[List[ArticleSummary], ArticlePage],
+    response_model_exclude_unset=True
+)
 async def get_articles(
     status: Optional[ArticleStatus] = None,
     search: Optional[str] = None,
-    skip: int = 0,
-    limit: int = 50,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
-    """Get user's articles with optional filtering"""
+    """Get user's articles with optional filtering.
+    
+    Returns lightweight summaries; ``fields`` is a comma separated list of
+    heavy fields to include (``content``, ``meta_description``,
+    ``generation_timings``). Passing ``cursor`` (empty for the first page)
+    switches to keyset pagination: newest first, wrapped in a page with
+    ``next_cursor``. Without it the legacy ``skip``/``limit`` list is returned.
+    """
+    projection = dict(SUMMARY_PROJECTION)
+    if fields:
+        requested = {f.strip() for f in fields.split(",") if f.strip()}
+        unknown = requested - HEAVY_ARTICLE_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+        projection.update({f: 1 for f in requested})
+    
     query = {"user_id": current_user["sub"]}
     
     if status:
         query["status"] = status.value
     
     if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"content": {"$regex": search, "$options": "i"}}
-        ]
+        query.update(text_search_filter(search))
+    
+    if cursor is not None:
+        if cursor:
+            try:
+                query = {"$and": [query, keyset_filter(cursor)]}
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        # One extra row tells whether another page exists
+        articles = await db.articles.find(query, projection).sort(KEYSET_SORT).limit(limit + 1).to_list(length=limit + 1)
+        has_more = len(articles) > limit
+        articles = articles[:limit]
+        return ArticlePage(
+            items=[ArticleSummary(**a) for a in articles],
+            next_cursor=encode_cursor(articles[-1]) if has_more else None,
+            has_more=has_more
+        )
+    
+    if search:
+        results = db.articles.find(query, {**projection, "relevance": {"$meta": "textScore"}})
+        results = results.sort([("relevance", {"$meta": "textScore"}), ("created_at", -1)])
+    else:
+        results = db.articles.find(query, projection).sort("created_at", -1)
+    
+    articles = await results.skip(skip).limit(limit).to_list(length=limit)
+    return [ArticleSummary(**a) for a in articles]
+
+@articles_router.get("/search", response_model=ArticleSearchResponse)
+async def search_articles(
+    q: str = Query(..., min_length=1),
+    status: Optional[ArticleStatus] = None,
+    skip: int = 0,
+    limit: int = Query(20, le=100),
+    current_user: dict = Depends(get_current_user)
+):
+    """Full-text search over the user's articles, ranked by relevance"""
+    query = {"user_id": current_user["sub"], **text_search_filter(q)}
+    if status:
+        query["status"] = status.value
     
-    cursor = db.articles.find(query).sort("created_at", -1).skip(skip).limit(limit)
-    articles = await cursor.to_list(length=limit)
-    return [ArticleResponse(**a) for a in articles]
+    projection = {
+        "_id": 0, "id": 1, "title": 1, "status": 1, "keywords": 1, "word_count": 1,
+        "seo_score": 1, "content": 1, "created_at": 1, "updated_at": 1,
+        "score": {"$meta": "textScore"}
+    }
+    cursor = db.articles.find(query, projection).sort([("score", {"$meta": "textScore"})])
+    articles, total = await asyncio.gather(
+        cursor.skip(skip).limit(limit).to_list(length=limit),
+        db.articles.count_documents(query)
+    )
+    
+    results = []
+    for a in articles:
+        snippet = highlight_snippet(a.pop("content", ""), q)
+        results.append(ArticleSearchHit(**a, snippet=snippet))
+    return ArticleSearchResponse(query=q, total=total, results=results)
 
 @articles_router.get("/{article_id}", response_model=ArticleResponse)
 async def get_article(article_id: str, current_user: dict = Depends(get_current_user)):
@@ -151,17 +371,292 @@ async def get_article(article_id: str, current_user: dict = Depends(get_current_
         raise HTTPException(status_code=404, detail="Article not found")
     return ArticleResponse(**article)
 
+async def update_article_tracked(article_filter: dict, update: dict, projection: Optional[dict] = STATS_PROJECTION) -> Optional[dict]:
+    """Apply ``$set`` to an article and fold the change into the user's rollups.
+    
+    Returns the article as it was before the update (limited to
+    ``projection``), or None if nothing matched.
+    """
+    before = await db.articles.find_one_and_update(
+        article_filter,
+        {"$set": update},
+        projection=projection,
+        return_document=ReturnDocument.BEFORE
+    )
+    if before:
+        await apply_article_change(db, before["user_id"], before, {**before, **update})
+    return before
+
+async def persist_generation(article: dict, update: dict, daily_extra: Optional[dict] = None) -> Optional[dict]:
+    """Store generated fields on an article inserted by this request and return it.
+
+    ``article`` is the document as inserted, so it stands in for the
+    before-image and the write returns the updated article in the same round
+    trip; edits made meanwhile are picked up by the stats reconciler.
+    """
+    after = await db.articles.find_one_and_update(
+        {"id": article["id"]},
+        {"$set": update},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if after:
+        await apply_article_changes(db, article["user_id"], [(article, after)], daily_extra)
+    return after
+
+async def generated_fields(article_data: ArticleCreate, result: dict) -> dict:
+    """Score generated content; returns the fields to store on the article"""
+    # Analyze SEO
+    seo_result = await ai_service.analyze_seo(
+        content=result["content"],
+        target_keyword=article_data.keywords[0] if article_data.keywords else article_data.title
+    )
+    
+    # Update article with generated content
+    update_data = {
+        "content": result["content"],
+        "excerpt": make_excerpt(result["content"]),
+        "meta_title": result["meta_title"],
+        "meta_description": result["meta_description"],
+        "word_count": result["word_count"],
+        "seo_score": seo_result["score"],
+        "generation_timings": result.get("timings", {}),
+        "generation_error": None,
+        "status": ArticleStatus.DRAFT.value,
+        "updated_at": datetime.utcnow()
+    }
+    return update_data
+
+async def finalize_article(article_id: str, article_data: ArticleCreate, result: dict) -> dict:
+    """Score generated content and store it on the article"""
+    update_data = await generated_fields(article_data, result)
+    await update_article_tracked({"id": article_id}, update_data)
+    return update_data
+
+def failed_fields(error: Exception) -> dict:
+    logger.error(f"Article generation failed: {error}")
+    return {
+        "status": ArticleStatus.DRAFT.value,
+        "content": f"Generation failed: {str(error)}",
+        "excerpt": make_excerpt(f"Generation failed: {str(error)}"),
+        "generation_error": str(error)
+    }
+
+async def mark_generation_failed(article_id: str, error: Exception):
+    await update_article_tracked({"id": article_id}, failed_fields(error))
+
+async def generate_article_fields(article_data: ArticleCreate, progress=None) -> dict:
+    """Run the AI pipeline for an article; returns the fields to store on it"""
+    async def report(value: int, stage: str):
+        if progress:
+            await progress(value, stage)
+
+    await report(10, "generating")
+    # Generate content with AI
+    result = await ai_service.generate_article(
+        title=article_data.title,
+        keywords=article_data.keywords,
+        tone=article_data.tone,
+        word_count=article_data.word_count_target,
+        fun_mode=article_data.fun_mode
+    )
+    
+    await report(70, "analyzing")
+    return await generated_fields(article_data, result)
+
+async def generate_article_content(article_id: str, article_data: ArticleCreate, progress=None) -> dict:
+    """Run the AI pipeline for an article and store the generated content"""
+    try:
+        update_data = await generate_article_fields(article_data, progress)
+    except Exception as e:
+        await mark_generation_failed(article_id, e)
+        raise
+    await update_article_tracked({"id": article_id}, update_data)
+    return update_data
+
+async def run_generation_job(job: dict, progress) -> None:
+    """Job queue handler: generate the article and charge the user's credit"""
+    article_data = ArticleCreate(**job["request"])
+    owner = await db.users.find_one({"id": job["user_id"]}, {"_id": 0, "role": 1})
+    llm_tier.set((owner or {}).get("role"))
+    # The hold may have lapsed while the job waited in the queue
+    if not await ensure_credit_hold(db, job["user_id"], job["article_id"]):
+        error = RuntimeError("Credits exhausted while the article was queued")
+        await mark_generation_failed(job["article_id"], error)
+        raise error
+    try:
+        await generate_article_content(job["article_id"], article_data, progress)
+    except Exception:
+        await release_credit(db, job["user_id"], job["article_id"])
+        raise
+    await commit_credit(db, job["user_id"], job["article_id"])
+
+async def renew_job_hold(job: dict) -> None:
+    """Job queue heartbeat hook: keep the credit hold alive as long as the job runs"""
+    await renew_credit_holds(db, job["user_id"], [job["article_id"]])
+
+async def abandon_generation_job(job: dict) -> None:
+    """Job queue hook for a job given up on: fail its article and refund the hold"""
+    await asyncio.gather(
+        mark_generation_failed(job["article_id"], RuntimeError("Job abandoned after too many attempts")),
+        release_credit(db, job["user_id"], job["article_id"])
+    )
+
+async def expire_pending_streams() -> int:
+    """Fail stream-mode articles whose stream was never opened and refund their credit"""
+    cutoff = datetime.utcnow() - timedelta(seconds=STREAM_PENDING_SECONDS)
+    expired = 0
+    while True:
+        # Claimed the same way as the stream endpoint, so only one of them wins
+        article = await db.articles.find_one_and_update(
+            {"status": ArticleStatus.GENERATING.value, "pending_generation": {"$ne": None}, "created_at": {"$lt": cutoff}},
+            {"$set": {"pending_generation": None}},
+            projection={"_id": 0, "id": 1, "user_id": 1}
+        )
+        if not article:
+            return expired
+        await asyncio.gather(
+            mark_generation_failed(article["id"], RuntimeError("Stream was not opened in time")),
+            release_credit(db, article["user_id"], article["id"])
+        )
+        expired += 1
+
+async def sweep_pending_streams():
+    while True:
+        await asyncio.sleep(STREAM_PENDING_SECONDS / 2)
+        try:
+            expired = await expire_pending_streams()
+            if expired:
+                logger.info(f"Expired {expired} unopened article streams")
+        except Exception as e:
+            logger.error(f"Unopened stream sweep failed: {e}")
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+async def stream_generation(article_id: str, user_id: str, article_data: ArticleCreate, events: asyncio.Queue):
+    """Generate an article body token by token, publishing chunks to ``events``.
+
+    Runs detached from the HTTP response so a dropped client does not abort
+    generation; partial content is flushed to the article in batches so that
+    a reconnecting client can resume from the stored document.
+    """
+    content = ""
+    flushed = 0
+    last_flush = time.monotonic()
+    started = time.perf_counter()
+    # Meta tags only need the title and keywords; fetch them while the body streams
+    meta_task = asyncio.create_task(ai_service.run_concurrently({
+        "meta": lambda: ai_service.generate_meta_tags(article_data.title, article_data.keywords)
+    }))
+    try:
+        async for delta in ai_service.stream_article(
+            title=article_data.title,
+            keywords=article_data.keywords,
+            tone=article_data.tone,
+            word_count=article_data.word_count_target,
+            fun_mode=article_data.fun_mode
+        ):
+            content += delta
+            events.put_nowait(("chunk", {"content": delta}))
+            if (len(content) - flushed >= STREAM_FLUSH_CHARS
+                    or time.monotonic() - last_flush >= STREAM_FLUSH_SECONDS):
+                await db.articles.update_one({"id": article_id}, {"$set": {"content": content}})
+                flushed = len(content)
+                last_flush = time.monotonic()
+        
+        body_ms = round((time.perf_counter() - started) * 1000, 1)
+        meta_results, timings = await meta_task
+        timings.update({
+            "body": body_ms,
+            "sequential": round(body_ms + timings["meta"], 1),
+            "total": round((time.perf_counter() - started) * 1000, 1)
+        })
+        result = {"content": content, "word_count": len(content.split()), "timings": timings, **meta_results["meta"]}
+        update_data = await finalize_article(article_id, article_data, result)
+        await commit_credit(db, user_id, article_id)
+        
+        update_data.pop("content")
+        events.put_nowait(("done", {"id": article_id, **update_data}))
+    except BaseException as e:
+        # Cancellation (shutdown, task teardown) must settle the article too:
+        # its stream is already claimed, so nothing else would
+        meta_task.cancel()
+        error = e if isinstance(e, Exception) else RuntimeError("Generation was interrupted")
+        await asyncio.shield(asyncio.gather(
+            mark_generation_failed(article_id, error),
+            release_credit(db, user_id, article_id)
+        ))
+        events.put_nowait(("error", {"detail": f"Article generation failed: {str(error)}"}))
+        if not isinstance(e, Exception):
+            raise
+    finally:
+        events.put_nowait(None)
+
+async def drain_events(events: asyncio.Queue):
+    while True:
+        item = await events.get()
+        if item is None:
+            return
+        yield sse_event(*item)
+
+async def follow_article(article_id: str):
+    """Replay stored content of an article generated elsewhere until it settles"""
+    sent = 0
+    last_change = time.monotonic()
+    while True:
+        article = await db.articles.find_one({"id": article_id})
+        if not article:
+            yield sse_event("error", {"detail": "Article not found"})
+            return
+        if article.get("generation_error"):
+            # The stored content is now the failure message, not a continuation
+            yield sse_event("error", {"detail": f"Article generation failed: {article['generation_error']}"})
+            return
+        content = article.get("content", "")
+        if len(content) > sent:
+            yield sse_event("chunk", {"content": content[sent:]})
+            sent = len(content)
+            last_change = time.monotonic()
+        if article["status"] != ArticleStatus.GENERATING.value:
+            yield sse_event("done", {
+                "id": article_id,
+                "status": article["status"],
+                "meta_title": article.get("meta_title"),
+                "meta_description": article.get("meta_description"),
+                "word_count": article.get("word_count", 0),
+                "seo_score": article.get("seo_score", 0)
+            })
+            return
+        if time.monotonic() - last_change >= STREAM_FOLLOW_IDLE_SECONDS:
+            yield sse_event("error", {"detail": "Article generation stalled; check back later"})
+            return
+        await asyncio.sleep(STREAM_FLUSH_SECONDS)
+
+stats_reconciler = StatsReconciler(db, interval=float(os.environ.get("STATS_RECONCILE_SECONDS", "3600")))
+
+job_queue = JobQueue(
+    backend=create_job_backend(os.environ.get("JOB_QUEUE_BACKEND", "memory"), db.generation_jobs),
+    handler=run_generation_job,
+    concurrency=int(os.environ.get("JOB_WORKERS", "4")),
+    on_abandon=abandon_generation_job,
+    on_heartbeat=renew_job_hold
+)
+
 @articles_router.post("", response_model=ArticleResponse)
 async def create_article(
     article_data: ArticleCreate,
-    current_user: dict = Depends(get_current_user)
+    mode: GenerationMode = GenerationMode.SYNC,
+    current_user: dict = Depends(get_current_user),
+    user: dict = Depends(get_current_user_doc)
 ):
-    """Create and generate a new article using AI"""
-    # Check credits
-    user = await db.users.find_one({"id": current_user["sub"]})
-    if user["credits_used"] >= user["credits_limit"]:
-        raise HTTPException(status_code=403, detail="Credits exhausted. Please upgrade your plan.")
-    
+    """Create and generate a new article using AI.
+
+    With ``mode=queued`` the article is saved in the generating state and a
+    202 with the generation job is returned immediately; poll
+    ``/api/articles/jobs/{job_id}`` for progress. With ``mode=stream`` the
+    content is generated when ``/api/articles/{id}/stream`` is opened.
+    """
     # Create article record
     article = Article(
         user_id=current_user["sub"],
@@ -170,57 +665,335 @@ async def create_article(
         tone=article_data.tone,
         language=article_data.language,
         template_id=article_data.template_id,
-        status=ArticleStatus.GENERATING
+        status=ArticleStatus.GENERATING,
+        pending_generation=article_data.dict() if mode == GenerationMode.STREAM else None
     )
     
-    await db.articles.insert_one(article.dict())
+    llm_tier.set(user.get("role"))
     
+    # Hold a credit for the article until generation succeeds (commit) or fails (release)
+    if not await reserve_credit(db, user["id"], article.id):
+        raise HTTPException(status_code=403, detail="Credits exhausted. Please upgrade your plan.")
+    
+    article_doc = article.dict()
     try:
-        # Generate content with AI
-        result = await ai_service.generate_article(
-            title=article_data.title,
-            keywords=article_data.keywords,
-            tone=article_data.tone,
-            word_count=article_data.word_count_target,
-            fun_mode=article_data.fun_mode
-        )
-        
-        # Analyze SEO
-        seo_result = await ai_service.analyze_seo(
-            content=result["content"],
-            target_keyword=article_data.keywords[0] if article_data.keywords else article_data.title
+        await db.articles.insert_one(article_doc)
+    except Exception:
+        await release_credit(db, user["id"], article.id)
+        raise
+    article_doc.pop("_id", None)
+    await apply_article_change(db, article.user_id, None, article_doc)
+    
+    if mode == GenerationMode.STREAM:
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                "article_id": article.id,
+                "status": ArticleStatus.GENERATING.value,
+                "stream_url": f"/api/articles/{article.id}/stream"
+            }
         )
-        
-        # Update article with generated content
-        update_data = {
-            "content": result["content"],
-            "meta_title": result["meta_title"],
-            "meta_description": result["meta_description"],
-            "word_count": result["word_count"],
-            "seo_score": seo_result["score"],
-            "status": ArticleStatus.DRAFT.value,
-            "updated_at": datetime.utcnow()
-        }
-        
-        await db.articles.update_one({"id": article.id}, {"$set": update_data})
-        
-        # Update user credits
-        await db.users.update_one(
-            {"id": current_user["sub"]},
-            {"$inc": {"credits_used": 1}}
+    
+    if mode == GenerationMode.QUEUED:
+        job = await job_queue.submit(current_user["sub"], article.id, article_data.dict())
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=jsonable_encoder(JobResponse(**job)),
+            headers={"Location": f"/api/articles/jobs/{job['id']}"}
         )
-        
-        # Get updated article
-        updated_article = await db.articles.find_one({"id": article.id})
-        return ArticleResponse(**updated_article)
-        
+    
+    try:
+        update_data = await generate_article_fields(article_data)
     except Exception as e:
-        logger.error(f"Article generation failed: {e}")
-        await db.articles.update_one(
-            {"id": article.id},
-            {"$set": {"status": ArticleStatus.DRAFT.value, "content": f"Generation failed: {str(e)}"}}
+        await asyncio.gather(
+            persist_generation(article_doc, failed_fields(e)),
+            release_credit(db, user["id"], article.id)
         )
         raise HTTPException(status_code=500, detail=f"Article generation failed: {str(e)}")
+    
+    # Charge the credit, then store the result; the write returns the updated
+    # article and a charged credit rides along in the same day-bucket update.
+    # A hold that lapsed meanwhile charges nothing, so nothing is recorded
+    charged = await commit_credit(db, user["id"], article.id, record=False)
+    updated_article = await persist_generation(
+        article_doc, update_data, daily_extra={"credits_used": 1} if charged else None
+    )
+    if not updated_article:
+        raise HTTPException(status_code=404, detail="Article was deleted during generation")
+    return ArticleResponse(**updated_article)
+
+def parse_bulk_csv(text: str) -> List[ArticleCreate]:
+    """Articles from CSV rows with a ``title`` column and optional ``keywords``
+    (separated by ``;`` or ``|``), ``tone``, ``language``, ``word_count_target``
+    and ``template_id`` columns"""
+    reader = csv.DictReader(io.StringIO(text))
+    if "title" not in [(name or "").strip().lower() for name in reader.fieldnames or []]:
+        raise HTTPException(status_code=422, detail="CSV needs a header row with a 'title' column")
+    
+    items = []
+    for line, row in enumerate(reader, start=2):
+        row = {k.strip().lower(): (v or "").strip() for k, v in row.items() if isinstance(k, str) and isinstance(v, str)}
+        if not row.get("title"):
+            continue
+        data = {
+            "title": row["title"],
+            "keywords": [k.strip() for k in re.split(r"[;|]", row.get("keywords", "")) if k.strip()]
+        }
+        for field in ("tone", "language", "word_count_target", "template_id"):
+            if row.get(field):
+                data[field] = row[field]
+        try:
+            items.append(ArticleCreate(**data))
+        except ValidationError as e:
+            error = e.errors()[0]
+            raise HTTPException(status_code=422, detail=f"CSV line {line}, {error['loc'][0]}: {error['msg']}")
+    return items
+
+async def run_bulk_batch(batch_id: str, user_id: str, items: List[dict], events: asyncio.Queue):
+    """Generate a batch's items BULK_CONCURRENCY at a time, reporting each as it finishes.
+
+    Article, credit, rollup and batch writes are buffered and flushed
+    together every BULK_FLUSH_ITEMS items or BULK_FLUSH_SECONDS; an item's
+    event is sent once its result is stored.
+    """
+    gate = asyncio.Semaphore(BULK_CONCURRENCY)
+    writer = BatchWriter(
+        db, batch_id, user_id, max_pending=BULK_FLUSH_ITEMS, interval=BULK_FLUSH_SECONDS,
+        heartbeat=min(BULK_STALE_SECONDS, CREDIT_HOLD_SECONDS) / 5, hold_ids=[item["article_id"] for item in items]
+    )
+    succeeded = 0
+    
+    def publish(results: List[dict]):
+        nonlocal succeeded
+        for result in results:
+            succeeded += result["status"] == BulkItemStatus.SUCCEEDED.value
+            events.put_nowait(("item", result))
+    
+    async def run_item(item: dict):
+        async with gate:
+            writer.item_running(item["index"])
+            try:
+                update = await generate_article_fields(ArticleCreate(**item["request"]))
+            except Exception as e:
+                publish(await writer.item_finished(item, failed_fields(e), error=str(e)))
+            else:
+                publish(await writer.item_finished(item, update))
+    
+    async def flush_periodically():
+        while True:
+            await asyncio.sleep(writer.interval)
+            publish(await writer.flush())
+    
+    flusher = asyncio.create_task(flush_periodically())
+    try:
+        await asyncio.gather(*(run_item(item) for item in items))
+        flusher.cancel()
+        publish(await writer.flush())
+        events.put_nowait(("done", {"batch_id": batch_id, "succeeded": succeeded, "failed": len(items) - succeeded}))
+    except Exception as e:
+        logger.error(f"Bulk batch {batch_id} failed: {e}")
+        events.put_nowait(("error", {"detail": f"Bulk generation failed: {str(e)}"}))
+    finally:
+        flusher.cancel()
+        events.put_nowait(None)
+
+def start_bulk_run(batch_id: str, user_id: str, items: List[dict]) -> StreamingResponse:
+    """Run the items in the background and stream their results as Server-Sent Events.
+
+    Generation carries on if the client disconnects; the batch document
+    keeps each item's outcome.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    events.put_nowait(("batch", {"batch_id": batch_id, "total": len(items)}))
+    task = asyncio.create_task(run_bulk_batch(batch_id, user_id, items, events))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return StreamingResponse(
+        drain_events(events),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "Location": f"/api/articles/bulk/{batch_id}"
+        }
+    )
+
+async def fail_interrupted_items(batch: dict) -> dict:
+    """Fail the unfinished items of a batch whose run died, refunding their credits.
+
+    Returns the batch with those items marked failed, so they can be retried.
+    """
+    unfinished = [
+        item for item in batch["items"]
+        if item["status"] in (BulkItemStatus.PENDING.value, BulkItemStatus.RUNNING.value)
+    ]
+    if not unfinished or batch["updated_at"] > datetime.utcnow() - timedelta(seconds=BULK_STALE_SECONDS):
+        return batch
+    # Only one caller gets to settle a dead batch
+    claimed = await db.bulk_batches.update_one(
+        {"id": batch["id"], "updated_at": batch["updated_at"]},
+        {"$set": {"updated_at": datetime.utcnow()}}
+    )
+    if not claimed.modified_count:
+        return batch
+    
+    error = "Interrupted before it finished"
+    writer = BatchWriter(db, batch["id"], batch["user_id"], max_pending=len(unfinished))
+    for item in unfinished:
+        await writer.item_finished(item, failed_fields(RuntimeError(error)), error=error)
+        item.update({"status": BulkItemStatus.FAILED.value, "error": error})
+    logger.warning(f"Bulk batch {batch['id']}: {len(unfinished)} interrupted items failed")
+    return batch
+
+@articles_router.post("/bulk")
+async def create_articles_bulk(request: Request, user: dict = Depends(get_current_user_doc)):
+    """Generate many articles, streaming per-item results as Server-Sent Events.
+
+    Accepts ``{"items": [ArticleCreate, ...]}`` or a ``text/csv`` body. Credits
+    for the whole batch are reserved up front; each item's credit is charged
+    when it succeeds and refunded when it fails.
+    """
+    if request.headers.get("content-type", "").startswith("text/csv"):
+        items = parse_bulk_csv((await request.body()).decode("utf-8-sig"))
+    else:
+        try:
+            items = BulkArticleRequest(**await request.json()).items
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=jsonable_encoder(e.errors(include_url=False)))
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=422, detail="Body must be JSON with 'items' or text/csv")
+    if not items:
+        raise HTTPException(status_code=422, detail="No articles to generate")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"At most {BULK_MAX_ITEMS} articles per batch")
+    
+    llm_tier.set(user.get("role"))
+    batch = BulkBatch(user_id=user["id"], items=[
+        BulkBatchItem(index=i, article_id=str(uuid.uuid4()), title=item.title, request=item.dict())
+        for i, item in enumerate(items)
+    ])
+    hold_ids = [item.article_id for item in batch.items]
+    if not await reserve_credits(db, user["id"], hold_ids):
+        remaining = user["credits_limit"] - user["credits_used"] - held_credits(user)
+        raise HTTPException(
+            status_code=403,
+            detail=f"Not enough credits for {len(items)} articles ({max(0, remaining)} remaining)"
+        )
+    
+    articles = [
+        Article(
+            id=item.article_id,
+            user_id=user["id"],
+            title=data.title,
+            keywords=data.keywords,
+            tone=data.tone,
+            language=data.language,
+            template_id=data.template_id,
+            status=ArticleStatus.GENERATING
+        ).dict()
+        for item, data in zip(batch.items, items)
+    ]
+    try:
+        await db.articles.insert_many(articles)
+        await db.bulk_batches.insert_one(batch.dict())
+    except Exception:
+        await release_credits(db, user["id"], hold_ids)
+        raise
+    await apply_article_changes(db, user["id"], [(None, article) for article in articles])
+    
+    return start_bulk_run(batch.id, user["id"], [item.dict() for item in batch.items])
+
+@articles_router.get("/bulk/{batch_id}", response_model=BulkBatchResponse)
+async def get_bulk_batch(batch_id: str, current_user: dict = Depends(get_current_user)):
+    """Per-item status of a bulk generation batch"""
+    batch = await db.bulk_batches.find_one({"id": batch_id, "user_id": current_user["sub"]}, {"_id": 0})
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    batch = await fail_interrupted_items(batch)
+    counts = {s.value: 0 for s in BulkItemStatus}
+    for item in batch["items"]:
+        counts[item["status"]] += 1
+    return BulkBatchResponse(total=len(batch["items"]), counts=counts, **batch)
+
+@articles_router.post("/bulk/{batch_id}/retry")
+async def retry_bulk_batch(batch_id: str, user: dict = Depends(get_current_user_doc)):
+    """Regenerate the failed items of a batch, streaming results like the batch itself.
+
+    Items left unfinished by a run that died count as failed.
+    """
+    batch = await db.bulk_batches.find_one({"id": batch_id, "user_id": user["id"]}, {"_id": 0})
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    batch = await fail_interrupted_items(batch)
+    failed = [item for item in batch["items"] if item["status"] == BulkItemStatus.FAILED.value]
+    if not failed:
+        raise HTTPException(status_code=409, detail="No failed items to retry")
+    
+    # Claim the failed items only if they are all still failed, so two
+    # concurrent retries cannot both run them
+    claimed = await db.bulk_batches.update_one(
+        {"id": batch_id, **{f"items.{item['index']}.status": BulkItemStatus.FAILED.value for item in failed}},
+        {"$set": {
+            **{f"items.{item['index']}.status": BulkItemStatus.PENDING.value for item in failed},
+            "updated_at": datetime.utcnow()
+        }}
+    )
+    if not claimed.modified_count:
+        raise HTTPException(status_code=409, detail="Batch is already being retried")
+    
+    llm_tier.set(user.get("role"))
+    hold_ids = [item["article_id"] for item in failed]
+    if not await reserve_credits(db, user["id"], hold_ids):
+        await db.bulk_batches.update_one({"id": batch_id}, {"$set": {
+            f"items.{item['index']}.status": BulkItemStatus.FAILED.value for item in failed
+        }})
+        raise HTTPException(status_code=403, detail=f"Not enough credits to retry {len(failed)} articles")
+    
+    previous = await db.articles.find({"id": {"$in": hold_ids}}, STATS_PROJECTION).to_list(length=len(hold_ids))
+    reset = {"status": ArticleStatus.GENERATING.value, "generation_error": None, "updated_at": datetime.utcnow()}
+    await db.articles.update_many({"id": {"$in": hold_ids}}, {"$set": reset})
+    await apply_article_changes(db, user["id"], [(before, {**before, **reset}) for before in previous])
+    return start_bulk_run(batch_id, user["id"], failed)
+
+@articles_router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_generation_job(job_id: str, current_user: dict = Depends(get_current_user)):
+    """Get the status of a queued article generation job"""
+    job = await job_queue.get(job_id, current_user["sub"])
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobResponse(**job)
+
+@articles_router.get("/{article_id}/stream")
+async def stream_article(article_id: str, current_user: dict = Depends(get_current_user)):
+    """Stream article generation as Server-Sent Events"""
+    # Claim the pending generation so that only one stream ever runs it
+    article = await db.articles.find_one_and_update(
+        {"id": article_id, "user_id": current_user["sub"], "pending_generation": {"$ne": None}},
+        {"$set": {"pending_generation": None}},
+        return_document=ReturnDocument.BEFORE
+    )
+    
+    if article:
+        events: asyncio.Queue = asyncio.Queue()
+        # The generation task inherits the caller's plan for LLM scheduling
+        llm_tier.set(current_user.get("role"))
+        task = asyncio.create_task(stream_generation(
+            article_id, current_user["sub"], ArticleCreate(**article["pending_generation"]), events
+        ))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+        event_source = drain_events(events)
+    else:
+        existing = await db.articles.find_one({"id": article_id, "user_id": current_user["sub"]}, {"_id": 0, "id": 1})
+        if not existing:
+            raise HTTPException(status_code=404, detail="Article not found")
+        event_source = follow_article(article_id)
+    
+    return StreamingResponse(
+        event_source,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @articles_router.put("/{article_id}", response_model=ArticleResponse)
 async def update_article(
@@ -229,10 +1002,6 @@ async def update_article(
     current_user: dict = Depends(get_current_user)
 ):
     """Update an article"""
-    article = await db.articles.find_one({"id": article_id, "user_id": current_user["sub"]})
-    if not article:
-        raise HTTPException(status_code=404, detail="Article not found")
-    
     update_dict = {k: v for k, v in update_data.dict().items() if v is not None}
     if "status" in update_dict:
         update_dict["status"] = update_dict["status"].value
@@ -241,18 +1010,24 @@ async def update_article(
     # Recalculate word count if content changed
     if "content" in update_dict:
         update_dict["word_count"] = len(update_dict["content"].split())
+        update_dict["excerpt"] = make_excerpt(update_dict["content"])
     
-    await db.articles.update_one({"id": article_id}, {"$set": update_dict})
-    
-    updated = await db.articles.find_one({"id": article_id})
-    return ArticleResponse(**updated)
+    article = await update_article_tracked(
+        {"id": article_id, "user_id": current_user["sub"]}, update_dict, projection=None
+    )
+    if not article:
+        raise HTTPException(status_code=404, detail="Article not found")
+    return ArticleResponse(**{**article, **update_dict})
 
 @articles_router.delete("/{article_id}")
 async def delete_article(article_id: str, current_user: dict = Depends(get_current_user)):
     """Delete an article"""
-    result = await db.articles.delete_one({"id": article_id, "user_id": current_user["sub"]})
-    if result.deleted_count == 0:
+    article = await db.articles.find_one_and_delete(
+        {"id": article_id, "user_id": current_user["sub"]}, projection=STATS_PROJECTION
+    )
+    if not article:
         raise HTTPException(status_code=404, detail="Article not found")
+    await apply_article_change(db, current_user["sub"], article, None)
     return {"message": "Article deleted"}
 
 @articles_router.post("/{article_id}/export")
@@ -300,15 +1075,34 @@ async def export_article(
 
 # ==================== AI SERVICES ROUTES ====================
 
+rate_limiter = RateLimiter(
+    create_rate_limit_store(os.environ.get("RATE_LIMIT_STORE", "memory"), db.rate_limits)
+)
+
+async def ai_rate_limit(request: Request, response: Response, current_user: dict = Depends(get_current_user)):
+    """Apply the plan's AI rate and concurrency limits for the whole request"""
+    role = current_user.get("role")
+    if role is None:
+        # Tokens issued before the role claim was added
+        role = (await get_current_user_doc(request, current_user)).get("role")
+    llm_tier.set(role)
+    slot_id = str(uuid.uuid4())
+    await rate_limiter.enter(current_user["sub"], role, slot_id, response)
+    try:
+        yield current_user
+    finally:
+        await rate_limiter.leave(current_user["sub"], slot_id)
+
 @ai_router.post("/keywords", response_model=KeywordResponse)
 async def generate_keywords(
     request: KeywordRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(ai_rate_limit)
 ):
     """Generate related keywords"""
     keywords = await ai_service.generate_keywords(
         seed_keyword=request.seed_keyword,
-        count=request.count
+        count=request.count,
+        use_cache=not request.bypass_cache
     )
     return KeywordResponse(
         seed_keyword=request.seed_keyword,
@@ -318,12 +1112,13 @@ async def generate_keywords(
 @ai_router.post("/competitors", response_model=CompetitorResponse)
 async def analyze_competitors(
     request: CompetitorRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(ai_rate_limit)
 ):
     """Analyze SERP competitors"""
     result = await ai_service.analyze_competitors(
         keyword=request.keyword,
-        count=request.count
+        count=request.count,
+        use_cache=not request.bypass_cache
     )
     return CompetitorResponse(
         keyword=request.keyword,
@@ -335,42 +1130,41 @@ async def analyze_competitors(
 @ai_router.post("/seo-analysis", response_model=SEOAnalysisResponse)
 async def analyze_seo(
     request: SEOAnalysisRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(ai_rate_limit)
 ):
     """Analyze content for SEO"""
     result = await ai_service.analyze_seo(
         content=request.content,
-        target_keyword=request.target_keyword
-    )
-    return SEOAnalysisResponse(
-        score=result["score"],
-        keyword_density=result["keyword_density"],
-        readability_score=result["readability_score"],
-        suggestions=result["suggestions"],
-        issues=result["issues"]
+        target_keyword=request.target_keyword,
+        enrich=request.enrich,
+        use_cache=not request.bypass_cache
     )
+    return SEOAnalysisResponse(**result)
 
 @ai_router.post("/rewrite", response_model=RewriteResponse)
 async def rewrite_content(
     request: RewriteRequest,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(ai_rate_limit)
 ):
     """Rewrite and humanize content"""
     result = await ai_service.rewrite_content(
         content=request.content,
         tone=request.tone,
         humanize=request.humanize,
-        preserve_keywords=request.preserve_keywords
+        preserve_keywords=request.preserve_keywords,
+        use_cache=not request.bypass_cache
     )
     return RewriteResponse(**result)
 
 @ai_router.post("/plagiarism-check")
 async def check_plagiarism(
     content: str,
-    current_user: dict = Depends(get_current_user)
+    enrich: bool = False,
+    bypass_cache: bool = False,
+    current_user: dict = Depends(ai_rate_limit)
 ):
-    """Check content for AI detection risk"""
-    result = await ai_service.check_plagiarism(content)
+    """Check content for AI detection risk (scored locally; ``enrich`` adds LLM suggestions)"""
+    result = await ai_service.check_plagiarism(content, enrich=enrich, use_cache=not bypass_cache)
     return result
 
 # ==================== TEMPLATES ROUTES ====================
@@ -401,28 +1195,25 @@ async def get_template(template_id: str, current_user: dict = Depends(get_curren
 # ==================== ANALYTICS ROUTES ====================
 
 @analytics_router.get("", response_model=AnalyticsResponse)
-async def get_analytics(current_user: dict = Depends(get_current_user)):
+async def get_analytics(user: dict = Depends(get_current_user_doc)):
     """Get user analytics"""
-    user_id = current_user["sub"]
-    user = await db.users.find_one({"id": user_id})
+    user_id = user["id"]
     
-    # Get article stats
-    articles = await db.articles.find({"user_id": user_id}).to_list(1000)
-    
-    total_articles = len(articles)
-    published = len([a for a in articles if a.get("status") == "published"])
-    drafts = len([a for a in articles if a.get("status") == "draft"])
-    total_words = sum(a.get("word_count", 0) for a in articles)
-    avg_seo = sum(a.get("seo_score", 0) for a in articles) / total_articles if total_articles > 0 else 0
+    # Rollup maintained on every article write
+    stats = await read_user_stats(db, user_id)
+    total_articles = stats.get("total_articles", 0)
+    total_words = stats.get("total_words", 0)
+    avg_seo = stats.get("seo_score_sum", 0) / total_articles if total_articles > 0 else 0
     
     # Status breakdown
-    status_counts = {}
-    for a in articles:
-        status = a.get("status", "draft")
-        status_counts[status] = status_counts.get(status, 0) + 1
+    status_counts = {k: v for k, v in stats.get("status_counts", {}).items() if v > 0}
+    published = status_counts.get("published", 0)
+    drafts = status_counts.get("draft", 0)
     
     # Recent activity
-    recent = sorted(articles, key=lambda x: x.get("updated_at", datetime.min), reverse=True)[:5]
+    recent = await db.articles.find(
+        {"user_id": user_id}, {"_id": 0, "title": 1, "updated_at": 1}
+    ).sort("updated_at", -1).limit(5).to_list(5)
     recent_activity = [
         {"type": "article", "title": a.get("title", ""), "date": a.get("updated_at")}
         for a in recent
@@ -435,11 +1226,29 @@ async def get_analytics(current_user: dict = Depends(get_current_user)):
         total_words=total_words,
         avg_seo_score=round(avg_seo, 1),
         credits_used=user.get("credits_used", 0),
-        credits_remaining=user.get("credits_limit", 5) - user.get("credits_used", 0),
+        credits_remaining=user.get("credits_limit", 5) - user.get("credits_used", 0) - held_credits(user),
         articles_by_status=status_counts,
         recent_activity=recent_activity
     )
 
+@analytics_router.get("/timeseries", response_model=TimeSeriesResponse)
+async def get_analytics_timeseries(
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    granularity: TimeSeriesGranularity = TimeSeriesGranularity.DAY,
+    current_user: dict = Depends(get_current_user)
+):
+    """Words, SEO score and credits over time, read from the daily buckets"""
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+    if (end - start).days >= TIMESERIES_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {TIMESERIES_MAX_DAYS} days")
+
+    points = await read_timeseries(db, current_user["sub"], start, end, granularity.value)
+    return TimeSeriesResponse(granularity=granularity, start=start, end=end, points=points)
+
 # ==================== CALENDAR ROUTES ====================
 
 @calendar_router.get("")
@@ -478,6 +1287,33 @@ async def delete_calendar_event(event_id: str, current_user: dict = Depends(get_
         raise HTTPException(status_code=404, detail="Event not found")
     return {"message": "Event deleted"}
 
+# ==================== ADMIN ROUTES ====================
+
+async def require_admin(user: dict = Depends(get_current_user_doc)) -> dict:
+    if user.get("role") != UserRole.ADMIN.value:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
+
+@admin_router.get("/ai-metrics")
+async def get_ai_metrics(admin: dict = Depends(require_admin)):
+    """AI service cache, coalescing, connection pool and rate limit counters"""
+    return {**ai_service.metrics(), "rate_limits": rate_limiter.stats()}
+
+@admin_router.get("/auth-metrics")
+async def get_auth_metrics(admin: dict = Depends(require_admin)):
+    """Token cache and revocation filter counters"""
+    return {"token_cache": token_cache.stats(), "revocations": revocation_list.stats()}
+
+@admin_router.get("/db-metrics")
+async def get_db_metrics(admin: dict = Depends(require_admin)):
+    """MongoDB commands sent by this process, per collection and command"""
+    return db_commands.snapshot()
+
+@admin_router.get("/index-report")
+async def get_index_report(admin: dict = Depends(require_admin)):
+    """Query plans of the hot query patterns, flagging collection scans"""
+    return await collscan_report(db)
+
 # ==================== ROOT ROUTES ====================
 
 @api_router.get("/")
@@ -541,6 +1377,7 @@ app.include_router(ai_router)
 app.include_router(templates_router)
 app.include_router(analytics_router)
 app.include_router(calendar_router)
+app.include_router(admin_router)
 
 # CORS middleware
 app.add_middleware(
@@ -551,6 +1388,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def bootstrap_indexes():
+    await ensure_indexes(db)
+
+@app.on_event("startup")
+async def start_job_queue():
+    await job_queue.start()
+    stats_reconciler.start()
+
+@app.on_event("startup")
+async def start_stream_sweep():
+    app.state.stream_sweep = asyncio.create_task(sweep_pending_streams())
+
+@app.on_event("startup")
+async def start_revocation_sync():
+    revocation_list.attach(db.token_revocations)
+    await revocation_list.sync()
+    revocation_list.start()
+
+@app.on_event("startup")
+async def start_ai_service():
+    await ai_service.start()
+
+@app.on_event("startup")
+async def attach_shared_llm_cache():
+    if os.environ.get("LLM_CACHE_SHARED", "false").lower() == "true":
+        ai_service.cache.attach(db.llm_cache)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await job_queue.stop()
+    app.state.stream_sweep.cancel()
+    await stats_reconciler.stop()
+    await revocation_list.stop()
+    await ai_service.close()
+    password_executor.shutdown(wait=False)
     client.close()
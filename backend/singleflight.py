@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one in-flight task.
+
+    Callers joining an in-flight key await the same result (or exception).
+    A caller being cancelled only detaches that caller; the shared task is
+    cancelled once no callers are left waiting on it.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, label: str, field: str) -> None:
+        counters = self._stats.setdefault(label, {"executed": 0, "coalesced": 0, "abandoned": 0})
+        counters[field] += 1
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], label: str = "default") -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.create_task(fn()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _, f=flight: self._forget(key, f))
+            self._count(label, "executed")
+        else:
+            self._count(label, "coalesced")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Every caller went away; stop the work and let new callers start fresh
+                self._forget(key, flight)
+                flight.task.cancel()
+                self._count(label, "abandoned")
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> dict:
+        executed = sum(c["executed"] for c in self._stats.values())
+        coalesced = sum(c["coalesced"] for c in self._stats.values())
+        return {
+            "executed": executed,
+            "coalesced": coalesced,
+            "in_flight": len(self._flights),
+            "by_method": self._stats,
+        }
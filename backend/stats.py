@@ -0,0 +1,241 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Article fields the rollups are derived from
+STATS_PROJECTION = {"_id": 0, "user_id": 1, "status": 1, "word_count": 1, "seo_score": 1}
+
+
+def _status(doc: dict) -> str:
+    status = doc.get("status") or "draft"
+    return getattr(status, "value", status)
+
+
+def article_delta(before: Optional[dict], after: Optional[dict]) -> dict:
+    """``$inc`` document that moves a user's rollup from ``before`` to ``after``.
+
+    ``None`` stands for "article does not exist", so inserts pass
+    ``before=None`` and deletes pass ``after=None``.
+    """
+    inc = defaultdict(int)
+    for doc, sign in ((before, -1), (after, 1)):
+        if doc is None:
+            continue
+        inc["total_articles"] += sign
+        inc[f"status_counts.{_status(doc)}"] += sign
+        inc["total_words"] += sign * (doc.get("word_count") or 0)
+        inc["seo_score_sum"] += sign * (doc.get("seo_score") or 0)
+    return {k: v for k, v in inc.items() if v}
+
+
+def daily_delta(before: Optional[dict], after: Optional[dict]) -> dict:
+    """``$inc`` for the day bucket of a write: what was produced, not what is held.
+
+    Deletes and edits that shorten an article do not un-produce words, so
+    only growth is counted; an SEO score counts as a sample on the day it is
+    assigned.
+    """
+    if after is None:
+        return {}
+    before = before or {}
+    inc = {}
+    if not before:
+        inc["articles_created"] = 1
+    words = (after.get("word_count") or 0) - (before.get("word_count") or 0)
+    if words > 0:
+        inc["words"] = words
+    seo_score = after.get("seo_score") or 0
+    if seo_score and seo_score != before.get("seo_score"):
+        inc["seo_score_sum"] = seo_score
+        inc["seo_samples"] = 1
+    return inc
+
+
+def day_bucket(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, moment.day)
+
+
+async def record_daily(db, user_id: str, inc: dict, moment: Optional[datetime] = None) -> None:
+    if not inc:
+        return
+    await db.user_daily_stats.update_one(
+        {"user_id": user_id, "day": day_bucket(moment or datetime.utcnow())},
+        {"$inc": inc},
+        upsert=True
+    )
+
+
+async def apply_article_change(db, user_id: str, before: Optional[dict], after: Optional[dict]) -> None:
+    await apply_article_changes(db, user_id, [(before, after)])
+
+
+async def apply_article_changes(db, user_id: str,
+                                changes: List[Tuple[Optional[dict], Optional[dict]]],
+                                daily_extra: Optional[dict] = None) -> None:
+    """Fold many ``(before, after)`` writes of one user into the rollups.
+
+    However many changes there are, this is one update per rollup
+    collection; ``daily_extra`` adds other counters (e.g. credits) to the
+    same day bucket write. A user without a rollup yet is left alone:
+    deltas only make sense on top of a full count, which ``read_user_stats``
+    builds from source on first read.
+    """
+    inc = defaultdict(int)
+    daily = defaultdict(int, daily_extra or {})
+    for before, after in changes:
+        for field, value in article_delta(before, after).items():
+            inc[field] += value
+        for field, value in daily_delta(before, after).items():
+            daily[field] += value
+    inc = {k: v for k, v in inc.items() if v}
+    writes = [record_daily(db, user_id, {k: v for k, v in daily.items() if v})]
+    if inc:
+        writes.append(db.user_stats.update_one(
+            {"user_id": user_id},
+            {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}}
+        ))
+    await asyncio.gather(*writes)
+
+
+async def record_credits(db, user_id: str, amount: int = 1) -> None:
+    await record_daily(db, user_id, {"credits_used": amount})
+
+
+def _period_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+async def read_timeseries(db, user_id: str, start: date, end: date, granularity: str = "day") -> List[dict]:
+    """Per-period totals between ``start`` and ``end`` (inclusive) from the day buckets.
+
+    Reads at most one document per day in range, whatever the article count;
+    periods without activity are returned with zero totals.
+    """
+    buckets = await db.user_daily_stats.find(
+        {
+            "user_id": user_id,
+            "day": {"$gte": day_bucket(start), "$lte": day_bucket(end)}
+        },
+        {"_id": 0, "user_id": 0}
+    ).to_list(length=(end - start).days + 1)
+
+    periods = {}
+    day = start
+    while day <= end:
+        periods.setdefault(_period_start(day, granularity), defaultdict(int))
+        day += timedelta(days=1)
+    for bucket in buckets:
+        totals = periods[_period_start(bucket.pop("day").date(), granularity)]
+        for field, value in bucket.items():
+            totals[field] += value
+
+    return [
+        {
+            "period_start": period,
+            "articles_created": totals["articles_created"],
+            "words": totals["words"],
+            "avg_seo_score": round(totals["seo_score_sum"] / totals["seo_samples"], 1) if totals["seo_samples"] else None,
+            "credits_used": totals["credits_used"],
+        }
+        for period, totals in sorted(periods.items())
+    ]
+
+
+async def compute_user_stats(db, user_id: str) -> dict:
+    """Rebuild a user's rollup from the articles collection"""
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$project": {"_id": 0, "status": 1, "word_count": 1, "seo_score": 1}},
+        {"$facet": {
+            "totals": [{"$group": {
+                "_id": None,
+                "total_articles": {"$sum": 1},
+                "total_words": {"$sum": {"$ifNull": ["$word_count", 0]}},
+                "seo_score_sum": {"$sum": {"$ifNull": ["$seo_score", 0]}}
+            }}],
+            "by_status": [{"$group": {"_id": {"$ifNull": ["$status", "draft"]}, "count": {"$sum": 1}}}]
+        }}
+    ]
+    result = (await db.articles.aggregate(pipeline).to_list(1))[0]
+    totals = result["totals"][0] if result["totals"] else {}
+    return {
+        "total_articles": totals.get("total_articles", 0),
+        "total_words": totals.get("total_words", 0),
+        "seo_score_sum": totals.get("seo_score_sum", 0),
+        "status_counts": {s["_id"]: s["count"] for s in result["by_status"]},
+    }
+
+
+def _drifted(current: Optional[dict], fresh: dict) -> bool:
+    if current is None:
+        return True
+    counts = {k: v for k, v in current.get("status_counts", {}).items() if v}
+    return counts != fresh["status_counts"] or any(
+        current.get(key, 0) != fresh[key] for key in ("total_articles", "total_words", "seo_score_sum")
+    )
+
+
+async def reconcile_user_stats(db, user_id: str) -> dict:
+    """Recompute a user's rollup from source and overwrite it if it drifted"""
+    fresh = await compute_user_stats(db, user_id)
+    current = await db.user_stats.find_one({"user_id": user_id})
+    if _drifted(current, fresh):
+        if current is not None:
+            logger.warning(f"user_stats drift repaired for {user_id}")
+        await db.user_stats.update_one(
+            {"user_id": user_id},
+            {"$set": {**fresh, "updated_at": datetime.utcnow(), "reconciled_at": datetime.utcnow()}},
+            upsert=True
+        )
+    return fresh
+
+
+async def read_user_stats(db, user_id: str) -> dict:
+    """The user's rollup, built from source the first time it is requested"""
+    doc = await db.user_stats.find_one({"user_id": user_id}, {"_id": 0})
+    if doc is None:
+        doc = await reconcile_user_stats(db, user_id)
+    return doc
+
+
+class StatsReconciler:
+    """Background job that periodically repairs rollup drift from source"""
+
+    def __init__(self, db, interval: float = 3600):
+        self.db = db
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def reconcile_all(self) -> int:
+        checked = 0
+        async for doc in self.db.user_stats.find({}, {"_id": 0, "user_id": 1}):
+            await reconcile_user_stats(self.db, doc["user_id"])
+            checked += 1
+        return checked
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                checked = await self.reconcile_all()
+                logger.info(f"Reconciled user_stats for {checked} users")
+            except Exception as e:
+                logger.error(f"user_stats reconciliation failed: {e}")
@@ -0,0 +1,230 @@
+import math
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Words fewer than this give features too noisy to score
+MIN_WORDS = 50
+# Tokens per type-token-ratio window, so the ratio does not shrink with length
+TTR_WINDOW = 100
+# Phrases this long that recur verbatim are flagged and count against originality
+PHRASE_WORDS = 5
+# Consecutive sentences whose lengths vary less than RHYTHM_CV are flagged
+RHYTHM_SENTENCES = 5
+RHYTHM_CV = 0.2
+MAX_SPANS = 50
+SPAN_TEXT_CHARS = 200
+
+PUNCTUATION = ".,;:!?-()\"'—–…“”‘’"
+SENTENCE_END = ".!?"
+
+# Per feature: value typical of human writing, value typical of model output,
+# weight in the risk score. Scores ramp linearly between the two values.
+FEATURES: Dict[str, Tuple[float, float, float]] = {
+    "burstiness": (0.65, 0.30, 0.40),
+    "trigram_repetition": (0.10, 0.25, 0.25),
+    "type_token_ratio": (0.75, 0.60, 0.20),
+    "punctuation_entropy": (0.55, 0.35, 0.15),
+}
+
+PATTERNS = {
+    "burstiness": (
+        "Uniform sentence lengths (variation {value:.2f})",
+        "Mix short, punchy sentences with longer ones",
+    ),
+    "trigram_repetition": (
+        "Recurring phrasing ({value:.0%} of three-word phrases repeat)",
+        "Rephrase repeated expressions and transitions",
+    ),
+    "type_token_ratio": (
+        "Narrow vocabulary (type-token ratio {value:.2f})",
+        "Use more specific, varied word choices",
+    ),
+    "punctuation_entropy": (
+        "Monotonous punctuation (entropy {value:.2f})",
+        "Vary punctuation: questions, dashes, parentheses, lists",
+    ),
+}
+
+_P = np.uint64(0x100000001B3)
+_P_INV = np.uint64(pow(0x100000001B3, -1, 2 ** 64))
+# Code points below this (through CJK punctuation) are classified by
+# str.isalnum; anything above is taken as part of a word
+_TABLE_SIZE = 0x3040
+_WORD_CHAR = np.array([chr(c).isalnum() for c in range(_TABLE_SIZE)] + [True])
+_LOWER = np.array(
+    [ord(chr(c).lower()) if len(chr(c).lower()) == 1 else c for c in range(_TABLE_SIZE)] + [_TABLE_SIZE],
+    dtype=np.uint64
+)
+_PUNCTUATION_CODES = np.array(sorted(ord(c) for c in PUNCTUATION), dtype=np.uint32)
+_SENTENCE_CODES = np.array([ord(c) for c in SENTENCE_END], dtype=np.uint32)
+_SPACE_CODES = np.array([ord(c) for c in " \t\r\n"], dtype=np.uint32)
+
+
+def _powers(base: np.uint64, n: int) -> np.ndarray:
+    powers = np.empty(n, dtype=np.uint64)
+    if n:
+        powers[0] = 1
+        powers[1:] = base
+        np.multiply.accumulate(powers, out=powers)
+    return powers
+
+
+def _word_hashes(cps: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Case-folded hash of every word, from one polynomial prefix sum (mod 2**64)"""
+    clipped = np.minimum(cps, _TABLE_SIZE)
+    folded = np.where(cps < _TABLE_SIZE, _LOWER[clipped], cps.astype(np.uint64)) + np.uint64(1)
+    prefix = np.zeros(len(cps) + 1, dtype=np.uint64)
+    np.cumsum(folded * _powers(_P, len(cps)), out=prefix[1:])
+    return (prefix[ends] - prefix[starts]) * _powers(_P_INV, len(cps) + 1)[starts]
+
+
+def _ngrams(hashes: np.ndarray, n: int) -> np.ndarray:
+    keys = hashes[:len(hashes) - n + 1].copy()
+    for i in range(1, n):
+        keys = keys * _P + hashes[i:len(hashes) - n + 1 + i]
+    return keys
+
+
+def _ramp(value: float, human: float, ai: float) -> float:
+    return float(np.clip((value - human) / (ai - human), 0.0, 1.0))
+
+
+def _merge(starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Union of overlapping ``[start, end)`` spans"""
+    if not len(starts):
+        return starts, ends
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+    reach = np.maximum.accumulate(ends)
+    new = np.ones(len(starts), dtype=bool)
+    new[1:] = starts[1:] > reach[:-1]
+    heads = np.flatnonzero(new)
+    return starts[heads], np.maximum.reduceat(ends, heads)
+
+
+def _sentences(cps: np.ndarray, word_starts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(char start, char end, word count) of each sentence holding words"""
+    following = np.append(cps[1:], ord(" "))
+    ends = np.flatnonzero(
+        (np.isin(cps, _SENTENCE_CODES) & np.isin(following, _SPACE_CODES))
+        | ((cps == ord("\n")) & (following == ord("\n")))
+    ) + 1
+    ends = np.append(ends, len(cps))
+    starts = np.concatenate(([0], ends[:-1]))
+    words = np.diff(np.concatenate(([0], np.searchsorted(word_starts, ends))))
+    keep = words > 0
+    return starts[keep], ends[keep], words[keep]
+
+
+def _features(cps: np.ndarray, hashes: np.ndarray, sentence_words: np.ndarray) -> Dict[str, float]:
+    m = len(hashes)
+    _, ids = np.unique(hashes, return_inverse=True)
+    if m >= TTR_WINDOW:
+        windows = np.sort(ids[:m // TTR_WINDOW * TTR_WINDOW].reshape(-1, TTR_WINDOW), axis=1)
+        ttr = float((1 + (np.diff(windows, axis=1) != 0).sum(axis=1)).mean() / TTR_WINDOW)
+    else:
+        ttr = len(np.unique(ids)) / m
+
+    _, trigram_ids, trigram_counts = np.unique(_ngrams(hashes, 3), return_inverse=True, return_counts=True)
+    repetition = float((trigram_counts[trigram_ids] > 1).mean()) if len(trigram_ids) else 0.0
+
+    lengths = sentence_words.astype(np.float64)
+    burstiness = float(lengths.std() / lengths.mean()) if len(lengths) > 1 else 0.0
+
+    marks = cps[np.isin(cps, _PUNCTUATION_CODES)]
+    if len(marks):
+        _, counts = np.unique(marks, return_counts=True)
+        probs = counts / counts.sum()
+        entropy = float((probs * np.log2(1 / probs)).sum() / math.log2(len(_PUNCTUATION_CODES)))
+    else:
+        entropy = 0.0
+
+    return {
+        "burstiness": round(burstiness, 3),
+        "trigram_repetition": round(repetition, 3),
+        "type_token_ratio": round(ttr, 3),
+        "punctuation_entropy": round(entropy, 3),
+    }
+
+
+def _repeated_phrases(hashes: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Spans of phrases repeating an earlier one verbatim, and the words they cover"""
+    keys = _ngrams(hashes, PHRASE_WORDS)
+    if not len(keys):
+        return starts[:0], ends[:0], 0
+    _, first, ids, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    repeats = np.flatnonzero((counts[ids] > 1) & (first[ids] != np.arange(len(keys))))
+    covered = np.zeros(len(hashes) + 1, dtype=np.int64)
+    np.add.at(covered, repeats, 1)
+    np.add.at(covered, repeats + PHRASE_WORDS, -1)
+    span_starts, span_ends = _merge(starts[repeats], ends[repeats + PHRASE_WORDS - 1])
+    return span_starts, span_ends, int((np.cumsum(covered[:-1]) > 0).sum())
+
+
+def _uniform_rhythm(starts: np.ndarray, ends: np.ndarray, words: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Spans of RHYTHM_SENTENCES or more sentences of near-equal length"""
+    if len(words) < RHYTHM_SENTENCES:
+        return starts[:0], ends[:0]
+    lengths = words.astype(np.float64)
+    total = np.concatenate(([0.0], np.cumsum(lengths)))
+    squares = np.concatenate(([0.0], np.cumsum(lengths ** 2)))
+    n = RHYTHM_SENTENCES
+    mean = (total[n:] - total[:-n]) / n
+    std = np.sqrt(np.maximum((squares[n:] - squares[:-n]) / n - mean ** 2, 0.0))
+    windows = np.flatnonzero(std < RHYTHM_CV * mean)
+    return _merge(starts[windows], ends[windows + n - 1])
+
+
+def score_text(content: str) -> dict:
+    """Local AI-detection estimate from stylometric features of the whole text.
+
+    Model output tends toward even sentence lengths (low burstiness),
+    recurring phrasing, a narrower vocabulary and monotonous punctuation;
+    each feature is ramped between human-typical and model-typical values
+    and weighted into ``ai_detection_risk`` (0-100). ``originality_score`` is
+    the share of words not inside a phrase repeated verbatim from earlier in
+    the text. ``flagged_spans`` are character offsets into ``content``.
+    """
+    cps = np.frombuffer(content.encode("utf-32-le"), dtype=np.uint32)
+    is_word = np.append(_WORD_CHAR[np.minimum(cps, _TABLE_SIZE)], False)
+    edges = np.flatnonzero(is_word != np.concatenate(([False], is_word[:-1])))
+    starts, ends = edges[::2], edges[1::2]
+
+    if len(starts) < MIN_WORDS:
+        return {
+            "ai_detection_risk": 0,
+            "originality_score": 100,
+            "flagged_patterns": [],
+            "suggestions": [f"Too little text to judge; at least {MIN_WORDS} words are needed"],
+            "flagged_spans": [],
+            "features": {"words": int(len(starts)), "sentences": 0},
+        }
+
+    hashes = _word_hashes(cps, starts, ends)
+    sentence_starts, sentence_ends, sentence_words = _sentences(cps, starts)
+    features = _features(cps, hashes, sentence_words)
+
+    scores = {name: _ramp(features[name], human, ai) for name, (human, ai, _) in FEATURES.items()}
+    risk = sum(scores[name] * weight for name, (_, _, weight) in FEATURES.items())
+    flagged = [name for name, score in scores.items() if score >= 0.5]
+
+    phrase_starts, phrase_ends, repeated_words = _repeated_phrases(hashes, starts, ends)
+    rhythm_starts, rhythm_ends = _uniform_rhythm(sentence_starts, sentence_ends, sentence_words)
+    spans: List[dict] = []
+    for reason, span_starts, span_ends in (
+        ("repeated_phrase", phrase_starts, phrase_ends),
+        ("uniform_rhythm", rhythm_starts, rhythm_ends),
+    ):
+        for start, end in zip(span_starts.tolist(), span_ends.tolist()):
+            spans.append({"start": start, "end": end, "reason": reason, "text": content[start:end][:SPAN_TEXT_CHARS]})
+    spans.sort(key=lambda span: span["start"])
+
+    return {
+        "ai_detection_risk": round(risk * 100),
+        "originality_score": round(100 * (1 - repeated_words / len(hashes))),
+        "flagged_patterns": [PATTERNS[name][0].format(value=features[name]) for name in flagged],
+        "suggestions": [PATTERNS[name][1] for name in flagged] or ["Content appears natural"],
+        "flagged_spans": spans[:MAX_SPANS],
+        "features": {"words": int(len(hashes)), "sentences": int(len(sentence_words)), **features},
+    }
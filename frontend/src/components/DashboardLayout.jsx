@@ -40,8 +40,8 @@ const DashboardLayout = ({ children }) => {
     { value: 'auto', label: 'System', icon: Monitor },
   ];
 
-  const handleLogout = () => {
-    logout();
+  const handleLogout = async () => {
+    await logout();
     navigate('/');
   };
 
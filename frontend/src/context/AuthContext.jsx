@@ -1,5 +1,6 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
 import axios from 'axios';
+import { clearSession, getAccessToken, installRefreshInterceptor, storeSession } from '../services/session';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -8,9 +9,19 @@ const AuthContext = createContext(null);
 
 export const AuthProvider = ({ children }) => {
   const [user, setUser] = useState(null);
-  const [token, setToken] = useState(localStorage.getItem('token'));
+  const [token, setToken] = useState(getAccessToken());
   const [loading, setLoading] = useState(true);
 
+  // Access tokens are short-lived: rotate the refresh token on a 401 and
+  // retry, and drop the session once it can no longer be refreshed
+  useEffect(() => installRefreshInterceptor({
+    onRefreshed: setToken,
+    onExpired: () => {
+      setToken(null);
+      setUser(null);
+    }
+  }), []);
+
   useEffect(() => {
     if (token) {
       fetchUser();
@@ -22,7 +33,7 @@ export const AuthProvider = ({ children }) => {
   const fetchUser = async () => {
     try {
       const response = await axios.get(`${API}/auth/me`, {
-        headers: { Authorization: `Bearer ${token}` }
+        headers: { Authorization: `Bearer ${getAccessToken()}` }
       });
       setUser(response.data);
     } catch (error) {
@@ -36,7 +47,7 @@ export const AuthProvider = ({ children }) => {
   const login = async (email, password) => {
     const response = await axios.post(`${API}/auth/login`, { email, password });
     const { access_token, user: userData } = response.data;
-    localStorage.setItem('token', access_token);
+    storeSession(response.data);
     setToken(access_token);
     setUser(userData);
     return userData;
@@ -45,21 +56,29 @@ export const AuthProvider = ({ children }) => {
   const register = async (name, email, password) => {
     const response = await axios.post(`${API}/auth/register`, { name, email, password });
     const { access_token, user: userData } = response.data;
-    localStorage.setItem('token', access_token);
+    storeSession(response.data);
     setToken(access_token);
     setUser(userData);
     return userData;
   };
 
-  const logout = () => {
-    localStorage.removeItem('token');
+  const logout = async () => {
+    // Revoke the session server-side; local state is cleared regardless
+    try {
+      await axios.post(`${API}/auth/logout`, null, {
+        headers: { Authorization: `Bearer ${getAccessToken()}` }
+      });
+    } catch (error) {
+      console.error('Failed to revoke session:', error);
+    }
+    clearSession();
     setToken(null);
     setUser(null);
   };
 
   const updateUser = async (data) => {
     const response = await axios.put(`${API}/auth/me`, data, {
-      headers: { Authorization: `Bearer ${token}` }
+      headers: { Authorization: `Bearer ${getAccessToken()}` }
     });
     setUser(response.data);
     return response.data;
@@ -0,0 +1,91 @@
+import axios from 'axios';
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const API = `${BACKEND_URL}/api`;
+
+const TOKEN_KEY = 'token';
+const REFRESH_TOKEN_KEY = 'refresh_token';
+
+// Auth calls whose 401 means bad credentials, not an expired access token
+const NO_REFRESH_PATHS = ['/auth/login', '/auth/register', '/auth/refresh', '/auth/logout'];
+
+export const getAccessToken = () => localStorage.getItem(TOKEN_KEY);
+
+export const storeSession = ({ access_token, refresh_token }) => {
+  localStorage.setItem(TOKEN_KEY, access_token);
+  if (refresh_token) {
+    localStorage.setItem(REFRESH_TOKEN_KEY, refresh_token);
+  }
+};
+
+export const clearSession = () => {
+  localStorage.removeItem(TOKEN_KEY);
+  localStorage.removeItem(REFRESH_TOKEN_KEY);
+};
+
+// One refresh at a time: refresh tokens are single-use, so concurrent 401s
+// must share the rotation instead of each spending the same token. Within a
+// tab they share one promise; across tabs a Web Lock serializes the calls,
+// and a tab that waited picks up the tokens the other tab stored.
+let refreshing = null;
+
+const REFRESH_LOCK = 'hydraseo-refresh';
+
+const rotate = (staleToken) => {
+  const refreshToken = localStorage.getItem(REFRESH_TOKEN_KEY);
+  if (!refreshToken) {
+    return Promise.reject(new Error('No refresh token'));
+  }
+  if (refreshToken !== staleToken) {
+    return Promise.resolve(getAccessToken());
+  }
+  return axios.post(`${API}/auth/refresh`, { refresh_token: refreshToken }).then((response) => {
+    storeSession(response.data);
+    return response.data.access_token;
+  });
+};
+
+const refreshSession = () => {
+  if (!refreshing) {
+    const staleToken = localStorage.getItem(REFRESH_TOKEN_KEY);
+    refreshing = (navigator.locks
+      ? navigator.locks.request(REFRESH_LOCK, () => rotate(staleToken))
+      : rotate(staleToken)
+    ).finally(() => {
+      refreshing = null;
+    });
+  }
+  return refreshing;
+};
+
+/**
+ * Retry requests that fail with 401 once, after rotating the refresh token.
+ * `onRefreshed` gets the new access token; `onExpired` runs when the session
+ * cannot be refreshed. Returns a function that removes the interceptor.
+ */
+export const installRefreshInterceptor = ({ onRefreshed, onExpired }) => {
+  const id = axios.interceptors.response.use(null, async (error) => {
+    const config = error.config;
+    const skip = !config || config._retried || NO_REFRESH_PATHS.some((path) => config.url?.endsWith(path));
+    if (error.response?.status !== 401 || skip) {
+      throw error;
+    }
+
+    let accessToken = getAccessToken();
+    try {
+      // Another tab may have refreshed since this request was sent
+      if (!accessToken || config.headers?.Authorization === `Bearer ${accessToken}`) {
+        accessToken = await refreshSession();
+      }
+    } catch (refreshError) {
+      clearSession();
+      onExpired?.();
+      throw error;
+    }
+    onRefreshed?.(accessToken);
+    config._retried = true;
+    config.headers.Authorization = `Bearer ${accessToken}`;
+    return axios(config);
+  });
+  return () => axios.interceptors.response.eject(id);
+};
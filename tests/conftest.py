@@ -0,0 +1,37 @@
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# Backend modules import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture(scope="session")
+def api():
+    """TestClient for the app on an in-memory database, started once per session"""
+    os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    os.environ.setdefault("BCRYPT_ROUNDS", "4")
+    from fastapi.testclient import TestClient
+    from mongomock_motor import AsyncMongoMockClient
+
+    import server
+
+    db = AsyncMongoMockClient()["hydraseo_test"]
+    server.db = db
+    server.job_queue.backend.collection = db.generation_jobs
+    server.stats_reconciler.db = db
+    with TestClient(server.app) as client:
+        yield client
+
+
+@pytest.fixture
+def auth_headers(api):
+    """Bearer header of a newly registered user"""
+    response = api.post("/api/auth/register", json={
+        "email": f"{uuid.uuid4().hex}@example.com", "name": "Test User", "password": "test-password"
+    })
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
@@ -0,0 +1,33 @@
+import pytest
+
+
+@pytest.fixture
+def listing(api, auth_headers, monkeypatch):
+    import server
+
+    # mongomock cannot evaluate the computed excerpt projection
+    monkeypatch.setitem(server.SUMMARY_PROJECTION, "excerpt", 1)
+    api.post("/api/articles?mode=stream", json={"title": "Projected"}, headers=auth_headers).raise_for_status()
+
+    def get(**params):
+        return api.get("/api/articles", params=params, headers=auth_headers)
+    return get
+
+
+def test_listing_leaves_heavy_fields_out_by_default(listing):
+    [article] = listing().json()
+    assert article["title"] == "Projected"
+    assert not {"content", "meta_description", "generation_timings"} & set(article)
+
+
+def test_requested_heavy_fields_are_included(listing):
+    [article] = listing(fields="content, generation_timings").json()
+    assert article["content"] == ""
+    assert article["generation_timings"] == {}
+    assert "meta_description" not in article
+
+
+def test_unknown_fields_are_rejected(listing):
+    response = listing(fields="content,password_hash")
+    assert response.status_code == 400
+    assert "password_hash" in response.json()["detail"]
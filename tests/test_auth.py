@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+
+@pytest.fixture
+def session(api):
+    response = api.post("/api/auth/register", json={
+        "email": f"{uuid.uuid4().hex}@example.com", "name": "Test User", "password": "test-password"
+    })
+    response.raise_for_status()
+    return response.json()
+
+
+def refresh(api, refresh_token):
+    return api.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def test_refresh_rotates_the_refresh_token(api, session):
+    response = refresh(api, session["refresh_token"])
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != session["refresh_token"]
+    assert refresh(api, rotated["refresh_token"]).status_code == 200
+
+
+def test_two_tabs_refreshing_at_once_both_stay_signed_in(api, session):
+    first = refresh(api, session["refresh_token"])
+    second = refresh(api, session["refresh_token"])
+    assert (first.status_code, second.status_code) == (200, 200)
+    for tokens in (first.json(), second.json()):
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        assert api.get("/api/auth/me", headers=headers).status_code == 200
+
+
+def test_reusing_a_token_after_the_grace_window_revokes_the_session(api, session):
+    import server
+
+    rotated = refresh(api, session["refresh_token"]).json()
+    api.portal.call(server.db.refresh_tokens.update_one,
+                    {"token_hash": server.hash_refresh_token(session["refresh_token"])},
+                    {"$set": {"used_at": datetime.utcnow() - timedelta(minutes=1)}})
+    assert refresh(api, session["refresh_token"]).status_code == 401
+    assert refresh(api, rotated["refresh_token"]).status_code == 401
+    headers = {"Authorization": f"Bearer {rotated['access_token']}"}
+    assert api.get("/api/auth/me", headers=headers).status_code == 401
+
+
+@pytest.fixture
+def auth(api):
+    import auth
+    return auth
+
+
+def test_token_cache_evicts_least_recent_and_expired_tokens(auth, monkeypatch):
+    cache = auth.TokenCache(max_entries=2)
+    now = 1_000_000.0
+    monkeypatch.setattr(auth.time, "time", lambda: now)
+    cache.set("a", {"sub": "a", "exp": now + 60})
+    cache.set("b", {"sub": "b", "exp": now + 1})
+    assert cache.get("a")["sub"] == "a"
+    cache.set("c", {"sub": "c", "exp": now + 60})
+    assert cache.get("b") is None
+    now += 61
+    assert cache.get("a") is None
+    assert cache.stats() == {"entries": 1, "max_entries": 2, "hits": 1, "misses": 2}
+
+
+def test_decode_token_verifies_once_and_hands_out_copies(auth, monkeypatch):
+    token = auth.create_access_token({"sub": "user"})
+    auth.decode_token(token)
+    # A cached token is not verified again
+    monkeypatch.setattr(auth.jwt, "decode", lambda *args, **kwargs: pytest.fail("verified twice"))
+    payload = auth.decode_token(token)
+    payload["sub"] = "someone-else"
+    assert auth.decode_token(token)["sub"] == "user"
+
+
+def test_expired_and_forged_tokens_are_rejected(auth):
+    expired = auth.create_access_token({"sub": "user"}, timedelta(seconds=-1))
+    forged = auth.jwt.encode({"sub": "user", "exp": datetime.utcnow() + timedelta(minutes=1)}, "wrong-key")
+    for token, detail in ((expired, "Token has expired"), (forged, "Invalid token")):
+        with pytest.raises(auth.HTTPException) as rejected:
+            auth.decode_token(token)
+        assert rejected.value.detail == detail
+
+
+def test_password_hashing_runs_off_the_event_loop(auth, monkeypatch):
+    threads = []
+    original = auth.pwd_context.hash
+
+    def hash_in_thread(password):
+        threads.append(threading.get_ident())
+        return original(password)
+
+    monkeypatch.setattr(auth.pwd_context, "hash", hash_in_thread)
+
+    async def scenario():
+        return threading.get_ident(), threads, await auth.hash_password_async("secret-password")
+
+    loop_thread, threads, hashed = asyncio.run(scenario())
+    assert threads and threads[0] != loop_thread
+    assert auth.verify_password("secret-password", hashed)
+
+
+def test_verify_upgrades_hashes_made_with_another_cost(auth):
+    old = auth.CryptContext(schemes=["bcrypt"], bcrypt__rounds=5).hash("secret-password")
+    current = auth.hash_password("secret-password")
+
+    async def scenario():
+        return (await auth.verify_password_async("secret-password", old),
+                await auth.verify_password_async("secret-password", current),
+                await auth.verify_password_async("wrong-password", current))
+
+    (old_ok, upgraded), (current_ok, unchanged), (wrong_ok, _) = asyncio.run(scenario())
+    assert old_ok and upgraded and auth.verify_password("secret-password", upgraded)
+    assert "$05$" not in upgraded
+    assert current_ok and unchanged is None
+    assert not wrong_ok
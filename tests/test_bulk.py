@@ -0,0 +1,70 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def sse_events(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+@pytest.fixture
+def bulk(api, auth_headers, monkeypatch):
+    import server
+
+    async def generate_article_fields(article_data, progress=None):
+        if article_data.title == "bad":
+            raise RuntimeError("model refused")
+        return {"content": "Body text", "excerpt": "Body text", "word_count": 2, "seo_score": 70, "status": "draft"}
+
+    monkeypatch.setattr(server, "generate_article_fields", generate_article_fields)
+    user_id = api.get("/api/auth/me", headers=auth_headers).json()["id"]
+
+    def run(titles):
+        response = api.post("/api/articles/bulk", json={"items": [{"title": t} for t in titles]}, headers=auth_headers)
+        assert response.status_code == 200
+        return sse_events(response.text)
+
+    def user():
+        return api.portal.call(server.db.users.find_one, {"id": user_id})
+
+    return server, run, user
+
+
+def test_bulk_run_reports_partial_results_and_charges_only_successes(api, auth_headers, bulk):
+    server, run, user = bulk
+    events = run(["good one", "bad", "good two"])
+
+    assert events[0][0] == "batch"
+    assert events[0][1]["total"] == 3
+    items = sorted((data for name, data in events if name == "item"), key=lambda item: item["index"])
+    assert [item["status"] for item in items] == ["succeeded", "failed", "succeeded"]
+    assert items[1]["error"] == "model refused"
+    assert events[-1] == ("done", {"batch_id": events[0][1]["batch_id"], "succeeded": 2, "failed": 1})
+
+    owner = user()
+    assert owner["credits_used"] == 2
+    assert owner["credit_holds"] == []
+    batch = api.get(f"/api/articles/bulk/{events[0][1]['batch_id']}", headers=auth_headers).json()
+    assert batch["counts"]["succeeded"] == 2 and batch["counts"]["failed"] == 1
+
+
+def test_items_of_a_dead_run_are_failed_and_refunded(api, auth_headers, bulk):
+    server, run, user = bulk
+    events = run(["good one"])
+    batch_id = events[0][1]["batch_id"]
+    article_id = events[1][1]["article_id"]
+    # Simulate a run that died with the item still pending and its credit held
+    api.portal.call(server.db.bulk_batches.update_one, {"id": batch_id}, {"$set": {
+        "items.0.status": "pending", "updated_at": datetime.utcnow() - timedelta(seconds=server.BULK_STALE_SECONDS + 1)
+    }})
+    api.portal.call(server.reserve_credit, server.db, user()["id"], article_id)
+
+    batch = api.get(f"/api/articles/bulk/{batch_id}", headers=auth_headers).json()
+    assert batch["counts"]["failed"] == 1
+    assert batch["items"][0]["error"] == "Interrupted before it finished"
+    assert user()["credit_holds"] == []
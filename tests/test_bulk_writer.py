@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from mongomock_motor import AsyncMongoMockClient
+
+from bulk_writer import GENERATING_IMAGE, BatchWriter
+from credits import reserve_credits
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def make_batch(count):
+    db = AsyncMongoMockClient()["test"]
+    items = [{"index": i, "article_id": f"a{i}", "title": f"Article {i}"} for i in range(count)]
+    await db.users.insert_one({"id": "user", "credits_used": 0, "credits_limit": 10, "credit_holds": []})
+    await reserve_credits(db, "user", [item["article_id"] for item in items])
+    await db.articles.insert_many([{"id": item["article_id"], "user_id": "user", **GENERATING_IMAGE} for item in items])
+    await db.bulk_batches.insert_one({
+        "id": "batch", "user_id": "user", "updated_at": datetime(2026, 1, 1),
+        "items": [{**item, "status": "pending", "error": None} for item in items]
+    })
+    return db, items
+
+
+def test_writes_are_buffered_until_max_pending():
+    async def scenario():
+        db, items = await make_batch(3)
+        writer = BatchWriter(db, "batch", "user", max_pending=2)
+        first = await writer.item_finished(items[0], {"status": "draft", "word_count": 10})
+        untouched = await db.articles.find_one({"id": "a0"})
+        second = await writer.item_finished(items[1], {"status": "draft"}, error="model refused")
+        return first, untouched, second, db
+
+    first, untouched, second, db = run(scenario())
+    assert first == []
+    assert untouched["status"] == "generating"
+    assert [(r["article_id"], r["status"]) for r in second] == [("a0", "succeeded"), ("a1", "failed")]
+
+    async def stored():
+        return (await db.articles.find_one({"id": "a0"}), await db.bulk_batches.find_one({"id": "batch"}),
+                await db.users.find_one({"id": "user"}))
+
+    article, batch, user = run(stored())
+    assert article["word_count"] == 10
+    assert [item["status"] for item in batch["items"]] == ["succeeded", "failed", "pending"]
+    assert user["credits_used"] == 1
+    assert [hold["id"] for hold in user["credit_holds"]] == ["a2"]
+
+
+def test_heartbeat_flush_renews_holds_of_unfinished_items():
+    async def scenario():
+        db, items = await make_batch(2)
+        soon = datetime.utcnow() + timedelta(seconds=5)
+        for hold_id in ("a0", "a1"):
+            await db.users.update_one(
+                {"id": "user", "credit_holds.id": hold_id}, {"$set": {"credit_holds.$.expires_at": soon}}
+            )
+        writer = BatchWriter(db, "batch", "user", heartbeat=0, hold_ids=["a0", "a1"])
+        await writer.item_finished(items[0], {"status": "draft"})
+        await writer.flush()
+        return soon, await db.users.find_one({"id": "user"}), await db.bulk_batches.find_one({"id": "batch"})
+
+    soon, user, batch = run(scenario())
+    assert [hold["id"] for hold in user["credit_holds"]] == ["a1"]
+    assert user["credit_holds"][0]["expires_at"] > soon
+    assert batch["updated_at"] > datetime(2026, 1, 1)
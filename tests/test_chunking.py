@@ -0,0 +1,75 @@
+from chunking import heading_lines, join_chunks, restore_structure, sample_evenly, split_markdown
+
+ARTICLE = """# Guide to SEO Tools
+
+Intro paragraph about seo tools.
+
+## Keyword Research
+
+Keyword research finds what people search for. It shapes the whole plan.
+
+```python
+# not a heading
+print("keep this block whole")
+```
+
+## Link Building
+
+Links still matter. Earn them with useful content."""
+
+
+def test_chunks_respect_size_and_rejoin_to_original():
+    chunks = split_markdown(ARTICLE, 120)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 120 for chunk in chunks if "```" not in chunk)
+    assert join_chunks(chunks) == ARTICLE
+
+
+def test_sections_start_new_chunks():
+    chunks = split_markdown(ARTICLE, 200)
+    assert [chunk.splitlines()[0] for chunk in chunks] == [
+        "# Guide to SEO Tools", "## Keyword Research", "## Link Building"
+    ]
+
+
+def test_code_fences_are_never_split():
+    fence = "```\n" + "\n".join(f"line {i}" for i in range(50)) + "\n```"
+    chunks = split_markdown(f"Before.\n\n{fence}\n\nAfter.", 40)
+    assert fence in chunks
+
+
+def test_oversized_paragraph_splits_between_sentences():
+    paragraph = " ".join(f"Sentence number {i} is here." for i in range(20))
+    chunks = split_markdown(paragraph, 100)
+    assert len(chunks) > 1
+    assert all(chunk.endswith(".") for chunk in chunks)
+    assert " ".join(chunks) == paragraph
+
+
+def test_short_content_is_one_chunk():
+    assert split_markdown("Just one line.", 4000) == ["Just one line."]
+
+
+def test_heading_lines_ignore_code_blocks():
+    assert heading_lines(ARTICLE) == ["# Guide to SEO Tools", "## Keyword Research", "## Link Building"]
+
+
+def test_restore_puts_back_reworded_leading_heading():
+    original = "## Keyword Research\n\nKeyword research finds demand."
+    rewritten = "## Researching Keywords\n\nKeyword research uncovers demand."
+    assert restore_structure(original, rewritten, []) == (
+        "## Keyword Research\n\nKeyword research uncovers demand."
+    )
+
+
+def test_restore_rejects_lost_headings_and_keywords():
+    original = "## One\n\nAbout seo tools.\n\n## Two\n\nMore."
+    assert restore_structure(original, "## One\n\nAbout seo tools.\n\nMore.", []) is None
+    assert restore_structure(original, "## One\n\nAbout software.\n\n## Two\n\nMore.", ["seo tools"]) is None
+    kept = "## One\n\nAll about seo tools.\n\n## Two\n\nMore."
+    assert restore_structure(original, kept, ["seo tools", "absent keyword"]) == kept
+
+
+def test_sample_evenly_keeps_ends():
+    assert sample_evenly(list(range(10)), 4) == [0, 3, 6, 9]
+    assert sample_evenly([1, 2], 5) == [1, 2]
@@ -0,0 +1,184 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from mongomock_motor import AsyncMongoMockClient
+
+from credits import (
+    commit_credit, ensure_credit_hold, release_credit, reserve_credit, reserve_credits, settle_credits
+)
+from jobs import JobQueue, MongoJobBackend
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def make_user(credits_used=0, credits_limit=5, holds=None):
+    db = AsyncMongoMockClient()["test"]
+    await db.users.insert_one({
+        "id": "user", "credits_used": credits_used, "credits_limit": credits_limit,
+        "credit_holds": holds or []
+    })
+    return db
+
+
+async def user_doc(db):
+    return await db.users.find_one({"id": "user"})
+
+
+def test_concurrent_reservations_grant_exactly_the_remaining_credits():
+    async def scenario():
+        db = await make_user(credits_used=2, credits_limit=7)
+        granted = await asyncio.gather(*(reserve_credit(db, "user", f"hold-{i}") for i in range(50)))
+        return granted, await user_doc(db)
+
+    granted, user = run(scenario())
+    assert sum(granted) == 5
+    assert len(user["credit_holds"]) == 5
+    assert user["credits_used"] == 2
+
+
+def test_batch_reservation_is_all_or_nothing():
+    async def scenario():
+        db = await make_user(credits_limit=3)
+        too_many = await reserve_credits(db, "user", ["a", "b", "c", "d"])
+        fits = await reserve_credits(db, "user", ["a", "b", "c"])
+        return too_many, fits, await user_doc(db)
+
+    too_many, fits, user = run(scenario())
+    assert (too_many, fits) == (False, True)
+    assert [hold["id"] for hold in user["credit_holds"]] == ["a", "b", "c"]
+
+
+def test_lapsed_holds_do_not_block_reservations():
+    lapsed = [{"id": f"old-{i}", "expires_at": datetime.utcnow() - timedelta(minutes=1)} for i in range(5)]
+
+    async def scenario():
+        db = await make_user(credits_limit=5, holds=lapsed)
+        return await reserve_credit(db, "user", "new"), await user_doc(db)
+
+    granted, user = run(scenario())
+    assert granted
+    assert [hold["id"] for hold in user["credit_holds"]] == ["new"]
+
+
+def test_commit_charges_a_hold_once():
+    async def scenario():
+        db = await make_user()
+        await reserve_credit(db, "user", "hold")
+        first = await commit_credit(db, "user", "hold", record=False)
+        second = await commit_credit(db, "user", "hold", record=False)
+        return first, second, await user_doc(db)
+
+    first, second, user = run(scenario())
+    assert (first, second) == (True, False)
+    assert user["credits_used"] == 1
+    assert user["credit_holds"] == []
+
+
+def test_commit_without_a_hold_never_charges():
+    async def scenario():
+        db = await make_user()
+        await reserve_credit(db, "user", "hold")
+        await release_credit(db, "user", "hold")
+        committed = await commit_credit(db, "user", "hold", record=False)
+        return committed, await user_doc(db)
+
+    committed, user = run(scenario())
+    assert not committed
+    assert user["credits_used"] == 0
+
+
+def test_release_refunds_and_frees_quota():
+    async def scenario():
+        db = await make_user(credits_limit=1)
+        await reserve_credit(db, "user", "a")
+        blocked = await reserve_credit(db, "user", "b")
+        released = await release_credit(db, "user", "a")
+        return blocked, released, await reserve_credit(db, "user", "b"), await user_doc(db)
+
+    blocked, released, granted, user = run(scenario())
+    assert (blocked, released, granted) == (False, True, True)
+    assert user["credits_used"] == 0
+
+
+def test_settle_charges_only_holds_still_present():
+    async def scenario():
+        db = await make_user()
+        await reserve_credits(db, "user", ["a", "b", "c"])
+        charged = await settle_credits(db, "user", ["a", "a", "missing"], ["b"])
+        return charged, await user_doc(db)
+
+    charged, user = run(scenario())
+    assert charged == 1
+    assert user["credits_used"] == 1
+    assert [hold["id"] for hold in user["credit_holds"]] == ["c"]
+
+
+def test_hold_renewed_for_queued_work_is_kept():
+    async def scenario():
+        db = await make_user(credits_limit=1)
+        await reserve_credit(db, "user", "job")
+        await db.users.update_one({"id": "user"}, {"$set": {"credit_holds.0.expires_at": datetime.utcnow()}})
+        kept = await ensure_credit_hold(db, "user", "job")
+        return kept, await user_doc(db)
+
+    kept, user = run(scenario())
+    assert kept
+    assert user["credit_holds"][0]["expires_at"] > datetime.utcnow() + timedelta(minutes=10)
+
+
+def test_hold_lapsed_while_queued_cannot_overspend():
+    async def scenario():
+        db = await make_user(credits_limit=1)
+        queue = JobQueue(MongoJobBackend(db.jobs, poll_interval=0.01), None, concurrency=1)
+        charged = []
+
+        async def handler(job, report):
+            # What run_generation_job does before generating
+            if not await ensure_credit_hold(db, job["user_id"], job["article_id"]):
+                raise RuntimeError("Credits exhausted while the article was queued")
+            charged.append(await commit_credit(db, job["user_id"], job["article_id"], record=False))
+
+        queue.handler = handler
+        await reserve_credit(db, "user", "queued-article")
+        job = await queue.submit("user", "queued-article", {})
+        # The hold lapses while the job waits, and a new request takes the quota
+        await db.users.update_one(
+            {"id": "user"}, {"$set": {"credit_holds.0.expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+        )
+        assert await reserve_credit(db, "user", "new-article")
+        await commit_credit(db, "user", "new-article", record=False)
+
+        await queue.start()
+        for _ in range(100):
+            stored = await queue.get(job["id"], "user")
+            if stored["status"] in ("completed", "failed"):
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return stored, charged, await user_doc(db)
+
+    stored, charged, user = run(scenario())
+    assert stored["status"] == "failed"
+    assert charged == []
+    assert user["credits_used"] == 1 == user["credits_limit"]
+
+
+def test_sync_generation_records_no_credit_when_the_hold_lapsed(api, auth_headers, monkeypatch):
+    import server
+
+    async def generate_article_fields(article_data, progress=None):
+        return {"content": "Body", "excerpt": "Body", "word_count": 1, "status": "draft"}
+
+    async def lapsed_commit(db, user_id, hold_id, record=True):
+        return False
+
+    monkeypatch.setattr(server, "generate_article_fields", generate_article_fields)
+    monkeypatch.setattr(server, "commit_credit", lapsed_commit)
+    user_id = api.get("/api/auth/me", headers=auth_headers).json()["id"]
+    response = api.post("/api/articles", json={"title": "Lapsed", "keywords": []}, headers=auth_headers)
+    assert response.status_code == 200
+
+    daily = run(server.db.user_daily_stats.find_one({"user_id": user_id}))
+    assert not (daily or {}).get("credits_used")
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from ai_service import ai_service
+from models import ContentTone
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def sleeper(seconds, value, running=None):
+    async def call():
+        if running is not None:
+            running.append(value)
+        await asyncio.sleep(seconds)
+        return value
+    return call
+
+
+def test_calls_overlap_and_timings_report_the_saving():
+    results, timings = run(ai_service.run_concurrently({
+        "body": sleeper(0.1, "text"), "meta": sleeper(0.1, {"meta_title": "t"})
+    }))
+    assert results == {"body": "text", "meta": {"meta_title": "t"}}
+    assert timings["total"] < timings["sequential"]
+    assert timings["sequential"] == pytest.approx(timings["body"] + timings["meta"], abs=0.2)
+
+
+def test_budget_of_one_runs_calls_one_after_another():
+    _, timings = run(ai_service.run_concurrently(
+        {"body": sleeper(0.05, 1), "meta": sleeper(0.05, 2)}, max_concurrency=1
+    ))
+    assert timings["total"] >= timings["sequential"]
+
+
+def test_failed_call_cancels_the_others():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    async def failing():
+        raise RuntimeError("provider down")
+
+    async def scenario():
+        with pytest.raises(RuntimeError, match="provider down"):
+            await ai_service.run_concurrently({"slow": slow, "failing": failing})
+        await asyncio.sleep(0)
+
+    run(scenario())
+    assert cancelled == ["slow"]
+
+
+def test_article_body_and_meta_tags_are_generated_side_by_side(monkeypatch):
+    running = []
+
+    async def send(chat, prompt):
+        running.append("body")
+        await asyncio.sleep(0.05)
+        assert "meta" in running
+        return "one two three"
+
+    async def generate_meta_tags(title, keywords):
+        running.append("meta")
+        await asyncio.sleep(0.05)
+        assert "body" in running
+        return {"meta_title": "Title", "meta_description": "Description"}
+
+    monkeypatch.setattr(ai_service, "_create_chat", lambda system_message: None)
+    monkeypatch.setattr(ai_service, "_send", send)
+    monkeypatch.setattr(ai_service, "generate_meta_tags", generate_meta_tags)
+    result = run(ai_service.generate_article("Title", ["seo"], ContentTone.PROFESSIONAL))
+    assert result["word_count"] == 3
+    assert result["meta_title"] == "Title"
+    assert set(result["timings"]) >= {"body", "meta", "sequential", "total"}
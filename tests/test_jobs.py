@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from mongomock_motor import AsyncMongoMockClient
+
+import jobs
+from jobs import JobQueue, MongoJobBackend
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_queue(handler=None, **hooks):
+    db = AsyncMongoMockClient()["test"]
+    return JobQueue(MongoJobBackend(db.jobs, poll_interval=0.01), handler, concurrency=1, **hooks)
+
+
+async def wait_settled(queue, job_id):
+    for _ in range(200):
+        job = await queue.get(job_id, "user")
+        if job["status"] in ("completed", "failed"):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not settle")
+
+
+def test_running_job_is_reclaimed_once_its_lease_lapses():
+    async def scenario():
+        queue = make_queue()
+        job = await queue.submit("user", "article", {})
+        first = await queue.backend.claim("worker-a", timeout=0)
+        held = await queue.backend.claim("worker-b", timeout=0)
+        await queue.collection.update_one(
+            {"id": job["id"]}, {"$set": {"lease_expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+        )
+        reclaimed = await queue.backend.claim("worker-b", timeout=0)
+        # The first worker lost the job, so its late result is ignored
+        await queue._finish(job["id"], "worker-a", {"status": "completed"})
+        return first, held, reclaimed, await queue.get(job["id"], "user")
+
+    first, held, reclaimed, stored = run(scenario())
+    assert first["worker_id"] == "worker-a"
+    assert held is None
+    assert reclaimed["worker_id"] == "worker-b"
+    assert reclaimed["attempts"] == 2
+    assert stored["status"] == "running"
+    assert stored["worker_id"] == "worker-b"
+
+
+def test_handler_error_fails_the_job():
+    async def handler(job, report):
+        await report(50, "generating")
+        raise RuntimeError("model unavailable")
+
+    async def scenario():
+        queue = make_queue(handler)
+        job = await queue.submit("user", "article", {})
+        await queue.start()
+        stored = await wait_settled(queue, job["id"])
+        await queue.stop()
+        return stored
+
+    stored = run(scenario())
+    assert stored["status"] == "failed"
+    assert stored["error"] == "model unavailable"
+    assert stored["progress"] == 50
+    assert stored["lease_expires_at"] is None
+
+
+def test_job_past_max_attempts_is_abandoned_without_running():
+    ran, abandoned = [], []
+
+    async def handler(job, report):
+        ran.append(job["id"])
+
+    async def on_abandon(job):
+        abandoned.append(job["article_id"])
+
+    async def scenario():
+        queue = make_queue(handler, on_abandon=on_abandon)
+        job = await queue.submit("user", "article", {})
+        # Every earlier worker died holding the job
+        await queue.collection.update_one({"id": job["id"]}, {"$set": {"attempts": jobs.MAX_JOB_ATTEMPTS}})
+        await queue.start()
+        stored = await wait_settled(queue, job["id"])
+        await queue.stop()
+        return stored
+
+    stored = run(scenario())
+    assert stored["status"] == "failed"
+    assert "abandoned" in stored["error"]
+    assert ran == []
+    assert abandoned == ["article"]
+
+
+def test_lease_heartbeat_extends_the_lease_and_calls_the_hook(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_LEASE_SECONDS", 0.06)
+    beats = []
+
+    async def handler(job, report):
+        await asyncio.sleep(0.1)
+
+    async def on_heartbeat(job):
+        beats.append(job["id"])
+
+    async def scenario():
+        queue = make_queue(handler, on_heartbeat=on_heartbeat)
+        job = await queue.submit("user", "article", {})
+        await queue.start()
+        stored = await wait_settled(queue, job["id"])
+        await queue.stop()
+        return job, stored
+
+    job, stored = run(scenario())
+    assert stored["status"] == "completed"
+    assert stored["attempts"] == 1
+    assert beats and set(beats) == {job["id"]}
@@ -0,0 +1,61 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+import llm_cache
+from llm_cache import LLMCache, cache_key
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_cache_key_separates_request_parts():
+    assert cache_key("model", "system", "prompt") == cache_key("model", "system", "prompt")
+    assert cache_key("model", "sys", "temprompt") != cache_key("model", "system", "prompt")
+    assert cache_key("other", "system", "prompt") != cache_key("model", "system", "prompt")
+
+
+def test_least_recently_used_entry_is_evicted():
+    async def scenario():
+        cache = LLMCache(max_entries=2)
+        await cache.set("keywords", "a", "A")
+        await cache.set("keywords", "b", "B")
+        await cache.get("keywords", "a")
+        await cache.set("keywords", "c", "C")
+        return [await cache.get("keywords", key) for key in ("a", "b", "c")], cache.stats()
+
+    values, stats = run(scenario())
+    assert values == ["A", None, "C"]
+    assert stats["entries"] == 2
+    assert (stats["hits"], stats["misses"]) == (3, 1)
+
+
+def test_entries_expire_after_their_method_ttl(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "monotonic", lambda: clock[0])
+
+    async def scenario():
+        cache = LLMCache(ttls={"rewrite": 60})
+        await cache.set("rewrite", "short", "text")
+        await cache.set("keywords", "long", "list")
+        clock[0] += 61
+        return await cache.get("rewrite", "short"), await cache.get("keywords", "long")
+
+    assert run(scenario()) == (None, "list")
+
+
+def test_shared_tier_serves_other_replicas():
+    async def scenario():
+        collection = AsyncMongoMockClient()["test"].llm_cache
+        writer, reader = LLMCache(), LLMCache()
+        writer.attach(collection)
+        reader.attach(collection)
+        await writer.set("keywords", "key", "shared")
+        first = await reader.get("keywords", "key")
+        second = await reader.get("keywords", "key")
+        return first, second, reader.stats()
+
+    first, second, stats = run(scenario())
+    assert first == second == "shared"
+    assert (stats["shared_hits"], stats["hits"]) == (1, 1)
@@ -0,0 +1,96 @@
+import asyncio
+from collections import Counter
+
+from llm_dispatcher import LLMDispatcher, llm_tier
+
+
+async def saturate(dispatcher, waiting: dict, grants: list):
+    """Fill every slot, queue ``waiting[tier]`` calls per tier, then release one at a time"""
+    gate = asyncio.Event()
+
+    async def blocker():
+        async with dispatcher.slot("free"):
+            await gate.wait()
+
+    async def call(tier):
+        async with dispatcher.slot(tier):
+            grants.append(tier)
+
+    blockers = [asyncio.create_task(blocker()) for _ in range(dispatcher.max_concurrency)]
+    await asyncio.sleep(0)
+    calls = [asyncio.create_task(call(tier)) for tier, count in waiting.items() for _ in range(count)]
+    await asyncio.sleep(0)
+    gate.set()
+    await asyncio.gather(*blockers, *calls)
+
+
+def test_waiting_tiers_share_slots_by_weight():
+    dispatcher = LLMDispatcher(max_concurrency=1, weights={"free": 1, "pro": 4})
+    grants = []
+    asyncio.run(saturate(dispatcher, {"free": 20, "pro": 80}, grants))
+    # While both tiers are waiting, pro gets four grants per free grant
+    assert Counter(grants[:50]) == {"pro": 40, "free": 10}
+    assert Counter(grants) == {"pro": 80, "free": 20}
+
+
+def test_low_weight_tier_is_not_starved():
+    dispatcher = LLMDispatcher(max_concurrency=1, weights={"free": 1, "unlimited": 16})
+    grants = []
+    asyncio.run(saturate(dispatcher, {"free": 2, "unlimited": 100}, grants))
+    assert grants.index("free") <= 17
+
+
+def test_concurrency_is_capped():
+    dispatcher = LLMDispatcher(max_concurrency=3)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with dispatcher.slot("pro"):
+            peak = max(peak, dispatcher.in_flight)
+            await asyncio.sleep(0.001)
+
+    async def scenario():
+        await asyncio.gather(*(call() for _ in range(20)))
+
+    asyncio.run(scenario())
+    assert peak == 3
+    assert dispatcher.in_flight == 0
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    dispatcher = LLMDispatcher(max_concurrency=1)
+
+    async def scenario():
+        gate = asyncio.Event()
+
+        async def holder():
+            async with dispatcher.slot("free"):
+                await gate.wait()
+
+        held = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(dispatcher.run(lambda: asyncio.sleep(0), "pro"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        gate.set()
+        await held
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert await dispatcher.run(lambda: asyncio.sleep(0, result="ran"), "free") == "ran"
+
+    asyncio.run(scenario())
+    assert dispatcher.in_flight == 0
+
+
+def test_tier_comes_from_context_and_unknown_tiers_fall_back():
+    dispatcher = LLMDispatcher(max_concurrency=1)
+
+    async def scenario():
+        llm_tier.set("pro")
+        await dispatcher.run(lambda: asyncio.sleep(0))
+        await dispatcher.run(lambda: asyncio.sleep(0), tier="enterprise")
+
+    asyncio.run(scenario())
+    stats = dispatcher.stats()["tiers"]
+    assert stats["pro"]["dispatched"] == 1
+    assert stats["free"]["dispatched"] == 1
@@ -0,0 +1,67 @@
+import pytest
+
+from llm_json import ResponseParseError, extract_json, parse_model
+from models import CompetitorsOutput, KeywordsOutput, MetaTagsOutput
+
+
+def test_extracts_json_from_fenced_response():
+    text = 'Here you go:\n```json\n{"meta_title": "T", "meta_description": "D"}\n```\nThanks!'
+    assert extract_json(text) == {"meta_title": "T", "meta_description": "D"}
+
+
+def test_skips_brackets_in_prose():
+    text = 'See [the note] and {this}. {"keywords": ["a", "b"]} trailing } text'
+    assert extract_json(text) == {"keywords": ["a", "b"]}
+
+
+def test_brackets_inside_strings_do_not_end_the_value():
+    text = '{"title": "a } tricky ] \\"quoted\\" {title", "n": [1, {"x": "]"}]} and more'
+    assert extract_json(text) == {"title": 'a } tricky ] "quoted" {title', "n": [1, {"x": "]"}]}
+
+
+def test_cut_off_response_is_truncated():
+    with pytest.raises(ResponseParseError) as error:
+        extract_json('{"keywords": [{"keyword": "a"}, {"keyword": "b')
+    assert error.value.reason == "truncated"
+
+
+def test_no_json_and_invalid_json_are_told_apart():
+    with pytest.raises(ResponseParseError) as error:
+        extract_json("No structured data here.")
+    assert error.value.reason == "no_json"
+    with pytest.raises(ResponseParseError) as error:
+        extract_json("{'single': 'quotes'}")
+    assert error.value.reason == "invalid_json"
+
+
+def test_parse_model_takes_first_value_matching_schema():
+    text = '[1] {"unrelated": true} {"meta_title": "T", "meta_description": "D"}'
+    assert parse_model(text, MetaTagsOutput) == MetaTagsOutput(meta_title="T", meta_description="D")
+
+
+def test_parse_model_wraps_bare_array_for_single_list_schema():
+    output = parse_model('[{"keyword": "seo tools"}]', KeywordsOutput)
+    assert [k.keyword for k in output.keywords] == ["seo tools"]
+
+
+def test_schema_mismatch_reports_location():
+    with pytest.raises(ResponseParseError) as error:
+        parse_model('{"meta_title": "T"}', MetaTagsOutput)
+    assert error.value.reason == "schema"
+    assert "meta_description" in str(error.value)
+
+
+def test_partial_list_items_are_dropped_not_fatal():
+    text = '''{"results": [
+        {"rank": 1, "title": "A", "url": "https://a", "description": "d"},
+        {"rank": 2, "title": "B"}
+    ], "content_gaps": ["gap"]}'''
+    output = parse_model(text, CompetitorsOutput)
+    assert [r.title for r in output.results] == ["A"]
+    assert output.content_gaps == ["gap"]
+
+
+def test_list_without_any_valid_item_is_a_schema_failure():
+    with pytest.raises(ResponseParseError) as error:
+        parse_model('{"keywords": [{"volume": 10}]}', KeywordsOutput)
+    assert error.value.reason == "schema"
@@ -0,0 +1,51 @@
+import asyncio
+
+import httpx
+import pytest
+
+from llm_pool import LLMClientPool
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_client_is_reused_until_closed():
+    async def scenario():
+        pool = LLMClientPool(max_connections=5)
+        first = pool.client
+        same = pool.client
+        await pool.aclose()
+        return first, same, pool.client, pool
+
+    first, same, reopened, pool = run(scenario())
+    assert first is same
+    assert reopened is not first
+    assert pool.stats()["max_connections"] == 5
+
+
+def test_warmup_records_latency_and_tolerates_failures():
+    def handler(request):
+        if request.url.host == "down.invalid":
+            raise httpx.ConnectError("unreachable", request=request)
+        return httpx.Response(405)
+
+    async def scenario(url):
+        pool = LLMClientPool()
+        pool._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await pool.warmup(url)
+        await pool.aclose()
+        return pool.warmup_ms
+
+    assert run(scenario("https://llm.example.com/v1")) is not None
+    assert run(scenario("https://down.invalid/v1")) is None
+
+
+def test_install_hands_the_pooled_client_to_litellm():
+    litellm = pytest.importorskip("litellm")
+    pool = LLMClientPool()
+    pool.install()
+    assert litellm.aclient_session is pool.client
+    assert pool.stats()["installed"]
+    run(pool.aclose())
+    assert not pool.installed
@@ -0,0 +1,63 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from pagination import KEYSET_SORT, decode_cursor, encode_cursor, keyset_filter
+
+
+def test_cursor_round_trip():
+    doc = {"created_at": datetime(2026, 3, 1, 12, 30, 5, 123000), "id": "article-7"}
+    assert decode_cursor(encode_cursor(doc)) == (doc["created_at"], "article-7")
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor({"created_at": datetime(2026, 3, 1), "id": "a?b/c+d"})
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "e30", "eyJjIjoieCIsImkiOiJ5In0"])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        keyset_filter(cursor)
+
+
+def test_pages_cover_every_document_once_despite_timestamp_ties():
+    start = datetime(2026, 1, 1)
+    # Five articles share each timestamp, so pages must break ties on id
+    docs = [{"id": f"a{i:02d}", "created_at": start + timedelta(seconds=i // 5)} for i in range(23)]
+
+    async def scenario():
+        collection = AsyncMongoMockClient()["test"].articles
+        await collection.insert_many([dict(doc) for doc in docs])
+        seen, query = [], {}
+        while True:
+            page = await collection.find(query).sort(KEYSET_SORT).limit(4).to_list(length=4)
+            if not page:
+                return seen
+            seen.extend(doc["id"] for doc in page)
+            query = keyset_filter(encode_cursor(page[-1]))
+
+    expected = [d["id"] for d in sorted(docs, key=lambda d: (d["created_at"], d["id"]), reverse=True)]
+    assert asyncio.run(scenario()) == expected
+
+
+@pytest.mark.parametrize("limit", [0, -1, 101])
+def test_listing_rejects_out_of_range_limits(api, auth_headers, limit):
+    response = api.get("/api/articles", params={"cursor": "", "limit": limit}, headers=auth_headers)
+    assert response.status_code == 422
+
+
+def test_listing_pages_with_smallest_limit(api, auth_headers, monkeypatch):
+    import server
+
+    # mongomock cannot evaluate the computed excerpt projection
+    monkeypatch.setitem(server.SUMMARY_PROJECTION, "excerpt", 1)
+    for title in ("first", "second"):
+        api.post("/api/articles?mode=stream", json={"title": title}, headers=auth_headers).raise_for_status()
+    first = api.get("/api/articles", params={"cursor": "", "limit": 1}, headers=auth_headers).json()
+    second = api.get("/api/articles", params={"cursor": first["next_cursor"], "limit": 1}, headers=auth_headers).json()
+    assert (len(first["items"]), first["has_more"]) == (1, True)
+    assert (len(second["items"]), second["has_more"]) == (1, False)
+    assert {first["items"][0]["title"], second["items"][0]["title"]} == {"first", "second"}
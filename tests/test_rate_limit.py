@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Response
+
+from rate_limit import InMemoryRateLimitStore, RateLimiter
+
+LIMITS = {"free": {"per_minute": 60, "burst": 2, "max_in_flight": 1}}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_limiter():
+    return RateLimiter(InMemoryRateLimitStore(), LIMITS)
+
+
+async def enter(limiter, slot_id):
+    await limiter.enter("user", "free", slot_id, Response())
+
+
+def test_burst_is_admitted_then_rejected_with_retry_after():
+    async def scenario():
+        limiter = make_limiter()
+        for slot in ("a", "b"):
+            await enter(limiter, slot)
+            await limiter.leave("user", slot)
+        with pytest.raises(HTTPException) as rejected:
+            await enter(limiter, "c")
+        return limiter, rejected.value
+
+    limiter, rejected = run(scenario())
+    assert rejected.status_code == 429
+    assert rejected.headers["X-RateLimit-Remaining"] == "0"
+    assert int(rejected.headers["Retry-After"]) >= 1
+    assert limiter.stats()["rejected"] == {"rate": 1}
+
+
+def test_concurrency_rejection_does_not_spend_a_token():
+    async def scenario():
+        limiter = make_limiter()
+        await enter(limiter, "running")
+        for slot in ("busy-1", "busy-2", "busy-3"):
+            with pytest.raises(HTTPException):
+                await enter(limiter, slot)
+        await limiter.leave("user", "running")
+        # One token of the burst of two is left for the next request
+        await enter(limiter, "next")
+        return limiter
+
+    limiter = run(scenario())
+    assert limiter.stats()["rejected"] == {"concurrency": 3}
+    assert limiter.allowed == 2
+
+
+def test_rate_rejection_frees_the_in_flight_slot():
+    async def scenario():
+        limiter = make_limiter()
+        await enter(limiter, "a")
+        await limiter.leave("user", "a")
+        await enter(limiter, "b")
+        await limiter.leave("user", "b")
+        with pytest.raises(HTTPException):
+            await enter(limiter, "c")
+        return limiter.store
+
+    store = run(scenario())
+    assert "user" not in store._in_flight
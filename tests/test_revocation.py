@@ -0,0 +1,59 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from mongomock_motor import AsyncMongoMockClient
+
+from revocation import BloomFilter, RevocationList
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000)
+    keys = [f"session-{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+
+
+def test_bloom_filter_false_positive_rate_stays_near_target():
+    bloom = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"revoked-{i}")
+    false_positives = sum(f"live-{i}" in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+def test_revocation_is_confirmed_and_false_positives_are_rejected():
+    async def scenario():
+        revocations = RevocationList(capacity=100)
+        revocations.attach(AsyncMongoMockClient()["test"].revocations)
+        await revocations.revoke("revoked", datetime.utcnow() + timedelta(minutes=5))
+        # In the filter but not the collection, as after a filter collision
+        revocations.filter.add("collision")
+        return (await revocations.is_revoked("revoked"), await revocations.is_revoked("collision"),
+                await revocations.is_revoked("live"), revocations.stats())
+
+    revoked, collision, live, stats = run(scenario())
+    assert (revoked, collision, live) == (True, False, False)
+    assert (stats["checks"], stats["confirmed"], stats["false_positives"]) == (3, 1, 1)
+
+
+def test_sync_keeps_live_revocations_and_drops_expired_ones():
+    async def scenario():
+        collection = AsyncMongoMockClient()["test"].revocations
+        revocations = RevocationList(capacity=100)
+        revocations.attach(collection)
+        await revocations.revoke("live", datetime.utcnow() + timedelta(minutes=5))
+        await revocations.revoke("expired", datetime.utcnow() - timedelta(seconds=1))
+        # Revoked by another worker since the last sync
+        await collection.insert_one({"key": "remote", "expires_at": datetime.utcnow() + timedelta(minutes=5)})
+        await revocations.sync()
+        return revocations
+
+    revocations = run(scenario())
+    assert "live" in revocations.filter
+    assert "remote" in revocations.filter
+    assert revocations.filter.count == 2
@@ -0,0 +1,39 @@
+from search import highlight_snippet, make_excerpt, query_terms, stem, text_search_filter
+
+
+def test_query_terms_drop_stopwords_unless_nothing_is_left():
+    assert query_terms("How to brew the Coffee") == ["brew", "coffee"]
+    assert query_terms("the and") == ["the", "and"]
+
+
+def test_stem_keeps_short_roots():
+    assert stem("brewing") == "brew"
+    assert stem("bus") == "bus"
+
+
+def test_excerpt_strips_markdown_and_cuts_on_a_word():
+    content = "# Title\n\n**Bold** intro with a [link](/x). " + "word " * 100
+    excerpt = make_excerpt(content, length=40)
+    assert excerpt.startswith("Title Bold intro with a link.")
+    assert excerpt.endswith("…")
+    assert len(excerpt) <= 41
+    assert make_excerpt("Short") == "Short"
+
+
+def test_snippet_centres_on_the_first_match_and_marks_stemmed_terms():
+    content = "filler " * 60 + "Brewing coffee is fun. We brewed more later."
+    snippet = highlight_snippet(content, "brew", width=80)
+    assert snippet.startswith("…")
+    assert "<mark>Brewing</mark>" in snippet
+    assert "<mark>brewed</mark>" in snippet
+
+
+def test_snippet_escapes_html_in_content():
+    snippet = highlight_snippet("<script>alert(1)</script> coffee", "coffee")
+    assert "<script>" not in snippet
+    assert "&lt;script&gt;" in snippet
+    assert "<mark>coffee</mark>" in snippet
+
+
+def test_text_search_filter_uses_the_text_index():
+    assert text_search_filter("coffee") == {"$text": {"$search": "coffee"}}
@@ -0,0 +1,58 @@
+from seo_analyzer import analyze_content, count_phrase, heading_structure, strip_markdown
+
+SENTENCE = "A good cup rewards patience, fresh beans and a steady hand at home."
+
+
+def article(keyword_mentions: int = 6, paragraphs: int = 8) -> str:
+    body = "\n\n".join(" ".join([SENTENCE] * 4) for _ in range(paragraphs))
+    mentions = " ".join(["Good coffee brewing starts with fresh beans."] * keyword_mentions)
+    return f"""# Coffee Brewing Guide
+
+Coffee brewing at home is simple. {mentions}
+
+## Coffee Brewing Basics
+
+{body}
+
+- Grind fresh
+- Weigh the water
+
+Read [our grinder review](/grinders) too."""
+
+
+def test_well_structured_article_scores_full_marks():
+    result = analyze_content(article(), "coffee brewing")
+    assert result["issues"] == []
+    assert result["score"] == 100
+    assert 0.5 <= result["keyword_density"] <= 2.5
+    assert result["heading_structure"] == {"h1": 1, "h2": 1}
+
+
+def test_missing_keyword_and_structure_are_flagged():
+    result = analyze_content("Just one short line about tea.", "coffee brewing")
+    messages = " ".join(issue["message"] for issue in result["issues"])
+    assert "Target keyword not found" in messages
+    assert "No H2 headings" in messages
+    assert "Content is short" in messages
+    assert result["keyword_count"] == 0
+    assert result["score"] < 50
+
+
+def test_keyword_stuffing_is_flagged():
+    result = analyze_content(article(keyword_mentions=60), "coffee brewing")
+    assert any("too high" in issue["message"] for issue in result["issues"])
+
+
+def test_scoring_is_deterministic():
+    assert analyze_content(article(), "coffee brewing") == analyze_content(article(), "coffee brewing")
+
+
+def test_phrases_match_whole_words_across_punctuation():
+    assert count_phrase("Coffee-brewing, coffee brewing; coffeebrewing", "coffee brewing") == 2
+    assert count_phrase("anything", "") == 0
+
+
+def test_headings_inside_code_blocks_are_ignored():
+    content = "# Title\n\n```\n# comment\n```\n\n## Section"
+    assert heading_structure(content) == [{"level": 1, "text": "Title"}, {"level": 2, "text": "Section"}]
+    assert "comment" not in strip_markdown(content)
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_concurrent_callers_share_one_execution():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def scenario():
+        flights = SingleFlight()
+        results = await asyncio.gather(*(flights.do("key", fetch, "keywords") for _ in range(5)))
+        # Settled flights are forgotten, so a later call runs again
+        results.append(await flights.do("key", fetch, "keywords"))
+        return results, flights.stats()
+
+    results, stats = run(scenario())
+    assert results == ["result"] * 6
+    assert len(calls) == 2
+    assert (stats["executed"], stats["coalesced"], stats["in_flight"]) == (2, 4, 0)
+
+
+def test_errors_reach_every_waiter():
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("provider down")
+
+    async def scenario():
+        flights = SingleFlight()
+        return await asyncio.gather(*(flights.do("key", failing) for _ in range(3)), return_exceptions=True)
+
+    results = run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_one_cancelled_caller_does_not_cancel_the_others():
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def scenario():
+        flights = SingleFlight()
+        leaving = asyncio.create_task(flights.do("key", slow))
+        staying = asyncio.create_task(flights.do("key", slow))
+        await asyncio.sleep(0.01)
+        leaving.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+        return await staying
+
+    assert run(scenario()) == "done"
+
+
+def test_work_is_cancelled_once_every_caller_leaves():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def scenario():
+        flights = SingleFlight()
+        caller = asyncio.create_task(flights.do("key", slow, "rewrite"))
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        await asyncio.sleep(0)
+        return flights.stats()
+
+    stats = run(scenario())
+    assert cancelled == [True]
+    assert stats["in_flight"] == 0
+    assert stats["by_method"]["rewrite"]["abandoned"] == 1
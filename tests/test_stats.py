@@ -0,0 +1,114 @@
+import asyncio
+from datetime import date, datetime
+
+from mongomock_motor import AsyncMongoMockClient
+
+from stats import (
+    StatsReconciler, apply_article_change, apply_article_changes, article_delta, compute_user_stats,
+    daily_delta, read_timeseries, read_user_stats, record_daily
+)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def article(status="draft", word_count=0, seo_score=0, **fields):
+    return {"user_id": "user", "status": status, "word_count": word_count, "seo_score": seo_score, **fields}
+
+
+def test_insert_delete_and_update_deltas():
+    created = article("generating")
+    finished = article("draft", word_count=900, seo_score=80)
+    assert article_delta(None, created) == {"total_articles": 1, "status_counts.generating": 1}
+    assert article_delta(created, finished) == {
+        "status_counts.generating": -1, "status_counts.draft": 1, "total_words": 900, "seo_score_sum": 80
+    }
+    assert article_delta(finished, None) == {
+        "total_articles": -1, "status_counts.draft": -1, "total_words": -900, "seo_score_sum": -80
+    }
+    assert article_delta(finished, dict(finished)) == {}
+
+
+def test_missing_fields_count_as_draft_with_zero_totals():
+    assert article_delta(None, {"user_id": "user"}) == {"total_articles": 1, "status_counts.draft": 1}
+
+
+def test_applied_deltas_match_a_rebuild_from_source():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await read_user_stats(db, "user")
+        docs = [article("generating", id=str(i)) for i in range(4)]
+        await db.articles.insert_many([dict(doc) for doc in docs])
+        await apply_article_changes(db, "user", [(None, doc) for doc in docs])
+        for i, before in enumerate(docs[:3]):
+            after = {**before, "status": "published" if i else "draft", "word_count": 100 * (i + 1), "seo_score": 70}
+            await db.articles.replace_one({"id": before["id"]}, after)
+            await apply_article_change(db, "user", before, after)
+        await db.articles.delete_one({"id": "3"})
+        await apply_article_change(db, "user", docs[3], None)
+        return await read_user_stats(db, "user"), await compute_user_stats(db, "user")
+
+    rollup, fresh = run(scenario())
+    assert fresh == {
+        "total_articles": 3, "total_words": 600, "seo_score_sum": 210,
+        "status_counts": {"draft": 1, "published": 2}
+    }
+    assert {k: v for k, v in rollup["status_counts"].items() if v} == fresh["status_counts"]
+    for key in ("total_articles", "total_words", "seo_score_sum"):
+        assert rollup[key] == fresh[key]
+
+
+def test_deltas_skip_users_without_a_rollup():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await apply_article_change(db, "user", None, article())
+        return await db.user_stats.find_one({"user_id": "user"})
+
+    assert run(scenario()) is None
+
+
+def test_reconciler_repairs_drift():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        await db.articles.insert_many([article(word_count=100), article(word_count=50)])
+        await read_user_stats(db, "user")
+        # A write that skipped the rollup
+        await db.user_stats.update_one({"user_id": "user"}, {"$inc": {"total_articles": 5, "total_words": 7}})
+        checked = await StatsReconciler(db).reconcile_all()
+        return checked, await db.user_stats.find_one({"user_id": "user"})
+
+    checked, rollup = run(scenario())
+    assert checked == 1
+    assert (rollup["total_articles"], rollup["total_words"]) == (2, 150)
+    assert "reconciled_at" in rollup
+
+
+def test_daily_delta_counts_production_not_holdings():
+    draft = article(word_count=500, seo_score=60)
+    assert daily_delta(None, article()) == {"articles_created": 1}
+    assert daily_delta(article(), draft) == {"words": 500, "seo_score_sum": 60, "seo_samples": 1}
+    assert daily_delta(draft, {**draft, "word_count": 300}) == {}
+    assert daily_delta(draft, None) == {}
+
+
+def test_timeseries_fills_empty_days_and_rolls_up_weeks():
+    async def scenario():
+        db = AsyncMongoMockClient()["test"]
+        # Monday 2026-03-02 and Wednesday 2026-03-04
+        await record_daily(db, "user", {"articles_created": 2, "words": 800, "seo_score_sum": 150, "seo_samples": 2},
+                           datetime(2026, 3, 2, 9))
+        await record_daily(db, "user", {"articles_created": 1, "credits_used": 1}, datetime(2026, 3, 4, 18))
+        await record_daily(db, "other", {"articles_created": 9}, datetime(2026, 3, 2))
+        days = await read_timeseries(db, "user", date(2026, 3, 1), date(2026, 3, 4))
+        weeks = await read_timeseries(db, "user", date(2026, 3, 1), date(2026, 3, 8), granularity="week")
+        return days, weeks
+
+    days, weeks = run(scenario())
+    assert [d["period_start"] for d in days] == [date(2026, 3, d) for d in range(1, 5)]
+    assert [d["articles_created"] for d in days] == [0, 2, 0, 1]
+    assert days[1]["avg_seo_score"] == 75.0
+    assert days[0]["avg_seo_score"] is None
+    assert [w["period_start"] for w in weeks] == [date(2026, 2, 23), date(2026, 3, 2)]
+    assert weeks[1]["articles_created"] == 3
+    assert weeks[1]["credits_used"] == 1
@@ -0,0 +1,93 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def insert_article(server, **fields):
+    article = {
+        "id": "article", "user_id": "user", "title": "Streams", "content": "",
+        "status": "generating", "word_count": 0, "seo_score": 0, **fields
+    }
+    await server.db.articles.insert_one(article)
+    return article
+
+
+async def collect(stream):
+    return [event async for event in stream]
+
+
+@pytest.fixture
+def server(api):
+    import server
+    run(server.db.articles.delete_many({}))
+    run(server.db.users.delete_many({"id": "user"}))
+    return server
+
+
+def test_follower_reports_failed_generation_instead_of_diffing_content(server):
+    async def scenario():
+        await insert_article(server, content="Generation failed: boom", status="draft", generation_error="boom")
+        return await collect(server.follow_article("article"))
+
+    events = run(scenario())
+    assert len(events) == 1
+    assert events[0].startswith("event: error")
+    assert "boom" in events[0]
+
+
+def test_follower_gives_up_when_the_article_stops_changing(server, monkeypatch):
+    monkeypatch.setattr(server, "STREAM_FOLLOW_IDLE_SECONDS", 0)
+    monkeypatch.setattr(server, "STREAM_FLUSH_SECONDS", 0)
+
+    async def scenario():
+        await insert_article(server, content="partial")
+        return await collect(server.follow_article("article"))
+
+    events = run(scenario())
+    assert events[0].startswith("event: chunk")
+    assert events[-1].startswith("event: error")
+    assert "stalled" in events[-1]
+
+
+def test_cancelled_stream_fails_the_article_and_releases_its_hold(server, monkeypatch):
+    async def stream_article(**kwargs):
+        yield "first words"
+        await asyncio.Event().wait()
+
+    async def generate_meta_tags(title, keywords):
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(server.ai_service, "stream_article", stream_article)
+    monkeypatch.setattr(server.ai_service, "generate_meta_tags", generate_meta_tags)
+
+    async def scenario():
+        await insert_article(server)
+        await server.db.users.insert_one({
+            "id": "user", "credits_used": 0, "credits_limit": 5,
+            "credit_holds": [{"id": "article", "expires_at": datetime.utcnow() + timedelta(minutes=5)}]
+        })
+        events = asyncio.Queue()
+        task = asyncio.create_task(server.stream_generation(
+            "article", "user", server.ArticleCreate(title="Streams", keywords=["streams"]), events
+        ))
+        assert (await events.get())[0] == "chunk"
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        drained = []
+        while not events.empty():
+            drained.append(events.get_nowait())
+        return (drained, await server.db.articles.find_one({"id": "article"}),
+                await server.db.users.find_one({"id": "user"}))
+
+    drained, article, user = run(scenario())
+    assert [item[0] if item else item for item in drained] == ["error", None]
+    assert article["status"] == "draft"
+    assert article["generation_error"]
+    assert user["credit_holds"] == []
+    assert user["credits_used"] == 0
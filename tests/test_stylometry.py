@@ -0,0 +1,42 @@
+from stylometry import MIN_WORDS, score_text
+
+MONOTONE = " ".join(["The tool helps teams plan content with clear steps today."] * 12)
+
+VARIED = """I nearly quit blogging in 2019. Why? Traffic had flatlined, my editor had left,
+and honestly the whole thing felt like shouting into a well. Then a reader emailed me -
+a retired ferry mechanic from Tromsø, of all people - asking about a post I had forgotten
+writing. We traded notes for months (he was wrong about diesel injectors; I was wrong about
+nearly everything else). That exchange rewired how I think about audiences: small, odd,
+specific. Stop chasing volume. Write for one curious person, then another; keep going.
+Some weeks nothing lands. Other weeks a throwaway paragraph gets quoted on three forums
+and a podcast I have never heard of! Unpredictable? Absolutely - and that is the fun of it."""
+
+
+def test_short_text_is_not_judged():
+    result = score_text("Too short to say anything.")
+    assert result["ai_detection_risk"] == 0
+    assert result["originality_score"] == 100
+    assert str(MIN_WORDS) in result["suggestions"][0]
+
+
+def test_monotone_text_scores_higher_risk_than_varied_prose():
+    monotone, varied = score_text(MONOTONE), score_text(VARIED)
+    assert monotone["ai_detection_risk"] > varied["ai_detection_risk"]
+    assert monotone["ai_detection_risk"] >= 70
+    assert monotone["originality_score"] < 20
+    assert monotone["flagged_patterns"]
+    assert varied["originality_score"] == 100
+
+
+def test_flagged_spans_are_offsets_into_the_original_text():
+    content = "Ærøskøbing café notes — " + MONOTONE
+    result = score_text(content)
+    assert {span["reason"] for span in result["flagged_spans"]} <= {"repeated_phrase", "uniform_rhythm"}
+    for span in result["flagged_spans"]:
+        assert content[span["start"]:span["end"]].startswith(span["text"])
+    first = next(span for span in result["flagged_spans"] if span["reason"] == "repeated_phrase")
+    assert content[first["start"]:first["end"]].startswith("The tool helps teams plan")
+
+
+def test_scoring_is_deterministic():
+    assert score_text(VARIED) == score_text(VARIED)